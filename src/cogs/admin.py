@@ -17,9 +17,18 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import os
+import sqlite3
 import aiohttp
-from core.config import PC_POWEROFF
+from core.config import PC_POWEROFF, CURRENT_YEAR, F1_INGEST_MAX_SEASONS
 from core.admin_check import admin_check, admin_check_slash
+from core.f1 import f1_cache, f1_requests, ingest_season
+from core.jolpica import jolpica
+from core.f1_stats import invalidate_career_stats
+from core.f1_search import index_archive
+from core.ai_scheduler import ai_scheduler
+from core.ai_memory import ai_memory
+from core.audio_cache import audio_cache
+from core.media_pool import media_pool
 import asyncio
 
 class StatusButtons(discord.ui.View):
@@ -129,14 +138,78 @@ class ownerCommands(commands.Cog):
     @commands.hybrid_command(name='delete_webhook', description='Deletes a webhook')
     @app_commands.describe(webhook='Webhook link.')
     async def delete_webhook(self, ctx: commands.Context, webhook: str):
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(webhook) as response:
-                if response.status in (401, 404):
-                    await ctx.send('This webhook does not exist. You may have already deleted it.')
-                elif response.status in (200, 204):
-                    await ctx.send('Removed webhook successfully')
-                else:
-                    await ctx.send(f'Webhook may not have been deleted. Response code is {response.status}.')
+        async with self.bot.http_session.delete(webhook) as response:
+            if response.status in (401, 404):
+                await ctx.send('This webhook does not exist. You may have already deleted it.')
+            elif response.status in (200, 204):
+                await ctx.send('Removed webhook successfully')
+            else:
+                await ctx.send(f'Webhook may not have been deleted. Response code is {response.status}.')
+
+    @admin_check()
+    @commands.hybrid_command(name='f1_cache_stats', description='[OWNER ONLY] Shows usage of the F1 cache and Jolpica client.')
+    async def f1_cache_stats(self, ctx: commands.Context):
+        stats = f1_cache.stats()
+        metrics = jolpica.metrics
+        await ctx.send(f"F1 cache: {stats['entries']}/{stats['maxsize']} entries, {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), {f1_requests.shared} coalesced requests.\n"
+                       f"Jolpica: {metrics['requests']} requests, {jolpica.queued} queued, {metrics['delayed']} delayed by the rate limiter, "
+                       f"{metrics['throttled']} throttled (429), {metrics['retries']} retries, {metrics['failures']} failures.", ephemeral=True)
+
+    @admin_check()
+    @commands.hybrid_command(name='ai_stats', description='[OWNER ONLY] Shows the AI request queue.')
+    async def ai_stats(self, ctx: commands.Context):
+        stats = ai_scheduler.stats()
+        memory = ai_memory.stats()
+        await ctx.send(f"AI: {stats['running']}/{ai_scheduler.max_concurrent} running, {stats['queue_depth']} queued (max {stats['max_queue_depth']}), "
+                       f"{stats['requests']} requests, {stats['queued']} had to wait, {stats['completed']} completed, {stats['cancelled']} cancelled.\n"
+                       f"Wait time: {stats['average_wait_time']:.1f} s on average, {stats['max_wait_time']:.1f} s at most.\n"
+                       f"Memory: {memory['turns']} messages in {memory['channels']} channels, {memory['tokens']}/{memory['total_budget']} tokens, "
+                       f"{memory['evicted_channels']} channels forgotten.", ephemeral=True)
+
+    @admin_check()
+    @commands.hybrid_command(name='audio_cache_stats', description='[OWNER ONLY] Shows how the cache of downloaded tracks and the media workers are used.')
+    async def audio_cache_stats(self, ctx: commands.Context):
+        await audio_cache.load()
+        stats = audio_cache.stats()
+        jobs = media_pool.stats()
+        await ctx.send(f"Audio cache: {stats['entries']} tracks ({stats['duration'] / 3600:.1f} h), "
+                       f"{stats['size'] / 1024 ** 2:.1f}/{stats['max_bytes'] / 1024 ** 2:.0f} MB used, "
+                       f"{stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%}), {stats['evictions']} evicted.\n"
+                       f"Media jobs: {jobs['running']}/{jobs['workers']} running, {jobs['waiting']} waiting, {jobs['completed']} completed, "
+                       f"{jobs['failed']} failed, {jobs['timeouts']} timed out, {jobs['cancelled']} cancelled, {jobs['rejected']} rejected.", ephemeral=True)
+
+    @admin_check()
+    @commands.hybrid_command(name='f1_ingest', description='[OWNER ONLY] Downloads whole F1 seasons into the local archive.')
+    @app_commands.describe(first_season='First season to download.', last_season='Last season to download (if not provided, only the first season is downloaded).')
+    async def f1_ingest(self, ctx: commands.Context, first_season: commands.Range[int, 1950, CURRENT_YEAR], last_season: commands.Range[int, 1950, CURRENT_YEAR] = None):
+        """Stores whole F1 seasons in the local archive, so they can be shown without Jolpica."""
+        if last_season is None:
+            last_season = first_season
+        if last_season < first_season:
+            await ctx.send('Last season must not be before the first season.', ephemeral=True)
+            return
+        seasons = last_season - first_season + 1
+        if seasons > F1_INGEST_MAX_SEASONS:
+            # Jolpica allows JOLPICA_HOURLY_LIMIT requests per hour, shared with the F1 commands of users.
+            await ctx.send(f'At most {F1_INGEST_MAX_SEASONS} seasons can be downloaded at once, so F1 commands keep working. '
+                           'Split the range into smaller ones.', ephemeral=True)
+            return
+        await ctx.send(f'Downloading F1 seasons {first_season}-{last_season}...')
+        # A throttled download can outlast the interaction, so the progress is shown in a message of its own.
+        message = await ctx.channel.send(f'Downloaded 0/{seasons} F1 seasons.')
+        stored = 0
+        for season in range(first_season, last_season + 1):
+            try:
+                stored += await ingest_season(season, session=self.bot.http_session)
+            except (aiohttp.ClientError, TimeoutError, sqlite3.Error, KeyError, ValueError) as e:
+                invalidate_career_stats()
+                await index_archive()
+                await message.edit(content=f'Failed to download the {season} season: {e}')
+                return
+            await message.edit(content=f'Downloaded F1 seasons {first_season}-{season} ({stored} results, {season - first_season + 1}/{seasons}).')
+        invalidate_career_stats()
+        await index_archive()
+        print(f'Ingested F1 seasons {first_season}-{last_season} ({stored} results)')
 
 
 async def setup(bot):
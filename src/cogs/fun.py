@@ -13,29 +13,58 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import sqlite3
+import aiohttp
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-import asyncio
-import os
-from core.config import TMP_BASE, cowsay, CURRENT_YEAR
-from core.f1 import race_result, f1_season_calendar, f1_standings_py
-from core.howmany import change_file
+from core.config import cowsay, CURRENT_YEAR, F1_RACE_WEEKEND_REFRESH_INTERVAL
+from core.f1 import race_result, f1_season_calendar, f1_standings_py, refresh_current_season
+from core.f1_season import f1_constructor_standings, f1_points_progression, f1_teammate_battles
+from core.f1_stats import f1_driver_stats, f1_compare_drivers
+from core.f1_search import search_races, search_drivers, resolve_race, index_in_background, refresh_search_index
+
+# Jolpica or the archive failing, or giving data that cannot be parsed. The refresh tries again on its next run.
+REFRESH_ERRORS = (aiohttp.ClientError, TimeoutError, sqlite3.Error, KeyError, ValueError)
 
 class F1Commands(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_load(self):
+        self.refresh_f1.start()
+
+    async def cog_unload(self):
+        self.refresh_f1.cancel()
+
+    @tasks.loop(seconds=F1_RACE_WEEKEND_REFRESH_INTERVAL)
+    async def refresh_f1(self):
+        """Keeps the current season's calendar and standings cached. Runs more often during race weekends."""
+        try:
+            interval = await refresh_current_season(session=self.bot.http_session)
+        except REFRESH_ERRORS as e:
+            print(f'Failed to refresh F1 data: {e}')
+            return
+        self.refresh_f1.change_interval(seconds=interval)
+        try:
+            await refresh_search_index(session=self.bot.http_session)
+        except REFRESH_ERRORS as e:
+            print(f'Failed to refresh F1 search index: {e}')
+
     @commands.hybrid_command(name='f1_race_result', description='Outputs the result of an F1 race')
     @app_commands.describe(
         season="Season of the race you want the result of",
-        roundnumber="Round number of the race asked. You can get one with /f1_calendar",
+        race="Round number or name of the race, circuit or country. You can get one with /f1_calendar",
         emojis='Default is True, if False, emojis for podium positions will not be given.'
     )
-    async def f1_race_result(self, ctx: commands.Context, season: commands.Range[int, 1950, CURRENT_YEAR], roundnumber: commands.Range[int, 1, 24], emojis: bool = True): # Remember to change if F1 introduces an F1 calendar with more than 24 rounds.
+    async def f1_race_result(self, ctx: commands.Context, season: commands.Range[int, 1950, CURRENT_YEAR], emojis: bool | None = True, *, race: str):
         """Gives the result of an F1 race asked for."""
         await ctx.defer()
-        grand_prix_name, results_list = await race_result(season=season, roundnumber=roundnumber, emojis=emojis)
+        roundnumber = await resolve_race(season, race, session=self.bot.http_session)
+        if roundnumber is None:
+            await ctx.send(f'Could not find {race} in {season} F1 season.')
+            return
+        grand_prix_name, results_list = await race_result(season=season, roundnumber=roundnumber, emojis=emojis, session=self.bot.http_session)
         if grand_prix_name is None or results_list == []:
             await ctx.send(f'Could not find R{roundnumber} in {season} F1 season.')
             return
@@ -47,11 +76,25 @@ class F1Commands(commands.Cog):
         )
         await ctx.send(embed=responseF1)
 
+    @f1_race_result.autocomplete('race')
+    async def race_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        season = interaction.namespace.season
+        if not isinstance(season, int):
+            return []
+        races = search_races(season, current)
+        if races is None:
+            index_in_background(season, session=self.bot.http_session)
+            return []
+        return [app_commands.Choice(name=label[:100], value=str(roundnumber)) for roundnumber, label in races]
+
+    async def driver_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        return [app_commands.Choice(name=name[:100], value=name[:100]) for name in search_drivers(current)]
+
     @commands.hybrid_command(name="f1_calendar", description="Shows an F1 calendar")
     @app_commands.describe(season="Season of the calendar you want to know")
     async def f1_calendar(self, ctx: commands.Context, season: commands.Range[int, 1950, CURRENT_YEAR]):
         await ctx.defer()
-        calendar_list = await f1_season_calendar(season)
+        calendar_list = await f1_season_calendar(season, session=self.bot.http_session)
         if calendar_list == []:
             await ctx.send(f'No calendar found for {season}.')
             return
@@ -75,7 +118,7 @@ class F1Commands(commands.Cog):
     @app_commands.describe(season="Season you want standings for.")
     async def f1_standings(self, ctx: commands.Context, season: commands.Range[int, 1950, CURRENT_YEAR]):
         await ctx.defer()
-        standings_list = await f1_standings_py(season)
+        standings_list = await f1_standings_py(season, session=self.bot.http_session)
         if standings_list == []:
             await ctx.send(f'No standings found for {season}.')
             return
@@ -92,6 +135,126 @@ class F1Commands(commands.Cog):
         )
         await ctx.send(embed=F1Standings)
 
+    @commands.hybrid_command(name="f1_constructor_standings", description="Shows F1 constructor standings for a season.")
+    @app_commands.describe(season="Season you want constructor standings for.")
+    async def f1_constructor_standings(self, ctx: commands.Context, season: commands.Range[int, 1950, CURRENT_YEAR]):
+        await ctx.defer()
+        standings_list = await f1_constructor_standings(season, session=self.bot.http_session)
+        if standings_list == []:
+            await ctx.send(f'No constructor standings found for {season}.')
+            return
+        standings = "\n".join(standings_list)
+        if not ctx.interaction:
+            await ctx.send(f"**F1 {season} constructor standings:**\n{standings}")
+            return
+
+        F1Standings = discord.Embed(
+            title=f"F1 {season} constructor standings",
+            description=standings,
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=F1Standings)
+
+    @commands.hybrid_command(name="f1_progression", description="Shows how an F1 championship developed round by round.")
+    @app_commands.describe(season="Season you want the progression of.", driver="Driver to follow (if not provided, the leader after every round is shown).")
+    async def f1_progression(self, ctx: commands.Context, season: commands.Range[int, 1950, CURRENT_YEAR], *, driver: str | None = None):
+        await ctx.defer()
+        progression_list = await f1_points_progression(season, driver=driver, session=self.bot.http_session)
+        if progression_list == []:
+            if driver:
+                await ctx.send(f'No points progression found for {driver} in {season}.')
+            else:
+                await ctx.send(f'No points progression found for {season}.')
+            return
+        progression = "\n".join(progression_list)
+        title = f"F1 {season} points progression" + (f" ({driver})" if driver else "")
+        if not ctx.interaction:
+            await ctx.send(f"**{title}:**\n{progression}")
+            return
+
+        F1Progression = discord.Embed(
+            title=title,
+            description=progression,
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=F1Progression)
+
+    @f1_progression.autocomplete('driver')
+    async def f1_progression_driver_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        return await self.driver_autocomplete(interaction, current)
+
+    @commands.hybrid_command(name="f1_teammates", description="Shows head-to-head race results between F1 teammates.")
+    @app_commands.describe(season="Season you want the teammate battles of.")
+    async def f1_teammates(self, ctx: commands.Context, season: commands.Range[int, 1950, CURRENT_YEAR]):
+        await ctx.defer()
+        battles_list = await f1_teammate_battles(season, session=self.bot.http_session)
+        if battles_list == []:
+            await ctx.send(f'No teammate battles found for {season}.')
+            return
+        battles = "\n".join(battles_list)[:4096]
+        if not ctx.interaction:
+            await ctx.send(f"**F1 {season} teammate battles:**\n{battles}"[:2000])
+            return
+
+        F1Teammates = discord.Embed(
+            title=f"F1 {season} teammate battles",
+            description=battles,
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=F1Teammates)
+
+    @commands.hybrid_command(name="f1_driver_stats", description="Shows career statistics of an F1 driver.")
+    @app_commands.describe(driver="Name of the driver.")
+    async def f1_driver_stats(self, ctx: commands.Context, *, driver: str):
+        await ctx.defer()
+        driver_name, stats_list = await f1_driver_stats(driver)
+        if driver_name is None:
+            await ctx.send(f'No statistics found for {driver}. Only seasons downloaded with /f1_ingest are counted.')
+            return
+        stats = "\n".join(stats_list)
+        if not ctx.interaction:
+            await ctx.send(f"**{driver_name} career statistics:**\n{stats}")
+            return
+
+        F1DriverStats = discord.Embed(
+            title=f"{driver_name} career statistics",
+            description=stats,
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=F1DriverStats)
+
+    @f1_driver_stats.autocomplete('driver')
+    async def f1_driver_stats_driver_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        return await self.driver_autocomplete(interaction, current)
+
+    @commands.hybrid_command(name="f1_compare", description="Compares career statistics of two F1 drivers.")
+    @app_commands.describe(first_driver="Name of the first driver.", second_driver="Name of the second driver.")
+    async def f1_compare(self, ctx: commands.Context, first_driver: str, second_driver: str):
+        await ctx.defer()
+        first_name, second_name, stats_list = await f1_compare_drivers(first_driver, second_driver)
+        if first_name is None:
+            await ctx.send(f'No statistics found for {first_driver} or {second_driver}. Only seasons downloaded with /f1_ingest are counted.')
+            return
+        stats = "\n".join(stats_list)
+        if not ctx.interaction:
+            await ctx.send(f"**{first_name} vs {second_name}:**\n{stats}")
+            return
+
+        F1Compare = discord.Embed(
+            title=f"{first_name} vs {second_name}",
+            description=stats,
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=F1Compare)
+
+    @f1_compare.autocomplete('first_driver')
+    async def f1_compare_first_driver_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        return await self.driver_autocomplete(interaction, current)
+
+    @f1_compare.autocomplete('second_driver')
+    async def f1_compare_second_driver_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        return await self.driver_autocomplete(interaction, current)
+
 
 class howmanybuttonButtons(discord.ui.View):
     """A class for ```/howmanybutton``` to work."""
@@ -101,7 +264,7 @@ class howmanybuttonButtons(discord.ui.View):
 
     @discord.ui.button(label="Click me!", style=discord.ButtonStyle.success)
     async def howmanybutton_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        count = await asyncio.to_thread(change_file, os.path.join(TMP_BASE, 'howmanybutton'), interaction.user.id)
+        count = await self.bot.counters.increment('howmanybutton', interaction.user.id)
         if count == 1:
             content = f'<@{interaction.user.id}> clicked the button {count} time!'
         else:
@@ -122,13 +285,24 @@ class Meme(commands.Cog):
     @commands.hybrid_command(name="howmanytimes", description="Says how many times was the command typed")
     async def howmanytimes(self, ctx: commands.Context):
         """Says how many times this user typed this command."""
-        count = await asyncio.to_thread(change_file, os.path.join(TMP_BASE, 'howmanytimes'), ctx.author.id)
+        count = await self.bot.counters.increment('howmanytimes', ctx.author.id)
 
         if count == 1:
             await ctx.send(f'You have used this command {count} time.')
             return
         await ctx.send(f'You have used this command {count} times.')
 
+    @commands.hybrid_command(name="howmany_leaderboard", description="Shows who used /howmanytimes and /howmanybutton the most")
+    async def howmany_leaderboard(self, ctx: commands.Context):
+        """Shows the top users of every counter and the rank of the user."""
+        embed = discord.Embed(title="How many leaderboard", color=discord.Color.green())
+        for feature, title in (('howmanytimes', '/howmanytimes'), ('howmanybutton', '/howmanybutton clicks')):
+            top, rank, count = await self.bot.counters.leaderboard(feature, ctx.author.id)
+            lines = [f'{position}. <@{user_id}> - {user_count}' for position, (user_id, user_count) in enumerate(top, start=1)]
+            lines.append(f'You: #{rank} ({count})' if rank else 'You: not ranked yet')
+            embed.add_field(name=title, value="\n".join(lines), inline=False)
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
     @commands.hybrid_command(name="complain", description="Compain to the bot owner.")
     async def complain(self, ctx: commands.Context):
         """Complaining to yourself why you wanted to complain to the bot owner."""
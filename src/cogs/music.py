@@ -16,15 +16,24 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import re
 import asyncio
-from core.youtube import download_youtube_video
+from core.youtube import create_source, youtube_regex1
+from core.config import AUDIO_STREAMING
+from core.music_queue import GuildQueue, Track
 from core.admin_check import admin_check
 
 class Music(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.queues = {}
 
-    @app_commands.command(name="play", description="Plays music on a voice channel")
+    def get_queue(self, guild: discord.Guild) -> GuildQueue:
+        if guild.id not in self.queues:
+            self.queues[guild.id] = GuildQueue()
+        return self.queues[guild.id]
+
+    @app_commands.command(name="play", description="Plays music on a voice channel, or adds it to the queue")
     @app_commands.describe(youtube_url="Youtube URL of the video you want to play.")
     @app_commands.guild_only()
     async def play(self, interaction: discord.Interaction, youtube_url: str):
@@ -33,34 +42,129 @@ class Music(commands.Cog):
             await interaction.followup.send("You are not in a voice channel.")
             print(f"{interaction.user.name} tried to rupture his eardrums, but he isn't in a VC, so I can't do it.")
             return
-        vc_chan = interaction.guild.voice_client
-        if vc_chan and vc_chan.is_playing():
-            await interaction.followup.send("Already playing audio.")
-            print(f"{interaction.user.name} tried to rupture his eardrums, but I already do it.")
-            return
-        first_response = await interaction.followup.send('Attempting to download the video. This may take a while...')
-        path = await asyncio.to_thread(download_youtube_video, youtube_url)
-        if not path:
-            await first_response.edit(content="Incorrect URL/Failed to download video.")
+        if not re.match(youtube_regex1, youtube_url):
+            await interaction.followup.send("Incorrect URL.")
             return
 
+        queue = self.get_queue(interaction.guild)
+        if queue.full:
+            await interaction.followup.send(f"The queue is full ({queue.max_size} tracks).")
+            return
+        vc_chan = interaction.guild.voice_client
         user_vc_chan = interaction.user.voice.channel
         if not vc_chan:
             await user_vc_chan.connect()
             print(f'Joined {user_vc_chan.name} to rupture eardrums of {interaction.user.name}')
-            vc_chan = interaction.guild.voice_client
-        else:
+        elif queue.current is None:
             await vc_chan.move_to(user_vc_chan)
 
+        position = queue.add(Track(youtube_url, interaction.user.name, interaction.channel))
+        if not position:
+            await interaction.followup.send(f"The queue is full ({queue.max_size} tracks).")
+            return
+        if queue.current is not None:
+            await interaction.followup.send(f"Added to the queue at position {position}.")
+            print(f"{interaction.user.name} queued {youtube_url}")
+            return
+
+        track = queue.advance()
+        if AUDIO_STREAMING:
+            first_response = await interaction.followup.send('Loading the video...')
+        else:
+            first_response = await interaction.followup.send('Attempting to download the video. This may take a while...')
+        await self.start(interaction.guild, track, first_response)
+
+    async def start(self, guild: discord.Guild, track: Track, response: discord.Message = None):
+        """
+        Plays the current track of the guild, and the next ones if it fails. The result is shown in *response*
+        or sent to the channel the track was requested in.
+        """
+        queue = self.get_queue(guild)
         try:
-            music = discord.FFmpegPCMAudio(path)
-            vc_chan.play(music)
-        except Exception:
-            await first_response.edit(content="Failed to play audio.")
+            while track is not None:
+                try:
+                    loaded = await track.prefetch(queue.load)
+                except (asyncio.CancelledError, OSError) as e:
+                    # The loading of the track was cancelled (e.g. by /clear_queue) or failed, not this task.
+                    if isinstance(e, asyncio.CancelledError) and asyncio.current_task().cancelling():
+                        raise
+                    print(f"Could not load {track.url}: {e!r}")
+                    loaded = None
+                vc_chan = guild.voice_client
+                if not vc_chan or not vc_chan.is_connected():
+                    queue.clear()
+                    queue.current = None
+                    return
+                if not loaded:
+                    await self.notify(track, response, f"Incorrect URL/Failed to download video: <{track.url}>")
+                else:
+                    try:
+                        music = await create_source(*loaded)
+                        vc_chan.play(music, after=lambda error: self.after_track(guild, error))
+                    except Exception:
+                        await self.notify(track, response, f"Failed to play audio: <{track.url}>")
+                    else:
+                        await self.notify(track, response, f"Playing <{track.url}> on <#{vc_chan.channel.id}>")
+                        print(f"Rupturing the eardrums of {track.requester}")
+                        return
+                response = None
+                track = queue.advance()
+        except BaseException:
+            # Otherwise the queue would wait forever for a track that is not playing.
+            queue.current = None
+            raise
+
+    def after_track(self, guild: discord.Guild, error: Exception) -> None:
+        """Called by the voice client in its own thread when a track ends, so the next one is started on the bot's loop."""
+        if error:
+            print(f"Player error in {guild.name}: {error}")
+        asyncio.run_coroutine_threadsafe(self.play_next(guild), self.bot.loop)
+
+    async def play_next(self, guild: discord.Guild):
+        await self.start(guild, self.get_queue(guild).advance())
+
+    async def notify(self, track: Track, response: discord.Message, content: str):
+        try:
+            if response:
+                await response.edit(content=content)
+            elif track.channel:
+                await track.channel.send(content)
+        except discord.HTTPException:
+            pass
+
+    @commands.hybrid_command(name="skip", description="Skips the track that is playing")
+    @commands.guild_only()
+    async def skip(self, ctx: commands.Context):
+        vc_chan = ctx.guild.voice_client
+        if not vc_chan or not (vc_chan.is_playing() or vc_chan.is_paused()):
+            await ctx.send("Nothing is playing.", ephemeral=True)
             return
+        # Stopping calls after_track, which starts the next track.
+        vc_chan.stop()
+        await ctx.send("Skipped.")
 
-        await first_response.edit(content=f"Playing audio on <#{user_vc_chan.id}>")
-        print(f"Rupturing the eardrums of {interaction.user.name}")
+    @commands.hybrid_command(name="queue", description="Shows the tracks waiting to be played")
+    @commands.guild_only()
+    async def show_queue(self, ctx: commands.Context):
+        queue = self.get_queue(ctx.guild)
+        if queue.current is None and not queue:
+            await ctx.send("The queue is empty.", ephemeral=True)
+            return
+        lines = []
+        if queue.current is not None:
+            lines.append(f"Playing: <{queue.current.url}> (requested by {queue.current.requester})")
+        for position, track in enumerate(queue, start=1):
+            if position > 10:
+                lines.append(f"...and {len(queue) - 10} more")
+                break
+            lines.append(f"{position}. <{track.url}> (requested by {track.requester})")
+        await ctx.send('\n'.join(lines), allowed_mentions=discord.AllowedMentions.none())
+
+    @commands.hybrid_command(name="clear_queue", description="Removes every track waiting to be played")
+    @commands.guild_only()
+    async def clear_queue(self, ctx: commands.Context):
+        removed = self.get_queue(ctx.guild).clear()
+        await ctx.send(f"Removed {removed} tracks from the queue.")
 
     @commands.hybrid_command(name="join_vc", description="Joins a voice channel")
     @app_commands.guild_only()
@@ -90,6 +194,7 @@ class Music(commands.Cog):
         if not ctx.guild.voice_client:
             await ctx.send("I'm not in a voice channel.", ephemeral=True)
             return
+        self.get_queue(ctx.guild).clear()
         try:
             await ctx.guild.voice_client.disconnect()
         except (discord.Forbidden, discord.HTTPException):
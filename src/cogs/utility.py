@@ -17,18 +17,20 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
-import os
-import aiohttp
-import random
-from core.config import TMP_BASE
-from core.howmany import create_file
-from core.ai import process_prompt
+import contextlib
+import io
+from core.ai import get_backend, process_prompt
+from core.stream import StreamRenderer, CURSOR
+from core.ai_scheduler import ai_scheduler
+from core.ai_cache import is_cached
+from core.ai_memory import ai_memory
 from core.image_checker import image_checker
 
 
 class Utility(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.ai_tasks = {}
 
     @app_commands.command(name="webhook", description="Sends a message to a Discord webhook")
     @app_commands.describe(webhook="URL of the webhook", message="Message that you want to send from the webhook", name="The name how webhook will appear", avatar_url="The avatar URL for the webhook")
@@ -41,34 +43,34 @@ class Utility(commands.Cog):
             webhook = webhook.replace("http://", "https://", 1)
         elif webhook.startswith('discord.com'):
             webhook = webhook.replace("discord.com", "https://discord.com", 1)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(webhook) as response:
-                if response.status == 401:
-                    await interaction.followup.send("Invalid webhook URL.", ephemeral=True)
-                    print(f"{interaction.user.name} tried to send a message '{message}' to a webhook '{webhook}' but received status code 401.")
-                    return
-
-            if avatar_url:
-                does_it_exist = await image_checker(session=session, image_link=avatar_url)
-                if does_it_exist is False:
-                    await interaction.followup.send("Incorrect avatar URL.", ephemeral=True)
-                    print(f"{interaction.user.name} thought that {avatar_url} was an avatar URL...")
-                    return
-
-            data = {
-                "content": message,
-                "username": name,
-                "avatar_url": avatar_url
-            }
-
-            async with session.post(webhook, json=data) as response:
-                if response.status == 429:
-                    await interaction.followup.send("Rate-limit has been hit. ", ephemeral=True)
-                    print(f"Failed to send a message to '{webhook}' of contents '{message}' because of rate limits")
-
-                if response.status == 204:
-                    await interaction.followup.send("Message sent successfully.", ephemeral=True)
-                    print(f"Sent '{message}' to webhook '{webhook}'")
+        session = self.bot.http_session
+        async with session.get(webhook) as response:
+            if response.status == 401:
+                await interaction.followup.send("Invalid webhook URL.", ephemeral=True)
+                print(f"{interaction.user.name} tried to send a message '{message}' to a webhook '{webhook}' but received status code 401.")
+                return
+
+        if avatar_url:
+            does_it_exist = await image_checker(session=session, image_link=avatar_url)
+            if does_it_exist is False:
+                await interaction.followup.send("Incorrect avatar URL.", ephemeral=True)
+                print(f"{interaction.user.name} thought that {avatar_url} was an avatar URL...")
+                return
+
+        data = {
+            "content": message,
+            "username": name,
+            "avatar_url": avatar_url
+        }
+
+        async with session.post(webhook, json=data) as response:
+            if response.status == 429:
+                await interaction.followup.send("Rate-limit has been hit. ", ephemeral=True)
+                print(f"Failed to send a message to '{webhook}' of contents '{message}' because of rate limits")
+
+            if response.status == 204:
+                await interaction.followup.send("Message sent successfully.", ephemeral=True)
+                print(f"Sent '{message}' to webhook '{webhook}'")
 
     @app_commands.command(name="say", description="Send a message to a channel")
     @app_commands.describe(
@@ -101,38 +103,57 @@ class Utility(commands.Cog):
     async def ai(self, ctx: commands.Context, *, prompt: str):
         await ctx.defer()
         print(f'{ctx.author.name} says: {prompt}')
-        full_response = ""
-        counter_ai = 0
-        message = await ctx.send('▌')
-        async for chunk in process_prompt(prompt):
-            full_response += chunk
-            counter_ai += 1
-
-            if len(full_response) <= 1900:
-                if counter_ai % 10 == 0:
-                    await message.edit(content=full_response + '▌')
-            else:
-                if len(full_response) <= 1912:
-                    await message.edit(content='Response is too long to send it on Discord. Soon, file with full response will be provided.')
-
-        if len(full_response) <= 1900:
-            await message.edit(content=full_response)
+        message = await ctx.send(CURSOR)
+        task = asyncio.create_task(self.respond(ctx, message, prompt))
+        # Deleting the command or the response cancels the request.
+        watched = [message.id] if ctx.interaction else [message.id, ctx.message.id]
+        for message_id in watched:
+            self.ai_tasks[message_id] = task
+        try:
+            await asyncio.wait({task})
+        finally:
+            for message_id in watched:
+                self.ai_tasks.pop(message_id, None)
+        if task.cancelled():
+            print(f"Cancelled the response to {ctx.author.name}, because the message was deleted")
             return
-
-        file_path = os.path.join(TMP_BASE, f"{random.randint(100000, 999999)}.txt")
-        await create_file(file_name=file_path, file_content=full_response)
-        await asyncio.sleep(0.05)
-
-        if not os.path.exists(file_path):
-            await message.edit(content='Response is too long to send it on Discord. Error while making a file with full response.')
+        task.result()
+
+    async def respond(self, ctx: commands.Context, message: discord.Message, prompt: str):
+        """Waits for a free AI slot, showing the queue position, and streams the response into *message*. Cached responses do not wait."""
+        async def show_position(position: int):
+            try:
+                await message.edit(content=f'{CURSOR} Waiting for a free slot, position in queue: {position}')
+            except discord.HTTPException:
+                pass
+
+        history = ai_memory.history(ctx.channel.id)
+        if is_cached(prompt, get_backend().model, history):
+            slot = contextlib.nullcontext()
+        else:
+            slot = ai_scheduler.slot(ctx.guild.id if ctx.guild else None, ctx.author.id, on_position=show_position)
+        async with slot:
+            renderer = StreamRenderer(message, send=ctx.send)
+            full_response = await renderer.render(process_prompt(prompt, history))
+        ai_memory.add(ctx.channel.id, prompt, full_response)
+        if not renderer.overflowed:
             return
 
-        await message.delete()
-        file = discord.File(f'{file_path}')
-        await ctx.send(content='Here is the file with the full response:', file=file)
+        file = discord.File(io.BytesIO(full_response.encode('utf-8')), filename='response.txt')
+        await ctx.send(content='Response is too long to send it on Discord. Here is the file with the full response:', file=file)
 
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    @commands.hybrid_command(name="ai_forget", description="Makes the AI forget the conversation in this channel.")
+    async def ai_forget(self, ctx: commands.Context):
+        if ai_memory.forget(ctx.channel.id):
+            await ctx.send("Forgot the conversation in this channel.")
+        else:
+            await ctx.send("There is no conversation to forget in this channel.")
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        task = self.ai_tasks.get(payload.message_id)
+        if task is not None:
+            task.cancel()
 
     @commands.guild_only()
     @commands.hybrid_command(name="hide_conversation", description="Hides the conversation")
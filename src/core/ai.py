@@ -13,23 +13,117 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from google import genai
+import asyncio
+import functools
+from abc import ABC, abstractmethod
 
-gemini_client = genai.Client().aio
+from core.ai_cache import cached_stream
+from core.config import (
+    AI_BACKEND,
+    AI_MODEL,
+    AI_STUB_CHUNK_SIZE,
+    AI_STUB_DELAY,
+    AI_STUB_LENGTH,
+)
 
-async def process_prompt(message: str):
+STUB_TEXT = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. '
+
+
+class AIBackend(ABC):
+    """Something that streams a response to a prompt. *model* names it in the response cache."""
+    model = None
+
+    @abstractmethod
+    def stream(self, message: str, history: list = ()):
+        """
+        Args:
+            message (str): The prompt from the user.
+            history (list): Earlier (prompt, response) turns of the conversation, oldest first.
+        Yields:
+            str: Text chunks of the response.
+        """
+
+
+class GeminiBackend(AIBackend):
+    """Google AI Studio. The client is created on the first prompt and reused, so the bot starts without an API key or network."""
+    def __init__(self, model: str = AI_MODEL):
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client().aio
+        return self._client
+
+    async def stream(self, message: str, history: list = ()):
+        contents = []
+        for prompt, response in history:
+            contents.append({'role': 'user', 'parts': [{'text': prompt}]})
+            contents.append({'role': 'model', 'parts': [{'text': response}]})
+        contents.append({'role': 'user', 'parts': [{'text': f'{message}'}]})
+        response = await self.client.models.generate_content_stream(
+            contents=contents,
+            model=self.model,
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend(AIBackend):
+    """A local, deterministic backend for testing and benchmarking the /ai streaming path without network."""
+    model = 'stub'
+
+    def __init__(self, chunk_size: int = AI_STUB_CHUNK_SIZE, delay: float = AI_STUB_DELAY, length: int = AI_STUB_LENGTH):
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.length = length
+
+    def response(self, message: str, history: list = ()) -> str:
+        """Gives the full response to a prompt: the prompt, then filler text up to *length* characters."""
+        text = f'You said: {message}\n\n'
+        if history:
+            text = f'You said: {message} (after {len(history)} earlier messages)\n\n'
+        filler = STUB_TEXT * (max(0, self.length - len(text)) // len(STUB_TEXT) + 1)
+        return (text + filler)[:max(self.length, len(text))]
+
+    async def stream(self, message: str, history: list = ()):
+        text = self.response(message, history)
+        for start in range(0, len(text), self.chunk_size):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield text[start:start + self.chunk_size]
+
+
+BACKENDS = {'gemini': GeminiBackend, 'stub': StubBackend}
+_backend = None
+
+
+def get_backend() -> AIBackend:
+    """
+    Returns:
+        AIBackend: The backend chosen with AI_BACKEND, created on first use.
+    """
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[AI_BACKEND]()
+    return _backend
+
+
+async def process_prompt(message: str, history: list = ()):
     """
-    Sends asynchronously a prompt to Gemma 3 27B and yields chunks of text.
+    Sends asynchronously a prompt to the AI backend (Gemma 3 27B on Google AI Studio by default) and yields chunks of text.
+    If AI_CACHE_TTL is set, a prompt repeated after the same history is answered from the cache.
 
     Args:
         message (str): The prompt from the user.
+        history (list): Earlier (prompt, response) turns of the conversation, oldest first.
     Yields:
-        str: Text chunks as they arrive from Google.
+        str: Text chunks as they arrive.
     """
-    response = await gemini_client.models.generate_content_stream(
-        contents=f'{message}',
-        model="gemma-3-27b-it",
-    )
-    async for chunk in response:
-        if chunk.text:
-            yield chunk.text
+    backend = get_backend()
+    stream = functools.partial(backend.stream, history=history) if history else backend.stream
+    async for chunk in cached_stream(message, backend.model, stream, history=history):
+        yield chunk
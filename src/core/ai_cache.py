@@ -0,0 +1,98 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import re
+
+from core.cache import TTLCache
+from core.config import AI_CACHE_SIZE, AI_CACHE_TTL, AI_MODEL
+
+ai_cache = TTLCache(maxsize=AI_CACHE_SIZE)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Makes prompts that differ only in case, whitespace or trailing punctuation equal.
+
+    Args:
+        prompt (str)
+
+    Returns:
+        str: Normalized prompt, e.g. 'What is  the capital of France??' -> 'what is the capital of france'.
+    """
+    return re.sub(r'\s+', ' ', prompt.casefold()).strip().rstrip('?!. ')
+
+
+def cache_key(prompt: str, model: str, history: list = ()) -> tuple:
+    """
+    Args:
+        prompt (str): The prompt from the user.
+        model (str): Name of the model.
+        history (list): Earlier (prompt, response) turns of the conversation. They change the answer,
+            so the key holds a digest of them.
+
+    Returns:
+        tuple: Key of the response in ai_cache.
+    """
+    digest = hashlib.blake2b(json.dumps(list(history)).encode('utf-8'), digest_size=16).hexdigest() if history else None
+    return model, normalize_prompt(prompt), digest
+
+
+def is_cached(prompt: str, model: str = AI_MODEL, history: list = ()) -> bool:
+    """
+    Args:
+        prompt (str): The prompt from the user.
+        model (str): Name of the model.
+        history (list): Earlier (prompt, response) turns of the conversation.
+
+    Returns:
+        bool: True if a response to the prompt is cached, so it can be given without waiting for the model.
+    """
+    return cache_key(prompt, model, history) in ai_cache
+
+
+async def cached_stream(prompt: str, model: str, stream, ttl: float = AI_CACHE_TTL, history: list = ()):
+    """
+    Yields the chunks of a cached response to the prompt if there is one, otherwise streams a new response
+    and caches its chunks once it is complete. Responses that fail halfway are not cached.
+
+    Args:
+        prompt (str): The prompt from the user.
+        model (str): Name of the model, part of the cache key.
+        stream: Function that takes the prompt and gives an async iterator of text chunks.
+        ttl (float): Seconds a response is cached for. 0 disables the cache.
+        history (list): Earlier (prompt, response) turns the response depends on, part of the cache key.
+
+    Yields:
+        str: Text chunks of the response.
+    """
+    if ttl <= 0:
+        async for chunk in stream(prompt):
+            yield chunk
+        return
+
+    key = cache_key(prompt, model, history)
+    chunks = ai_cache.get(key)
+    if chunks is not None:
+        for chunk in chunks:
+            yield chunk
+        return
+
+    chunks = []
+    async for chunk in stream(prompt):
+        chunks.append(chunk)
+        yield chunk
+    ai_cache.set(key, tuple(chunks), ttl=ttl)
@@ -0,0 +1,210 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import re
+from collections import OrderedDict, deque
+
+from core.config import AI_MEMORY_SUMMARY, AI_MEMORY_TOKENS, AI_MEMORY_TOTAL_TOKENS
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimates how many tokens a text is, at about four characters per token. Exact counts would need a request to the model.
+
+    Args:
+        text (str)
+
+    Returns:
+        int: Estimated number of tokens, at least 1.
+    """
+    return len(text) // 4 + 1
+
+
+def summarize(summary: str, prompt: str, response: str, budget: int) -> str:
+    """
+    Folds an evicted turn into the summary of a conversation: the first sentence of the prompt is kept
+    and the oldest sentences are dropped when the summary is over *budget* tokens.
+
+    Args:
+        summary (str): Summary of the turns evicted before, '' if none.
+        prompt (str): Prompt of the evicted turn.
+        response (str): Response of the evicted turn.
+        budget (int): Maximum tokens of the summary.
+
+    Returns:
+        str: The new summary.
+    """
+    sentence = re.split(r'(?<=[.!?])\s|\n', prompt.strip(), maxsplit=1)[0]
+    lines = [line for line in summary.split('\n') if line] + [f'- {sentence}']
+    while len(lines) > 1 and count_tokens('\n'.join(lines)) > budget:
+        lines.pop(0)
+    return '\n'.join(lines)[:budget * 4]
+
+
+class Conversation:
+    """
+    The recent turns of one channel, evicted oldest first to stay within *budget* tokens.
+
+    A turn is a (prompt, response, tokens) tuple. With *summary_budget*, evicted turns are folded into a short
+    summary that counts against the budget too; without it they are forgotten.
+    """
+    def __init__(self, budget: int, summary_budget: int = 0):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.turns = deque()
+        self.summary = ''
+        self.tokens = 0
+
+    def add(self, prompt: str, response: str) -> int:
+        """
+        Adds a turn and evicts the oldest ones while the conversation is over its budget.
+        A single turn longer than the budget is not kept at all.
+
+        Args:
+            prompt (str): Message of the user.
+            response (str): Response of the model.
+
+        Returns:
+            int: Change of the number of tokens, negative if more was evicted than added.
+        """
+        before = self.tokens
+        turn = (prompt, response, count_tokens(prompt) + count_tokens(response))
+        self.turns.append(turn)
+        self.tokens += turn[2]
+        while self.turns and self.tokens > self.budget:
+            self.evict()
+        return self.tokens - before
+
+    def evict(self) -> int:
+        """
+        Removes the oldest turn, or the summary if there are no turns.
+
+        Returns:
+            int: Number of tokens freed.
+        """
+        before = self.tokens
+        if not self.turns:
+            self.tokens -= count_tokens(self.summary) if self.summary else 0
+            self.summary = ''
+            return before - self.tokens
+        prompt, response, tokens = self.turns.popleft()
+        self.tokens -= tokens
+        if self.summary_budget:
+            if self.summary:
+                self.tokens -= count_tokens(self.summary)
+            self.summary = summarize(self.summary, prompt, response, self.summary_budget)
+            self.tokens += count_tokens(self.summary)
+        return before - self.tokens
+
+    def history(self) -> list:
+        """
+        Returns:
+            list: (prompt, response) tuples, oldest first. The summary, if any, comes first as its own turn.
+        """
+        history = []
+        if self.summary:
+            history.append((f'Summary of our earlier conversation:\n{self.summary}', 'OK.'))
+        history.extend((prompt, response) for prompt, response, _ in self.turns)
+        return history
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+
+class ConversationMemory:
+    """
+    Conversations of every channel, kept in memory. Each channel keeps at most *channel_budget* tokens and all
+    of them together at most *total_budget*; above that, whole conversations of the least recently used channels are dropped.
+    """
+    def __init__(self, channel_budget: int = AI_MEMORY_TOKENS, total_budget: int = AI_MEMORY_TOTAL_TOKENS,
+                 summary: bool = AI_MEMORY_SUMMARY):
+        self.channel_budget = channel_budget
+        self.total_budget = total_budget
+        self.summary_budget = channel_budget // 4 if summary else 0
+        self.tokens = 0
+        self.evicted_channels = 0
+        self._channels = OrderedDict()
+
+    def history(self, channel_id: int) -> list:
+        """
+        Args:
+            channel_id (int): ID of the channel.
+
+        Returns:
+            list: (prompt, response) tuples of the channel, oldest first, [] if it has no conversation.
+        """
+        conversation = self._channels.get(channel_id)
+        if conversation is None:
+            return []
+        self._channels.move_to_end(channel_id)
+        return conversation.history()
+
+    def add(self, channel_id: int, prompt: str, response: str) -> None:
+        """
+        Remembers a turn of a channel. Does nothing if memory is disabled (channel budget 0).
+
+        Args:
+            channel_id (int): ID of the channel.
+            prompt (str): Message of the user.
+            response (str): Response of the model.
+        """
+        if self.channel_budget <= 0:
+            return
+        conversation = self._channels.get(channel_id)
+        if conversation is None:
+            conversation = self._channels[channel_id] = Conversation(self.channel_budget, self.summary_budget)
+        self._channels.move_to_end(channel_id)
+        self.tokens += conversation.add(prompt, response)
+        if not conversation.tokens:
+            del self._channels[channel_id]
+        while self.tokens > self.total_budget and self._channels:
+            _, oldest = self._channels.popitem(last=False)
+            self.tokens -= oldest.tokens
+            self.evicted_channels += 1
+
+    def forget(self, channel_id: int) -> bool:
+        """
+        Drops the conversation of a channel.
+
+        Args:
+            channel_id (int): ID of the channel.
+
+        Returns:
+            bool: True if the channel had a conversation.
+        """
+        conversation = self._channels.pop(channel_id, None)
+        if conversation is None:
+            return False
+        self.tokens -= conversation.tokens
+        return True
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Number of channels and turns, tokens used, the total budget and channels evicted so far.
+        """
+        return {
+            'channels': len(self._channels),
+            'turns': sum(len(conversation) for conversation in self._channels.values()),
+            'tokens': self.tokens,
+            'total_budget': self.total_budget,
+            'evicted_channels': self.evicted_channels,
+        }
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+
+ai_memory = ConversationMemory()
@@ -0,0 +1,187 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from core.config import AI_MAX_CONCURRENT
+
+
+class Ticket:
+    """A request waiting for or holding a slot of the AIScheduler."""
+    def __init__(self, guild_id: int, user_id: int):
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.started = False
+        self.enqueued_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class AIScheduler:
+    """
+    Lets at most *max_concurrent* AI requests run at once and queues the rest fairly.
+
+    Free slots go to guilds in turn, and inside a guild to users in turn, so one busy channel or user
+    cannot make everyone else wait behind all of their requests. Direct messages are one group (guild None).
+    """
+    def __init__(self, max_concurrent: int = AI_MAX_CONCURRENT):
+        self.max_concurrent = max_concurrent
+        self.running = 0
+        self.metrics = {
+            'requests': 0, 'queued': 0, 'started': 0, 'completed': 0, 'cancelled': 0,
+            'max_queue_depth': 0, 'wait_time': 0.0, 'max_wait_time': 0.0,
+        }
+        self._guilds = OrderedDict()
+        self._changed = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(len(tickets) for users in self._guilds.values() for tickets in users.values())
+
+    def _order(self):
+        """Yields waiting tickets in the order they will get a slot."""
+        guilds = deque((guild_id, deque((user_id, deque(tickets)) for user_id, tickets in users.items())) for guild_id, users in self._guilds.items())
+        while guilds:
+            guild_id, users = guilds.popleft()
+            user_id, tickets = users.popleft()
+            yield tickets.popleft()
+            if tickets:
+                users.append((user_id, tickets))
+            if users:
+                guilds.append((guild_id, users))
+
+    def position(self, ticket: Ticket) -> int:
+        """
+        Args:
+            ticket (Ticket)
+
+        Returns:
+            int: 1 if the ticket gets the next free slot, 2 if the one after it and so on. 0 if it already has a slot.
+        """
+        if ticket.started:
+            return 0
+        for position, waiting in enumerate(self._order(), start=1):
+            if waiting is ticket:
+                return position
+        return 0
+
+    def _notify(self) -> None:
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = None
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_concurrent and self._guilds:
+            guild_id, users = next(iter(self._guilds.items()))
+            user_id, tickets = next(iter(users.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            if users:
+                self._guilds.move_to_end(guild_id)
+            else:
+                del self._guilds[guild_id]
+            self._start(ticket)
+        self._notify()
+
+    def _start(self, ticket: Ticket) -> None:
+        waited = time.monotonic() - ticket.enqueued_at
+        self.metrics['wait_time'] += waited
+        self.metrics['max_wait_time'] = max(self.metrics['max_wait_time'], waited)
+        ticket.started = True
+        self.metrics['started'] += 1
+        self.running += 1
+        ticket.future.set_result(None)
+
+    def _remove(self, ticket: Ticket) -> None:
+        users = self._guilds.get(ticket.guild_id, {})
+        tickets = users.get(ticket.user_id)
+        if tickets is None or ticket not in tickets:
+            return
+        tickets.remove(ticket)
+        if not tickets:
+            del users[ticket.user_id]
+        if not users:
+            del self._guilds[ticket.guild_id]
+        self._notify()
+
+    async def _wait(self, ticket: Ticket, on_position) -> None:
+        shown = None
+        while not ticket.started:
+            position = self.position(ticket)
+            if on_position is not None and position != shown:
+                shown = position
+                await on_position(position)
+                continue
+            if self._changed is None:
+                self._changed = asyncio.get_running_loop().create_future()
+            await asyncio.wait((ticket.future, self._changed), return_when=asyncio.FIRST_COMPLETED)
+
+    @asynccontextmanager
+    async def slot(self, guild_id: int, user_id: int, on_position=None):
+        """
+        Waits for a free slot and holds it until the block ends. Cancelling the waiting task leaves the queue.
+
+        Args:
+            guild_id (int): ID of the guild of the request, None for direct messages.
+            user_id (int): ID of the user of the request.
+            on_position: Coroutine function called with the queue position whenever it changes while waiting.
+        """
+        ticket = Ticket(guild_id, user_id)
+        self.metrics['requests'] += 1
+        if self.running < self.max_concurrent and not self._guilds:
+            self._start(ticket)
+        else:
+            self.metrics['queued'] += 1
+            self._guilds.setdefault(guild_id, OrderedDict()).setdefault(user_id, deque()).append(ticket)
+            self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.queue_depth)
+            self._notify()
+        cancelled = False
+        try:
+            await self._wait(ticket, on_position)
+            yield ticket
+        except asyncio.CancelledError:
+            cancelled = True
+            self.metrics['cancelled'] += 1
+            raise
+        finally:
+            if ticket.started:
+                self.running -= 1
+                if not cancelled:
+                    self.metrics['completed'] += 1
+                self._dispatch()
+            else:
+                self._remove(ticket)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Running and queued requests, and the metrics with the average wait time in seconds.
+        """
+        started = self.metrics['started']
+        return {
+            **self.metrics,
+            'running': self.running,
+            'queue_depth': self.queue_depth,
+            'average_wait_time': self.metrics['wait_time'] / started if started else 0.0,
+        }
+
+
+ai_scheduler = AIScheduler()
@@ -0,0 +1,332 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+
+from core.cache import SingleFlight
+from core.config import (
+    AUDIO_CACHE_DIR,
+    AUDIO_CACHE_SIZE,
+    AUDIO_CACHE_WARM,
+    MEDIA_RESOLVE_TIMEOUT,
+)
+from core.files import write_file
+from core.media_pool import MediaPool, MediaPoolFull, media_pool
+from core.youtube import (
+    download_youtube_video,
+    get_stream_url,
+    get_yt_video_id,
+    youtube_regex1,
+)
+
+INDEX_FILE = 'index.json'
+_warming = set()
+# Failures of the media pool itself. yt-dlp errors are handled in the worker and give None.
+POOL_ERRORS = (TimeoutError, MediaPoolFull, BrokenProcessPool)
+
+
+def _discard_download(downloaded) -> None:
+    if downloaded:
+        shutil.rmtree(os.path.dirname(downloaded[1]), ignore_errors=True)
+
+
+class AudioEntry:
+    """A cached track: its video ID, size in bytes, last access (Unix time) and duration in seconds, None if unknown."""
+    __slots__ = ('duration', 'last_access', 'size', 'video_id')
+
+    def __init__(self, video_id: str, size: int, last_access: float, duration: float | None = None):
+        self.video_id = video_id
+        self.size = size
+        self.last_access = last_access
+        self.duration = duration
+
+    def to_dict(self) -> dict:
+        return {'video_id': self.video_id, 'size': self.size, 'last_access': self.last_access, 'duration': self.duration}
+
+
+def _scan(directory: str) -> list:
+    """
+    Finds the cached tracks in a folder and deletes downloads that were interrupted. Runs in a thread.
+
+    Returns:
+        list: AudioEntry of every track, least recently played first.
+    """
+    os.makedirs(directory, exist_ok=True)
+    saved = {}
+    try:
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+            saved = {entry['video_id']: entry for entry in json.load(f)}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith('.download-'):
+            # Left over from a download that was interrupted.
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        if not name.endswith('.opus'):
+            continue
+        video_id = name.removesuffix('.opus')
+        stat = os.stat(path)
+        entry = saved.get(video_id, {})
+        entries.append(AudioEntry(video_id, stat.st_size, entry.get('last_access', stat.st_mtime), entry.get('duration')))
+    return sorted(entries, key=lambda entry: entry.last_access)
+
+
+def _move(source: str, path: str) -> int:
+    size = os.path.getsize(source)
+    os.replace(source, path)
+    return size
+
+
+def _delete(paths: list) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class AudioCache:
+    """
+    Downloaded tracks in *directory*, at most *max_bytes* of them. The least recently played tracks are deleted first.
+
+    Downloads are written to a temporary folder and moved into place once complete, so a half-written file is
+    never played. The index of tracks is kept in memory and saved to index.json; files that are not in it
+    are added on start and files that are gone are forgotten. Downloads run in *pool*, media_pool by default.
+    Moving, deleting and scanning files and saving the index run in threads, so they never block the event loop.
+    """
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_SIZE * 1024 * 1024, pool: MediaPool | None = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.pool = pool if pool is not None else media_pool
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._save_lock = asyncio.Lock()
+        self._downloads = SingleFlight()
+
+    def path(self, video_id: str) -> str:
+        return os.path.join(self.directory, f'{video_id}.opus')
+
+    async def load(self) -> None:
+        """Reads the index and the folder of tracks the first time it is called."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            entries = await asyncio.to_thread(_scan, self.directory)
+            for entry in entries:
+                self._entries[entry.video_id] = entry
+                self.size += entry.size
+            self._loaded = True
+            await asyncio.to_thread(_delete, self._evict())
+
+    async def get(self, video_id: str) -> str:
+        """
+        Args:
+            video_id (str): YouTube video ID.
+
+        Returns:
+            str: Path of the cached track, None if it is not cached. Counts as a hit or a miss.
+        """
+        await self.load()
+        entry = self._entries.get(video_id)
+        if entry is not None and not os.path.exists(self.path(video_id)):
+            self._forget(video_id)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.last_access = time.time()
+        self._entries.move_to_end(video_id)
+        return self.path(video_id)
+
+    async def add(self, video_id: str, source: str, duration: float | None = None) -> str:
+        """
+        Moves a downloaded file into the cache and deletes the least recently played tracks if it is over its size.
+        *source* has to be on the same file system as the cache, so the move is atomic.
+
+        Args:
+            video_id (str): YouTube video ID.
+            source (str): Path of the complete download.
+            duration (float): Length of the track in seconds, None if unknown.
+
+        Returns:
+            str: Path of the cached track.
+        """
+        await self.load()
+        path = self.path(video_id)
+        size = await asyncio.to_thread(_move, source, path)
+        if video_id in self._entries:
+            self.size -= self._entries.pop(video_id).size
+        self._entries[video_id] = AudioEntry(video_id, size, time.time(), duration)
+        self.size += size
+        await asyncio.to_thread(_delete, self._evict(keep=video_id))
+        await self.save()
+        return path
+
+    def _forget(self, video_id: str) -> str:
+        self.size -= self._entries.pop(video_id).size
+        return self.path(video_id)
+
+    def _evict(self, keep: str | None = None) -> list:
+        # A track being played is only unlinked on Linux, so evicting it does not stop the playback.
+        evicted = []
+        for video_id in list(self._entries):
+            if self.size <= self.max_bytes:
+                break
+            if video_id != keep:
+                evicted.append(self._forget(video_id))
+                self.evictions += 1
+        return evicted
+
+    async def save(self) -> None:
+        """Saves the index, so the order of tracks and their durations survive a restart."""
+        async with self._save_lock:
+            if self._loaded:
+                index = json.dumps([entry.to_dict() for entry in self._entries.values()])
+                await asyncio.to_thread(write_file, os.path.join(self.directory, INDEX_FILE), [index])
+
+    async def fetch(self, url: str) -> str:
+        """
+        Gives the path of a YouTube track, downloading it if it is not cached. Concurrent requests for
+        the same track share one download.
+
+        Args:
+            url (str): The URL of the YouTube video.
+
+        Returns:
+            str: Path of the track, None if the URL is not a YouTube video or the download failed.
+        """
+        if not re.match(youtube_regex1, url):
+            return None
+        video_id = get_yt_video_id(url)
+        if video_id:
+            path = await self.get(video_id)
+            if path:
+                return path
+        return await self.download(url)
+
+    async def download(self, url: str) -> str:
+        """
+        Downloads a track into the cache, even if it is already cached. Concurrent downloads of the same track are shared.
+
+        Args:
+            url (str): The URL of the YouTube video.
+
+        Returns:
+            str: Path of the track, None if the download failed.
+        """
+        return await self._downloads.do(get_yt_video_id(url) or url, self._download, url)
+
+    async def _download(self, url: str) -> str:
+        await self.load()
+        # Created here rather than in the worker, so it can be deleted even if the worker is killed halfway.
+        folder = await asyncio.to_thread(tempfile.mkdtemp, prefix='.download-', dir=self.directory)
+        try:
+            downloaded = await self.pool.run(download_youtube_video, url, folder, cleanup=_discard_download)
+        except POOL_ERRORS as e:
+            print(f"Could not download {url}: {e!r}")
+            await asyncio.to_thread(shutil.rmtree, folder, ignore_errors=True)
+            return None
+        try:
+            if not downloaded:
+                return None
+            video_id, path, duration = downloaded
+            return await self.add(video_id, path, duration)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, folder, ignore_errors=True)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Number of tracks, bytes used, the budget, hits, misses, hit rate (0.0 - 1.0), evictions and total duration in seconds.
+                The tracks are only counted once the cache is loaded.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'duration': sum(entry.duration or 0 for entry in self._entries.values()),
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+audio_cache = AudioCache()
+
+
+def _warmed(task: asyncio.Task) -> None:
+    _warming.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Failed to cache a track: {task.exception()}")
+
+
+async def resolve_audio(url: str, cache: AudioCache = audio_cache, warm: bool = AUDIO_CACHE_WARM):
+    """
+    Gives something FFmpeg can start playing at once: the cached track if there is one, otherwise the URL
+    of the audio stream. With *warm*, the track is downloaded into the cache in the background, so it
+    does not have to be streamed next time.
+
+    Args:
+        url (str): The URL of the YouTube video.
+        cache (AudioCache): Cache to look in and to warm.
+        warm (bool): Whether to cache a streamed track.
+
+    Returns:
+        str: Path of the cached track or URL of the stream.
+        bool: True if it is a stream, so it should be played with FFMPEG_STREAM_OPTIONS.
+        str: Audio codec, 'opus' for cached tracks, None if unknown.
+        bool: None if the URL is not a YouTube video or the video was not found.
+    """
+    if not re.match(youtube_regex1, url):
+        return None
+    video_id = get_yt_video_id(url)
+    path = await cache.get(video_id) if video_id else None
+    if path:
+        return path, False, 'opus'
+    try:
+        resolved = await cache.pool.run(get_stream_url, url, timeout=MEDIA_RESOLVE_TIMEOUT)
+    except POOL_ERRORS as e:
+        print(f"Could not find the stream of {url}: {e!r}")
+        return None
+    if not resolved:
+        return None
+    _, stream_url, _, codec = resolved
+    if warm:
+        task = asyncio.create_task(cache.download(url))
+        _warming.add(task)
+        task.add_done_callback(_warmed)
+    return stream_url, True, codec
@@ -0,0 +1,152 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A size-bounded LRU cache. Every entry can have its own time to live or none at all."""
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        """
+        Gives the cached value for a key. Expired entries count as a miss, but are kept until evicted for get_stale.
+
+        Args:
+            key: Key of the entry.
+            default: Value given back if there is no fresh entry.
+
+        Returns:
+            The cached value, or *default* if the key is missing or expired.
+        """
+        value, fresh = self._lookup(key)
+        if not fresh:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def get_stale(self, key) -> tuple:
+        """
+        Gives the cached value for a key even if it has expired.
+
+        Args:
+            key: Key of the entry.
+
+        Returns:
+            The cached value, None if the key is missing.
+            bool: True if the entry has not expired yet.
+        """
+        value, fresh = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value, fresh
+
+    def _lookup(self, key) -> tuple:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        self._entries.move_to_end(key)
+        expires_at, value = entry
+        return value, expires_at is None or expires_at > time.monotonic()
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        """
+        Stores a value. If the cache is full, the least recently used entry is evicted.
+
+        Args:
+            key: Key of the entry.
+            value: Value to store.
+            ttl (float): Seconds after which the entry expires. None means it never expires.
+        """
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries and resets the hit/miss counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Gives usage counters of the cache.
+
+        Returns:
+            dict: Number of entries, max size, hits, misses and hit rate (0.0 - 1.0).
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def __contains__(self, key) -> bool:
+        """True if there is a fresh entry for the key. Unlike get, this does not count as a hit or miss."""
+        entry = self._entries.get(key)
+        return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight:
+    """Makes concurrent calls with the same key share one execution and its result."""
+    def __init__(self):
+        self.shared = 0
+        self._calls = {}
+
+    async def do(self, key, function, *args):
+        """
+        Runs *function* unless a call with the same key is already running, in which case its result is awaited instead.
+
+        Args:
+            key: Key identifying the call, e.g. a request URL.
+            function: Coroutine function to run.
+            *args: Arguments for *function*.
+
+        Returns:
+            The result of the shared call. Exceptions are raised in every caller.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(function(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        # Shielded, so a caller that gets cancelled does not cancel the call for everyone else.
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -31,6 +31,54 @@ if PC_POWEROFF != 'True':
 
 CURRENT_YEAR = datetime.date.today().year
 
+HTTP_LIMIT = int(os.environ.get('HTTP_LIMIT', '100'))
+HTTP_LIMIT_PER_HOST = int(os.environ.get('HTTP_LIMIT_PER_HOST', '10'))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', '30'))
+HTTP_DNS_CACHE_TTL = int(os.environ.get('HTTP_DNS_CACHE_TTL', '300'))
+
+F1_CACHE_SIZE = int(os.environ.get('F1_CACHE_SIZE', '512'))
+F1_CURRENT_SEASON_TTL = float(os.environ.get('F1_CURRENT_SEASON_TTL', '300'))
+F1_ARCHIVE_PATH = os.environ.get('F1_ARCHIVE_PATH', os.path.join(TMP_BASE, 'f1.sqlite3'))
+F1_INGEST_MAX_SEASONS = int(os.environ.get('F1_INGEST_MAX_SEASONS', '25'))
+F1_PAGE_SIZE = 100
+F1_SEASON_CACHE_SIZE = int(os.environ.get('F1_SEASON_CACHE_SIZE', '32'))
+
+JOLPICA_URL = os.environ.get('JOLPICA_URL', 'https://api.jolpi.ca/ergast/f1').rstrip('/')
+JOLPICA_BURST_LIMIT = float(os.environ.get('JOLPICA_BURST_LIMIT', '4'))
+JOLPICA_HOURLY_LIMIT = float(os.environ.get('JOLPICA_HOURLY_LIMIT', '500'))
+JOLPICA_MAX_RETRIES = int(os.environ.get('JOLPICA_MAX_RETRIES', '3'))
+JOLPICA_BACKOFF = float(os.environ.get('JOLPICA_BACKOFF', '1'))
+F1_REFRESH_INTERVAL = float(os.environ.get('F1_REFRESH_INTERVAL', '21600'))
+F1_RACE_WEEKEND_REFRESH_INTERVAL = float(os.environ.get('F1_RACE_WEEKEND_REFRESH_INTERVAL', '300'))
+
+AI_EDIT_INTERVAL = float(os.environ.get('AI_EDIT_INTERVAL', '1'))
+AI_MAX_PAGES = int(os.environ.get('AI_MAX_PAGES', '5'))
+AI_MAX_CONCURRENT = int(os.environ.get('AI_MAX_CONCURRENT', '4'))
+AI_BACKEND = os.environ.get('AI_BACKEND', 'gemini')
+AI_MODEL = os.environ.get('AI_MODEL', 'gemma-3-27b-it')
+AI_STUB_CHUNK_SIZE = int(os.environ.get('AI_STUB_CHUNK_SIZE', '20'))
+AI_STUB_DELAY = float(os.environ.get('AI_STUB_DELAY', '0.05'))
+AI_STUB_LENGTH = int(os.environ.get('AI_STUB_LENGTH', '500'))
+AI_CACHE_SIZE = int(os.environ.get('AI_CACHE_SIZE', '256'))
+AI_CACHE_TTL = float(os.environ.get('AI_CACHE_TTL', '0'))
+AI_MEMORY_TOKENS = int(os.environ.get('AI_MEMORY_TOKENS', '2000'))
+AI_MEMORY_TOTAL_TOKENS = int(os.environ.get('AI_MEMORY_TOTAL_TOKENS', '1000000'))
+AI_MEMORY_SUMMARY = os.environ.get('AI_MEMORY_SUMMARY') == 'True'
+
+AUDIO_CACHE_DIR = os.environ.get('AUDIO_CACHE_DIR', os.path.join(TMP_BASE, 'audio'))
+AUDIO_CACHE_SIZE = int(os.environ.get('AUDIO_CACHE_SIZE', '1024'))
+AUDIO_STREAMING = os.environ.get('AUDIO_STREAMING', 'True') == 'True'
+AUDIO_CACHE_WARM = os.environ.get('AUDIO_CACHE_WARM', 'True') == 'True'
+MUSIC_QUEUE_SIZE = int(os.environ.get('MUSIC_QUEUE_SIZE', '50'))
+MEDIA_WORKERS = int(os.environ.get('MEDIA_WORKERS', '2'))
+MEDIA_QUEUE_SIZE = int(os.environ.get('MEDIA_QUEUE_SIZE', '16'))
+MEDIA_TIMEOUT = float(os.environ.get('MEDIA_TIMEOUT', '600'))
+MEDIA_RESOLVE_TIMEOUT = float(os.environ.get('MEDIA_RESOLVE_TIMEOUT', '30'))
+
+COUNTERS_PATH = os.environ.get('COUNTERS_PATH', os.path.join(TMP_BASE, 'counters.sqlite3'))
+COUNTERS_FLUSH_INTERVAL = float(os.environ.get('COUNTERS_FLUSH_INTERVAL', '1000'))
+COUNTERS_FLUSH_UPDATES = int(os.environ.get('COUNTERS_FLUSH_UPDATES', '100'))
+
 status_map = {
     "Finished": "Finished",
     "+1 Lap": "+1 Lap",
@@ -13,108 +13,394 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import datetime
 import aiohttp
-from core.config import status_map, CURRENT_YEAR
+from core.config import (
+    status_map, CURRENT_YEAR, F1_CACHE_SIZE, F1_CURRENT_SEASON_TTL, F1_PAGE_SIZE,
+    F1_REFRESH_INTERVAL, F1_RACE_WEEKEND_REFRESH_INTERVAL, JOLPICA_URL,
+)
+from core.http import use_session
+from core.cache import TTLCache, SingleFlight
+from core.jolpica import jolpica, PRIORITY_USER, PRIORITY_BACKGROUND
+from core.f1_archive import f1_archive
 
+f1_cache = TTLCache(maxsize=F1_CACHE_SIZE)
+f1_requests = SingleFlight()
+_revalidations = set()
 
-async def race_result(season: int, roundnumber: int, emojis: bool = True) -> list:
+
+def cache_ttl(season: int) -> float | None:
+    """
+    Completed seasons never change, so they are cached forever. The current season expires after F1_CURRENT_SEASON_TTL.
+
+    Returns:
+        float | None: Seconds the responses about the season are cached for, None if they never expire.
+    """
+    if season < CURRENT_YEAR:
+        return None
+    return F1_CURRENT_SEASON_TTL
+
+
+async def _get_json(session: aiohttp.ClientSession, url: str, season: int, stale_ok: bool = False) -> dict:
+    """
+    Gives the JSON response of a Jolpica endpoint, from the cache if possible.
+    Concurrent requests for the same URL share a single upstream request.
+
+    Args:
+        session (aiohttp.ClientSession): Session to use. If None, a temporary one is opened.
+        url (str): Full URL of the endpoint.
+        season (int): Season the request is about, used to decide how long to cache the response.
+        stale_ok (bool): If True, an expired cached response is given back at once and refreshed in the background.
+
+    Returns:
+        dict: Parsed JSON, or None if Jolpica responded with a 4xx status code.
+    """
+    if stale_ok:
+        data, fresh = f1_cache.get_stale(url)
+        if data is not None:
+            if not fresh:
+                _revalidate(session, url, season)
+            return data
+    else:
+        data = f1_cache.get(url)
+        if data is not None:
+            return data
+    return await f1_requests.do(url, _fetch_and_cache, session, url, season, PRIORITY_USER)
+
+
+def _revalidate(session: aiohttp.ClientSession, url: str, season: int) -> None:
+    """Refreshes a cached response in a background task."""
+    task = asyncio.create_task(f1_requests.do(url, _fetch_and_cache, session, url, season, PRIORITY_BACKGROUND))
+    _revalidations.add(task)
+    task.add_done_callback(_revalidation_done)
+
+
+def _revalidation_done(task: asyncio.Task) -> None:
+    _revalidations.discard(task)
+    if not task.cancelled() and task.exception():
+        print(f'Failed to refresh F1 data: {task.exception()}')
+
+
+async def _fetch_and_cache(session: aiohttp.ClientSession, url: str, season: int, priority: int) -> dict:
+    data = await jolpica.get_json(session, url, priority)
+    if data is not None:
+        f1_cache.set(url, data, ttl=cache_ttl(season))
+    return data
+
+
+async def _fetch_pages(session: aiohttp.ClientSession, url: str, priority: int = PRIORITY_BACKGROUND) -> list:
+    """
+    Requests every page of a paginated Jolpica endpoint using limit/offset.
+
+    Args:
+        session (aiohttp.ClientSession): Session to use. If None, a temporary one is opened.
+        url (str): Full URL of the endpoint without query parameters.
+        priority (int): Priority of the requests in the Jolpica client.
+
+    Returns:
+        list: 'MRData' objects of all pages.
+    """
+    pages = []
+    offset = 0
+    while True:
+        data = await jolpica.get_json(session, f'{url}?limit={F1_PAGE_SIZE}&offset={offset}', priority)
+        if data is None:
+            return pages
+        page = data['MRData']
+        pages.append(page)
+        offset += int(page.get('limit') or F1_PAGE_SIZE)
+        if offset >= int(page.get('total', 0)):
+            return pages
+
+
+async def ingest_season(season: int, session: aiohttp.ClientSession | None = None) -> int:
+    """
+    Downloads a whole season from Jolpica (calendar, every race and sprint result and final driver standings) and stores it in the F1 archive.
+
+    Args:
+        season (int): Season to ingest.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        int: Number of stored race results. 0 if Jolpica has no races for the season, then nothing is stored.
+    """
+    async with use_session(session) as http_session:
+        calendar_pages = await _fetch_pages(http_session, f'{JOLPICA_URL}/{season}/races/')
+        result_pages = await _fetch_pages(http_session, f'{JOLPICA_URL}/{season}/results/')
+        sprint_pages = await _fetch_pages(http_session, f'{JOLPICA_URL}/{season}/sprint/')
+        standings_pages = await _fetch_pages(http_session, f'{JOLPICA_URL}/{season}/driverstandings/')
+
+    races = {}
+    for page in calendar_pages:
+        for race in page['RaceTable']['Races']:
+            races[race['round']] = race
+    for key, pages in (('Results', result_pages), ('SprintResults', sprint_pages)):
+        for page in pages:
+            for race in page['RaceTable']['Races']:
+                results = race.pop(key, [])
+                races.setdefault(race['round'], race).setdefault(key, []).extend(results)
+    if not races:
+        return 0
+
+    standings = []
+    for page in standings_pages:
+        for standings_list in page['StandingsTable']['StandingsLists']:
+            standings.extend(standings_list['DriverStandings'])
+    return await asyncio.to_thread(f1_archive.store_season, season, list(races.values()), standings)
+
+
+def _parse_season_results(pages: list, key: str) -> list:
+    rows = []
+    for page in pages:
+        for race in page['RaceTable']['Races']:
+            for result in race.get(key, []):
+                rows.append({
+                    'round': int(race['round']),
+                    'race_name': race['raceName'],
+                    'position': int(result['position']),
+                    'driver_id': result['Driver']['driverId'],
+                    'given_name': result['Driver']['givenName'],
+                    'family_name': result['Driver']['familyName'],
+                    'constructor_id': result['Constructor']['constructorId'],
+                    'constructor': result['Constructor']['name'],
+                    'points': float(result.get('points', 0)),
+                    'status': result['status'],
+                    'sprint': key == 'SprintResults',
+                })
+    return rows
+
+
+async def _fetch_season_results(season: int, session: aiohttp.ClientSession) -> list:
+    async with use_session(session) as http_session:
+        result_pages, sprint_pages = await asyncio.gather(
+            _fetch_pages(http_session, f'{JOLPICA_URL}/{season}/results/', PRIORITY_USER),
+            _fetch_pages(http_session, f'{JOLPICA_URL}/{season}/sprint/', PRIORITY_USER),
+        )
+    rows = _parse_season_results(sprint_pages, 'SprintResults') + _parse_season_results(result_pages, 'Results')
+    rows.sort(key=lambda row: (row['round'], not row['sprint'], row['position']))
+    return rows
+
+
+async def season_results(season: int, session: aiohttp.ClientSession | None = None) -> list:
+    """
+    Gives every race and sprint result of a season. Jolpica is asked with a few paginated requests instead of one per round.
+    Completed seasons are read from the F1 archive first.
+
+    Args:
+        season (int): Season to get the results of.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        list: Result rows ordered by round, with sprint results before the race results of the same round.
+    """
+    if season < CURRENT_YEAR:
+        rows = await _archive_lookup(f1_archive.season_results, season)
+        if rows is not None:
+            return rows
+    try:
+        return await _fetch_season_results(season, session)
+    except (aiohttp.ClientError, TimeoutError):
+        rows = await _archive_lookup(f1_archive.season_results, season)
+        if rows is None:
+            raise
+        return rows
+
+
+async def _archive_lookup(query, season: int, *args):
+    """Runs an F1 archive query in a thread if the season is stored in the archive, otherwise gives None."""
+    if f1_archive.seasons is None:
+        await asyncio.to_thread(f1_archive.load_seasons)
+    if not f1_archive.has_season(season):
+        return None
+    return await asyncio.to_thread(query, season, *args)
+
+
+async def _load(session: aiohttp.ClientSession, url: str, season: int, parse, query, *args, stale_ok: bool = False):
+    """
+    Gives parsed F1 data. Completed seasons are read from the F1 archive first, the rest from Jolpica.
+    If Jolpica cannot be reached, the archive is used as a fallback.
+
+    Args:
+        session (aiohttp.ClientSession): Session to use. If None, a temporary one is opened.
+        url (str): Jolpica endpoint with the data.
+        season (int): Season the data is about.
+        parse: Function turning the Jolpica JSON into the same rows as *query* gives.
+        query: F1 archive method giving the data.
+        *args: Additional arguments for *query*.
+        stale_ok (bool): If True, expired cached data is served at once and refreshed in the background.
+
+    Returns:
+        Rows given by *parse* or *query*, None if Jolpica responded with a 4xx status code.
+    """
+    if season < CURRENT_YEAR:
+        rows = await _archive_lookup(query, season, *args)
+        if rows is not None:
+            return rows
+    try:
+        data = await _get_json(session, url, season, stale_ok=stale_ok)
+    except (aiohttp.ClientError, TimeoutError):
+        rows = await _archive_lookup(query, season, *args)
+        if rows is None:
+            raise
+        return rows
+    if data is None:
+        return None
+    return parse(data)
+
+
+def _parse_race(data: dict) -> tuple:
+    races = data['MRData']['RaceTable']['Races']
+    if races == []:
+        return None, []
+    rows = []
+    for result in races[0]['Results']:
+        rows.append({
+            'position': int(result['position']),
+            'given_name': result['Driver']['givenName'],
+            'family_name': result['Driver']['familyName'],
+            'constructor': result['Constructor']['name'],
+            'status': result['status'],
+        })
+    return races[0]['raceName'], rows
+
+
+def _parse_calendar(data: dict) -> list:
+    rows = []
+    for race in data['MRData']['RaceTable']['Races']:
+        circuit = race.get('Circuit', {})
+        location = circuit.get('Location', {})
+        rows.append({
+            'round': int(race['round']),
+            'race_name': race['raceName'],
+            'circuit_name': circuit.get('circuitName'),
+            'locality': location.get('locality'),
+            'country': location.get('country'),
+            'date': race['date'],
+            'time': race.get('time'),
+            'sprint': bool(race.get('Sprint')),
+        })
+    return rows
+
+
+def _parse_standings(data: dict) -> list:
+    try:
+        standings_json = data['MRData']['StandingsTable']['StandingsLists'][0]['DriverStandings']
+    except (KeyError, IndexError):
+        return []
+    rows = []
+    for driver in standings_json:
+        rows.append({
+            'position': driver.get('position', driver.get('positionText')),
+            'given_name': driver['Driver']['givenName'],
+            'family_name': driver['Driver']['familyName'],
+            'constructor': driver['Constructors'][0]['name'],
+            'points': float(driver['points']),
+        })
+    return rows
+
+
+async def race_result(season: int, roundnumber: int, emojis: bool = True, session: aiohttp.ClientSession | None = None) -> list:
     """Gives the result of an F1 race session using Jolpica API.
 
     Args:
         season (int)
         roundnumber (int): Race number in F1 calendar to check.
         emojis (bool): Default is True, if False, emojis for first three positions will not be given.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
 
     Returns:
         str: Circuit's name.
         list: A list with session results.
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'https://api.jolpi.ca/ergast/f1/{season}/{roundnumber}/results/') as response:
-            if response.status in range(400, 499):
-                return None, []
-
-            response = await response.json()
-            response = response['MRData']['RaceTable']['Races']
-            if response == []:
-                return None, []
-            circuit_name = response[0]['raceName']
-            results = []
-            for result in response[0]['Results']:
-                POS = result['position']
-                if emojis:
-                    if POS == '1':
-                        POS = '🥇'
-                    elif POS == '2':
-                        POS = '🥈'
-                    elif POS == '3':
-                        POS = '🥉'
-                    else:
-                        POS = f'{POS}.'
-                else:
-                    POS = f'{POS}.'
-                DriverName = result['Driver']['givenName'] + ' ' + result['Driver']['familyName']
-                TEAM = result['Constructor']['name']
-                status = result['status']
-                status = status_map.get(status, status)
-                if status == 'Finished':
-                    results.append(f'{POS} {DriverName} ({TEAM})')
-                else:
-                    results.append(f'{POS} {DriverName} ({TEAM}) - {status}')
-
-            return circuit_name, results
-
-
-async def f1_season_calendar(season: int) -> list:
+    race = await _load(session, f'{JOLPICA_URL}/{season}/{roundnumber}/results/', season, _parse_race, f1_archive.race, roundnumber)
+    if race is None:
+        return None, []
+    circuit_name, rows = race
+    if circuit_name is None:
+        return None, []
+
+    results = []
+    for row in rows:
+        POS = f"{row['position']}."
+        if emojis:
+            POS = {1: '🥇', 2: '🥈', 3: '🥉'}.get(row['position'], POS)
+        DriverName = f"{row['given_name']} {row['family_name']}"
+        TEAM = row['constructor']
+        status = status_map.get(row['status'], row['status'])
+        if status == 'Finished':
+            results.append(f'{POS} {DriverName} ({TEAM})')
+        else:
+            results.append(f'{POS} {DriverName} ({TEAM}) - {status}')
+
+    return circuit_name, results
+
+
+async def season_races(season: int, session: aiohttp.ClientSession | None = None) -> list:
+    """
+    Gives the races of a season with their circuits and dates.
+
+    Args:
+        season (int): Season to find the races for.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        list: Race rows ordered by round, None if Jolpica responded with a 4xx status code.
+    """
+    return await _load(session, f'{JOLPICA_URL}/{season}/races/', season, _parse_calendar, f1_archive.calendar, stale_ok=season == CURRENT_YEAR)
+
+
+async def f1_season_calendar(season: int, session: aiohttp.ClientSession | None = None) -> list:
     """Gives the F1 calendar using Jolpica API.
 
     Args:
         season (int): Season to find the calendar for.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
 
     Returns:
         list: A list with all races in the season.
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'https://api.jolpi.ca/ergast/f1/{season}/races/') as response:
-            if response.status in range(400, 499):
-                return None
-            response = await response.json()
-            response = response['MRData']['RaceTable']['Races']
-            races = []
-            is_empty = 0
-            for race in response:
-                roundnumber = race['round']
-                name = race['raceName']
-                date = race['date']
-                try:
-                    time = race['time'].replace('Z', '')
-                    time = time[:5]
-                except Exception:
-                    time = None
-                if race.get('Sprint'):
-                    sprint = True
-                else:
-                    sprint = None
-
-                if time:
-                    if sprint:
-                        races.append(f'{roundnumber}. {name} (Sprint) - {date} {time} UTC')
-                    else:
-                        races.append(f'{roundnumber}. {name} - {date} {time} UTC')
-                else:
-                    races.append(f'{roundnumber}. {name} - {date} UTC')
-                is_empty += 1
-            if is_empty == 0:
-                return []
-            return races
-
-
-async def f1_standings_py(season: int = CURRENT_YEAR) -> list:
+    rows = await season_races(season, session=session)
+    if rows is None:
+        return None
+    races = []
+    for row in rows:
+        roundnumber = row['round']
+        name = row['race_name']
+        date = row['date']
+        time = row['time'][:5] if row['time'] else None
+
+        if time:
+            if row['sprint']:
+                races.append(f'{roundnumber}. {name} (Sprint) - {date} {time} UTC')
+            else:
+                races.append(f'{roundnumber}. {name} - {date} {time} UTC')
+        else:
+            races.append(f'{roundnumber}. {name} - {date} UTC')
+    return races
+
+
+async def season_standings(season: int, session: aiohttp.ClientSession | None = None) -> list:
+    """
+    Gives the driver standings of a season.
+
+    Args:
+        season (int): Season to find the standings for.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        list: Standing rows, the leader first. None if Jolpica responded with a 4xx status code.
+    """
+    return await _load(session, f'{JOLPICA_URL}/{season}/driverstandings/', season, _parse_standings, f1_archive.standings, stale_ok=season == CURRENT_YEAR)
+
+
+async def f1_standings_py(season: int = CURRENT_YEAR, session: aiohttp.ClientSession | None = None) -> list:
     """
     Fetches the F1 driver standings for a specific season. If 'season' is empty, the current year is used.
 
     Args:
         season (int): The season to fetch standings for. Defaults to the current year.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
 
     Returns:
         list: A list of strings formatted as 'position. DriverName (Team) - points pts.'.
@@ -122,21 +408,60 @@ async def f1_standings_py(season: int = CURRENT_YEAR) -> list:
     """
     if season < 1950 or season > CURRENT_YEAR:
         return []
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'https://api.jolpi.ca/ergast/f1/{season}/driverstandings/') as response:
-            if response.status in range(400, 499):
-                return []
-            data = await response.json()
-            try:
-                standings_json = data['MRData']['StandingsTable']['StandingsLists'][0]['DriverStandings']
-            except (KeyError, IndexError):
-                return []
-
-            standings_list = []
-            for driver in standings_json:
-                driver_name = f"{driver['Driver']['givenName']} {driver['Driver']['familyName']}"
-                position = driver['position']
-                team = driver['Constructors'][0]['name']
-                points = driver['points']
-                standings_list.append(f'{position}. {driver_name} ({team}) - {points} pts.')
-            return standings_list
+    rows = await season_standings(season, session=session)
+    if rows is None:
+        return []
+
+    standings_list = []
+    for row in rows:
+        driver_name = f"{row['given_name']} {row['family_name']}"
+        standings_list.append(f"{row['position']}. {driver_name} ({row['constructor']}) - {row['points']:g} pts.")
+    return standings_list
+
+
+def refresh_interval(calendar: list, now: datetime.datetime) -> float:
+    """
+    Gives how long to wait before refreshing the current season again. Refreshes are frequent during a race weekend
+    (from three days before the race until six hours after its start) and rare otherwise.
+
+    Args:
+        calendar (list): Calendar rows of the current season.
+        now (datetime.datetime): Current time in UTC.
+
+    Returns:
+        float: Seconds until the next refresh.
+    """
+    interval = F1_REFRESH_INTERVAL
+    for race in calendar:
+        try:
+            start = datetime.datetime.fromisoformat(f"{race['date']}T{(race['time'] or '12:00:00Z').replace('Z', '')}")
+        except (TypeError, ValueError):
+            continue
+        start = start.replace(tzinfo=datetime.UTC)
+        weekend_start = start - datetime.timedelta(days=3)
+        weekend_end = start + datetime.timedelta(hours=6)
+        if weekend_start <= now <= weekend_end:
+            return F1_RACE_WEEKEND_REFRESH_INTERVAL
+        if now < weekend_start:
+            interval = min(interval, (weekend_start - now).total_seconds())
+    return max(interval, F1_RACE_WEEKEND_REFRESH_INTERVAL)
+
+
+async def refresh_current_season(session: aiohttp.ClientSession | None = None) -> float:
+    """
+    Downloads the current season's calendar and driver standings into the cache, so commands never wait for Jolpica.
+
+    Args:
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        float: Seconds until the next refresh should happen.
+    """
+    calendar_url = f'{JOLPICA_URL}/{CURRENT_YEAR}/races/'
+    standings_url = f'{JOLPICA_URL}/{CURRENT_YEAR}/driverstandings/'
+    calendar, _ = await asyncio.gather(
+        f1_requests.do(calendar_url, _fetch_and_cache, session, calendar_url, CURRENT_YEAR, PRIORITY_BACKGROUND),
+        f1_requests.do(standings_url, _fetch_and_cache, session, standings_url, CURRENT_YEAR, PRIORITY_BACKGROUND),
+    )
+    rows = _parse_calendar(calendar) if calendar else []
+    return refresh_interval(rows, datetime.datetime.now(datetime.UTC))
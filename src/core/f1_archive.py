@@ -0,0 +1,388 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import datetime
+import os
+import sqlite3
+from contextlib import closing
+
+from core.config import F1_ARCHIVE_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    season INTEGER PRIMARY KEY,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS drivers (
+    driver_id TEXT PRIMARY KEY,
+    given_name TEXT NOT NULL,
+    family_name TEXT NOT NULL,
+    code TEXT,
+    nationality TEXT
+);
+CREATE TABLE IF NOT EXISTS constructors (
+    constructor_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    nationality TEXT
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    status_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS races (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    race_name TEXT NOT NULL,
+    circuit_name TEXT,
+    locality TEXT,
+    country TEXT,
+    date TEXT,
+    time TEXT,
+    sprint INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (season, round)
+);
+CREATE TABLE IF NOT EXISTS results (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    position_text TEXT,
+    driver_id TEXT NOT NULL REFERENCES drivers (driver_id),
+    constructor_id TEXT NOT NULL REFERENCES constructors (constructor_id),
+    status_id INTEGER NOT NULL REFERENCES statuses (status_id),
+    points REAL NOT NULL DEFAULT 0,
+    grid INTEGER,
+    laps INTEGER,
+    PRIMARY KEY (season, round, position)
+);
+CREATE INDEX IF NOT EXISTS results_driver ON results (driver_id);
+CREATE TABLE IF NOT EXISTS sprint_results (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    position_text TEXT,
+    driver_id TEXT NOT NULL REFERENCES drivers (driver_id),
+    constructor_id TEXT NOT NULL REFERENCES constructors (constructor_id),
+    status_id INTEGER NOT NULL REFERENCES statuses (status_id),
+    points REAL NOT NULL DEFAULT 0,
+    grid INTEGER,
+    laps INTEGER,
+    PRIMARY KEY (season, round, position)
+);
+CREATE TABLE IF NOT EXISTS driver_standings (
+    season INTEGER NOT NULL,
+    ordering INTEGER NOT NULL,
+    position_text TEXT NOT NULL,
+    driver_id TEXT NOT NULL REFERENCES drivers (driver_id),
+    constructor_id TEXT NOT NULL REFERENCES constructors (constructor_id),
+    points REAL NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (season, ordering)
+);
+"""
+
+
+class F1Archive:
+    """
+    On-disk store of whole F1 seasons ingested from Jolpica.
+
+    Methods are blocking, so call them with asyncio.to_thread from async code.
+    """
+    def __init__(self, path: str = F1_ARCHIVE_PATH):
+        self.path = path
+        self.seasons = None
+        # Goes up with every stored season, so indexes built from the archive know when they are outdated.
+        self.version = 0
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            connection.executescript(SCHEMA)
+            self._schema_ready = True
+        return connection
+
+    def load_seasons(self) -> set:
+        """
+        Loads the set of seasons stored in the archive. Does not create the database if it does not exist yet.
+
+        Returns:
+            set: Stored seasons.
+        """
+        if not os.path.exists(self.path):
+            self.seasons = set()
+            return self.seasons
+        with closing(self._connect()) as connection:
+            self.seasons = {row['season'] for row in connection.execute('SELECT season FROM seasons')}
+        return self.seasons
+
+    def has_season(self, season: int) -> bool:
+        """
+        Checks is a season stored in the archive.
+
+        Args:
+            season (int): Season to check.
+
+        Returns:
+            bool: True if the season was ingested.
+        """
+        if self.seasons is None:
+            self.load_seasons()
+        return season in self.seasons
+
+    def race(self, season: int, roundnumber: int) -> tuple:
+        """
+        Gives the result of a stored race.
+
+        Args:
+            season (int)
+            roundnumber (int): Race number in F1 calendar.
+
+        Returns:
+            str: Race name, None if the race does not exist.
+            list: Result rows ordered by position.
+        """
+        with closing(self._connect()) as connection:
+            race = connection.execute(
+                'SELECT race_name FROM races WHERE season = ? AND round = ?', (season, roundnumber)
+            ).fetchone()
+            if race is None:
+                return None, []
+            rows = connection.execute(
+                'SELECT r.position, d.given_name, d.family_name, c.name AS constructor, s.status '
+                'FROM results r '
+                'JOIN drivers d USING (driver_id) '
+                'JOIN constructors c USING (constructor_id) '
+                'JOIN statuses s USING (status_id) '
+                'WHERE r.season = ? AND r.round = ? ORDER BY r.position',
+                (season, roundnumber),
+            ).fetchall()
+        return race['race_name'], [dict(row) for row in rows]
+
+    def calendar(self, season: int) -> list:
+        """
+        Gives all stored races of a season.
+
+        Args:
+            season (int)
+
+        Returns:
+            list: Race rows ordered by round.
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                'SELECT round, race_name, circuit_name, locality, country, date, time, sprint '
+                'FROM races WHERE season = ? ORDER BY round',
+                (season,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def standings(self, season: int) -> list:
+        """
+        Gives the stored final driver standings of a season.
+
+        Args:
+            season (int)
+
+        Returns:
+            list: Standings rows in championship order.
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                'SELECT ds.position_text AS position, d.given_name, d.family_name, c.name AS constructor, ds.points '
+                'FROM driver_standings ds '
+                'JOIN drivers d USING (driver_id) '
+                'JOIN constructors c USING (constructor_id) '
+                'WHERE ds.season = ? ORDER BY ds.ordering',
+                (season,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def season_results(self, season: int) -> list:
+        """
+        Gives every stored race and sprint result of a season.
+
+        Args:
+            season (int)
+
+        Returns:
+            list: Result rows ordered by round, with sprint results before the race results of the same round.
+        """
+        select = (
+            'SELECT r.round, ra.race_name, r.position, r.driver_id, d.given_name, d.family_name, '
+            'r.constructor_id, c.name AS constructor, r.points, s.status, {sprint} AS sprint '
+            'FROM {table} r '
+            'JOIN races ra USING (season, round) '
+            'JOIN drivers d USING (driver_id) '
+            'JOIN constructors c USING (constructor_id) '
+            'JOIN statuses s USING (status_id) '
+            'WHERE r.season = ?'
+        )
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"{select.format(sprint=1, table='sprint_results')} UNION ALL {select.format(sprint=0, table='results')} "
+                'ORDER BY round, sprint DESC, position',
+                (season, season),
+            ).fetchall()
+        return [dict(row, sprint=bool(row['sprint'])) for row in rows]
+
+    def all_races(self) -> list:
+        """
+        Gives every stored race with its circuit, for building the search index.
+
+        Returns:
+            list: Rows with season, round, race_name, circuit_name, locality and country, ordered by season and round.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                'SELECT season, round, race_name, circuit_name, locality, country FROM races ORDER BY season, round'
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def driver_names(self) -> list:
+        """
+        Gives the full names of every stored driver.
+
+        Returns:
+            list: Names formatted as 'Given Family', ordered by family name.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with closing(self._connect()) as connection:
+            rows = connection.execute('SELECT given_name, family_name FROM drivers ORDER BY family_name, given_name').fetchall()
+        return [f"{row['given_name']} {row['family_name']}" for row in rows]
+
+    def all_results(self) -> tuple:
+        """
+        Gives every stored race and sprint result, for building in-memory statistics.
+
+        Returns:
+            dict: Driver IDs mapped to full names.
+            list: (driver_id, season, position, points, status, sprint) tuples ordered by driver ID.
+        """
+        select = (
+            'SELECT r.driver_id, r.season, r.position, r.points, s.status, {sprint} AS sprint '
+            'FROM {table} r JOIN statuses s USING (status_id)'
+        )
+        with closing(self._connect()) as connection:
+            drivers = {
+                row['driver_id']: f"{row['given_name']} {row['family_name']}"
+                for row in connection.execute('SELECT driver_id, given_name, family_name FROM drivers')
+            }
+            rows = connection.execute(
+                f"{select.format(sprint=0, table='results')} UNION ALL {select.format(sprint=1, table='sprint_results')} "
+                'ORDER BY driver_id',
+            ).fetchall()
+        return drivers, [tuple(row) for row in rows]
+
+    def store_season(self, season: int, races: list, standings: list) -> int:
+        """
+        Replaces everything stored about a season in one transaction.
+
+        Args:
+            season (int)
+            races (list): Jolpica 'Races' objects. Their 'Results' and 'SprintResults' are stored too.
+            standings (list): Jolpica 'DriverStandings' objects.
+
+        Returns:
+            int: Number of stored race results.
+        """
+        stored = 0
+        with closing(self._connect()) as connection, connection:
+            for table in ('races', 'results', 'sprint_results', 'driver_standings'):
+                connection.execute(f'DELETE FROM {table} WHERE season = ?', (season,))
+            for race in races:
+                circuit = race.get('Circuit', {})
+                location = circuit.get('Location', {})
+                connection.execute(
+                    'INSERT INTO races (season, round, race_name, circuit_name, locality, country, date, time, sprint) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        season, int(race['round']), race['raceName'], circuit.get('circuitName'),
+                        location.get('locality'), location.get('country'), race.get('date'),
+                        race.get('time'), int(bool(race.get('Sprint'))),
+                    ),
+                )
+                for table, key in (('results', 'Results'), ('sprint_results', 'SprintResults')):
+                    for result in race.get(key, []):
+                        self._store_result(connection, table, season, int(race['round']), result)
+                stored += len(race.get('Results', []))
+            for ordering, driver in enumerate(standings):
+                self._store_driver(connection, driver['Driver'])
+                constructor = driver['Constructors'][0]
+                self._store_constructor(connection, constructor)
+                connection.execute(
+                    'INSERT INTO driver_standings (season, ordering, position_text, driver_id, constructor_id, points, wins) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        season, ordering, driver.get('position', driver.get('positionText', '-')),
+                        driver['Driver']['driverId'], constructor['constructorId'],
+                        float(driver.get('points', 0)), int(driver.get('wins', 0)),
+                    ),
+                )
+            connection.execute(
+                'INSERT OR REPLACE INTO seasons (season, ingested_at) VALUES (?, ?)',
+                (season, datetime.datetime.now(datetime.UTC).isoformat()),
+            )
+        if self.seasons is not None:
+            self.seasons.add(season)
+        self.version += 1
+        return stored
+
+    def _store_result(self, connection: sqlite3.Connection, table: str, season: int, roundnumber: int, result: dict) -> None:
+        self._store_driver(connection, result['Driver'])
+        self._store_constructor(connection, result['Constructor'])
+        connection.execute(
+            f'INSERT OR REPLACE INTO {table} '
+            '(season, round, position, position_text, driver_id, constructor_id, status_id, points, grid, laps) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                season, roundnumber, int(result['position']), result.get('positionText'),
+                result['Driver']['driverId'], result['Constructor']['constructorId'],
+                self._status_id(connection, result['status']), float(result.get('points', 0)),
+                _to_int(result.get('grid')), _to_int(result.get('laps')),
+            ),
+        )
+
+    @staticmethod
+    def _store_driver(connection: sqlite3.Connection, driver: dict) -> None:
+        connection.execute(
+            'INSERT OR REPLACE INTO drivers (driver_id, given_name, family_name, code, nationality) VALUES (?, ?, ?, ?, ?)',
+            (driver['driverId'], driver['givenName'], driver['familyName'], driver.get('code'), driver.get('nationality')),
+        )
+
+    @staticmethod
+    def _store_constructor(connection: sqlite3.Connection, constructor: dict) -> None:
+        connection.execute(
+            'INSERT OR REPLACE INTO constructors (constructor_id, name, nationality) VALUES (?, ?, ?)',
+            (constructor['constructorId'], constructor['name'], constructor.get('nationality')),
+        )
+
+    @staticmethod
+    def _status_id(connection: sqlite3.Connection, status: str) -> int:
+        connection.execute('INSERT OR IGNORE INTO statuses (status) VALUES (?)', (status,))
+        return connection.execute('SELECT status_id FROM statuses WHERE status = ?', (status,)).fetchone()[0]
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+f1_archive = F1Archive()
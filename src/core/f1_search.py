@@ -0,0 +1,313 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import difflib
+import re
+import unicodedata
+from collections import defaultdict
+
+import aiohttp
+
+from core.cache import SingleFlight
+from core.config import CURRENT_YEAR
+from core.f1 import season_races, season_standings
+from core.f1_archive import f1_archive
+
+MAX_CHOICES = 25
+FUZZY_RATIO = 0.75
+
+EXACT = 3
+PREFIX = 2
+FUZZY = 1
+
+race_indexes = {}
+_index_requests = SingleFlight()
+_archive_version = None
+_background_indexing = set()
+
+
+def tokenize(text: str) -> list:
+    """
+    Splits text into lowercase words without accents, so 'São Paulo' and 'sao paulo' match.
+
+    Args:
+        text (str)
+
+    Returns:
+        list: Words of the text.
+    """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    return re.findall(r'[a-z0-9]+', text)
+
+
+class SearchIndex:
+    """
+    Prefix and fuzzy search over short texts, e.g. race or driver names.
+
+    Every prefix of every word is mapped to the entries containing it, so typing a prefix is a dictionary lookup.
+    Only when prefixes give fewer than *limit* entries are words compared by similarity to catch typos.
+    """
+    def __init__(self):
+        self.labels = {}
+        self._words = {}
+        self._prefixes = defaultdict(set)
+
+    def add(self, key, label: str, text: str | None = None) -> None:
+        """
+        Adds or replaces an entry.
+
+        Args:
+            key: Value given back by search, e.g. a round number.
+            label (str): Human readable name of the entry.
+            text (str): Text to search in. Defaults to the label.
+        """
+        if key in self._words:
+            self.remove(key)
+        words = set(tokenize(text if text is not None else label))
+        self.labels[key] = label
+        self._words[key] = words
+        for word in words:
+            for end in range(1, len(word) + 1):
+                self._prefixes[word[:end]].add(key)
+
+    def remove(self, key) -> None:
+        """Removes an entry if it exists."""
+        words = self._words.pop(key, None)
+        if words is None:
+            return
+        del self.labels[key]
+        for word in words:
+            for end in range(1, len(word) + 1):
+                keys = self._prefixes[word[:end]]
+                keys.discard(key)
+                if not keys:
+                    del self._prefixes[word[:end]]
+
+    def _match_word(self, query_word: str, limit: int) -> dict:
+        matches = {key: EXACT if query_word in self._words[key] else PREFIX for key in self._prefixes.get(query_word, ())}
+        if len(matches) >= limit:
+            return matches
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(query_word)
+        for key, words in self._words.items():
+            if key in matches:
+                continue
+            for word in words:
+                matcher.set_seq1(word)
+                if matcher.real_quick_ratio() >= FUZZY_RATIO and matcher.quick_ratio() >= FUZZY_RATIO and matcher.ratio() >= FUZZY_RATIO:
+                    matches[key] = FUZZY
+                    break
+        return matches
+
+    def search(self, query: str, limit: int = MAX_CHOICES) -> list:
+        """
+        Finds the entries matching every word of the query. Exact words rank above prefixes and prefixes above typos.
+
+        Args:
+            query (str): What the user typed so far.
+            limit (int): Maximum number of keys to give back.
+
+        Returns:
+            list: Keys of the best matching entries. All entries in insertion order (up to *limit*) if the query is empty.
+        """
+        query_words = tokenize(query)
+        if not query_words:
+            return list(self.labels)[:limit]
+        scores = None
+        for query_word in query_words:
+            matches = self._match_word(query_word, limit)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {key: score + matches[key] for key, score in scores.items() if key in matches}
+            if not scores:
+                return []
+        order = {key: position for position, key in enumerate(self.labels)}
+        return sorted(scores, key=lambda key: (-scores[key], order[key]))[:limit]
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+driver_index = SearchIndex()
+
+
+def race_label(row: dict) -> str:
+    """
+    Args:
+        row (dict): Race row with round, race_name, circuit_name and country.
+
+    Returns:
+        str: Label formatted as 'R5 Miami Grand Prix (Miami International Autodrome, USA)'.
+    """
+    place = ', '.join(part for part in (row.get('circuit_name'), row.get('country')) if part)
+    return f"R{row['round']} {row['race_name']}" + (f' ({place})' if place else '')
+
+
+def index_races(season: int, rows: list) -> SearchIndex:
+    """
+    Replaces the search index of a season's races.
+
+    Args:
+        season (int)
+        rows (list): Race rows with round, race_name, circuit_name, locality and country.
+
+    Returns:
+        SearchIndex: Index keyed by round number.
+    """
+    index = SearchIndex()
+    for row in rows:
+        text = ' '.join(str(row.get(field) or '') for field in ('round', 'race_name', 'circuit_name', 'locality', 'country'))
+        index.add(row['round'], race_label(row), text)
+    race_indexes[season] = index
+    return index
+
+
+def index_drivers(names: list) -> None:
+    """
+    Adds drivers to the driver search index.
+
+    Args:
+        names (list): Full names of the drivers.
+    """
+    for name in names:
+        if name not in driver_index.labels:
+            driver_index.add(name, name)
+
+
+async def index_season(season: int, session: aiohttp.ClientSession | None = None) -> SearchIndex:
+    """
+    Builds the race index of a season from its calendar. Calendars come from the F1 archive or the cache if possible.
+
+    Args:
+        season (int)
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        SearchIndex: Index of the season, None if it has no calendar.
+    """
+    if season in race_indexes:
+        return race_indexes[season]
+    return await _index_requests.do(season, _index_season, season, session)
+
+
+async def _index_season(season: int, session: aiohttp.ClientSession) -> SearchIndex:
+    rows = await season_races(season, session=session)
+    if not rows:
+        return None
+    return index_races(season, rows)
+
+
+def index_in_background(season: int, session: aiohttp.ClientSession | None = None) -> None:
+    """Starts indexing a season in a background task, so autocomplete never waits for the network."""
+    if season in race_indexes:
+        return
+    task = asyncio.create_task(index_season(season, session=session))
+    _background_indexing.add(task)
+    task.add_done_callback(_indexing_done)
+
+
+def _indexing_done(task: asyncio.Task) -> None:
+    _background_indexing.discard(task)
+    if not task.cancelled() and task.exception():
+        print(f'Failed to index F1 season: {task.exception()}')
+
+
+async def index_archive() -> None:
+    """Indexes the races and drivers of every season in the F1 archive, unless the archive has not changed since the last time."""
+    global _archive_version
+    version = f1_archive.version
+    if _archive_version == version:
+        return
+    races, names = await asyncio.gather(asyncio.to_thread(f1_archive.all_races), asyncio.to_thread(f1_archive.driver_names))
+    seasons = defaultdict(list)
+    for row in races:
+        seasons[row['season']].append(row)
+    for season, rows in seasons.items():
+        index_races(season, rows)
+    index_drivers(names)
+    _archive_version = version
+
+
+async def refresh_search_index(session: aiohttp.ClientSession | None = None) -> None:
+    """
+    Indexes the current season's races and drivers, and the F1 archive if it changed since it was last indexed.
+
+    Args:
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+    """
+    await index_archive()
+    rows = await season_races(CURRENT_YEAR, session=session)
+    if rows:
+        index_races(CURRENT_YEAR, rows)
+    standings = await season_standings(CURRENT_YEAR, session=session)
+    if standings:
+        index_drivers(f"{row['given_name']} {row['family_name']}" for row in standings)
+
+
+def search_races(season: int, query: str, limit: int = MAX_CHOICES) -> list:
+    """
+    Finds races of a season by round number, race name, circuit, city or country. Never makes network requests.
+
+    Args:
+        season (int)
+        query (str): What the user typed so far.
+        limit (int): Maximum number of races.
+
+    Returns:
+        list: (round, label) tuples, None if the season is not indexed yet.
+    """
+    index = race_indexes.get(season)
+    if index is None:
+        return None
+    return [(roundnumber, index.labels[roundnumber]) for roundnumber in index.search(query, limit)]
+
+
+def search_drivers(query: str, limit: int = MAX_CHOICES) -> list:
+    """
+    Finds drivers by a part of their name, tolerating typos. Never makes network requests.
+
+    Args:
+        query (str): What the user typed so far.
+        limit (int): Maximum number of drivers.
+
+    Returns:
+        list: Full names of the drivers.
+    """
+    return driver_index.search(query, limit)
+
+
+async def resolve_race(season: int, race: str, session: aiohttp.ClientSession | None = None) -> int:
+    """
+    Turns a round number or a race name into a round number.
+
+    Args:
+        season (int)
+        race (str): Round number, or a name of the race, circuit, city or country.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        int: Round number, None if no race matches.
+    """
+    race = race.strip()
+    if race.isdigit():
+        return int(race)
+    index = await index_season(season, session=session)
+    if index is None:
+        return None
+    matches = index.search(race, limit=1)
+    return matches[0] if matches else None
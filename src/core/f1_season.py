@@ -0,0 +1,202 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import itertools
+from collections import defaultdict
+
+import aiohttp
+
+from core.cache import SingleFlight, TTLCache
+from core.config import F1_SEASON_CACHE_SIZE
+from core.f1 import cache_ttl, season_results
+
+season_tables_cache = TTLCache(maxsize=F1_SEASON_CACHE_SIZE)
+_season_requests = SingleFlight()
+
+
+class SeasonTables:
+    """
+    Views of a whole F1 season computed locally from all of its race and sprint results.
+
+    Points are summed from the results, so seasons with dropped scores or old constructor rules may differ from the official tables.
+    """
+    def __init__(self, season: int, results: list):
+        self.season = season
+        self.races = {}
+        self.drivers = {}
+        self.constructors = {}
+        driver_points = defaultdict(lambda: defaultdict(float))
+        constructor_points = defaultdict(float)
+        race_entries = defaultdict(list)
+
+        for row in results:
+            self.races[row['round']] = row['race_name']
+            self.drivers[row['driver_id']] = f"{row['given_name']} {row['family_name']}"
+            self.constructors[row['constructor_id']] = row['constructor']
+            driver_points[row['driver_id']][row['round']] += row['points']
+            constructor_points[row['constructor_id']] += row['points']
+            if not row['sprint']:
+                race_entries[(row['round'], row['constructor_id'])].append((row['position'], row['driver_id']))
+
+        self.rounds = sorted(self.races)
+        self.constructor_standings = sorted(constructor_points.items(), key=lambda item: -item[1])
+        self.progression = {
+            driver_id: list(itertools.accumulate(points.get(roundnumber, 0.0) for roundnumber in self.rounds))
+            for driver_id, points in driver_points.items()
+        }
+
+        battles = defaultdict(lambda: [0, 0])
+        for (_, constructor_id), entries in race_entries.items():
+            for (position_a, driver_a), (position_b, driver_b) in itertools.combinations(sorted(entries, key=lambda entry: entry[1]), 2):
+                battles[(constructor_id, driver_a, driver_b)][0 if position_a < position_b else 1] += 1
+        self.teammate_battles = dict(battles)
+
+    def standings_after(self, index: int) -> list:
+        """
+        Gives the driver standings after a round.
+
+        Args:
+            index (int): Index of the round in self.rounds.
+
+        Returns:
+            list: (driver_id, points) tuples, the leader first.
+        """
+        return sorted(((driver_id, points[index]) for driver_id, points in self.progression.items()), key=lambda item: -item[1])
+
+    def find_driver(self, name: str) -> str:
+        """
+        Finds a driver of the season by a part of their name or their Jolpica driver ID.
+
+        Args:
+            name (str): Part of the name, case insensitive.
+
+        Returns:
+            str: Driver ID, None if no driver matches.
+        """
+        name = name.casefold().strip()
+        for driver_id, driver_name in self.drivers.items():
+            if name == driver_id or name in driver_name.casefold():
+                return driver_id
+        return None
+
+
+async def season_tables(season: int, session: aiohttp.ClientSession | None = None) -> SeasonTables:
+    """
+    Gives the precomputed tables of a season. They are built once from all results of the season and cached.
+
+    Args:
+        season (int)
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        SeasonTables: Tables of the season, None if the season has no results.
+    """
+    tables = season_tables_cache.get(season)
+    if tables is not None:
+        return tables
+    return await _season_requests.do(season, _build_season_tables, season, session)
+
+
+async def _build_season_tables(season: int, session: aiohttp.ClientSession) -> SeasonTables:
+    results = await season_results(season, session=session)
+    if not results:
+        return None
+    tables = SeasonTables(season, results)
+    season_tables_cache.set(season, tables, ttl=cache_ttl(season))
+    return tables
+
+
+def _points(points: float) -> str:
+    return f'{points:g}'
+
+
+async def f1_constructor_standings(season: int, session: aiohttp.ClientSession | None = None) -> list:
+    """
+    Gives the constructor standings of a season computed from all race and sprint results.
+
+    Args:
+        season (int)
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        list: A list of strings formatted as 'position. Team - points pts.'. Empty if no results were found.
+    """
+    tables = await season_tables(season, session=session)
+    if tables is None:
+        return []
+    return [
+        f'{position}. {tables.constructors[constructor_id]} - {_points(points)} pts.'
+        for position, (constructor_id, points) in enumerate(tables.constructor_standings, start=1)
+    ]
+
+
+async def f1_points_progression(season: int, driver: str | None = None, session: aiohttp.ClientSession | None = None) -> list:
+    """
+    Gives how the championship developed round by round.
+
+    Args:
+        season (int)
+        driver (str): Part of a driver's name. If given, their points and position after every round are shown,
+                      otherwise the championship leader after every round is shown.
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        list: One string per round. Empty if no results or no matching driver were found.
+    """
+    tables = await season_tables(season, session=session)
+    if tables is None:
+        return []
+    driver_id = None
+    if driver:
+        driver_id = tables.find_driver(driver)
+        if driver_id is None:
+            return []
+
+    lines = []
+    for index, roundnumber in enumerate(tables.rounds):
+        standings = tables.standings_after(index)
+        race = f'R{roundnumber} {tables.races[roundnumber]}'
+        if driver_id:
+            points = tables.progression[driver_id]
+            scored = points[index] - (points[index - 1] if index else 0.0)
+            position = next(position for position, (standing_id, _) in enumerate(standings, start=1) if standing_id == driver_id)
+            lines.append(f'{race}: +{_points(scored)} ({_points(points[index])} pts., P{position})')
+        else:
+            leader_id, leader_points = standings[0]
+            gap = leader_points - standings[1][1] if len(standings) > 1 else leader_points
+            lines.append(f'{race}: {tables.drivers[leader_id]} {_points(leader_points)} pts. (+{_points(gap)})')
+    return lines
+
+
+async def f1_teammate_battles(season: int, session: aiohttp.ClientSession | None = None) -> list:
+    """
+    Gives the race head-to-head between teammates: how many times each driver finished ahead of the other.
+
+    Args:
+        season (int)
+        session (aiohttp.ClientSession): Shared session to use. If None, a temporary one is opened.
+
+    Returns:
+        list: A list of strings formatted as 'Team: Driver A wins - wins Driver B'. Empty if no results were found.
+    """
+    tables = await season_tables(season, session=session)
+    if tables is None:
+        return []
+    order = {constructor_id: position for position, (constructor_id, _) in enumerate(tables.constructor_standings)}
+    battles = sorted(tables.teammate_battles.items(), key=lambda item: (order[item[0][0]], -sum(item[1])))
+    return [
+        f'{tables.constructors[constructor_id]}: {tables.drivers[driver_a]} {wins_a} - {wins_b} {tables.drivers[driver_b]}'
+        for (constructor_id, driver_a, driver_b), (wins_a, wins_b) in battles
+    ]
@@ -0,0 +1,249 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import itertools
+from array import array
+
+from core.cache import SingleFlight
+from core.config import status_map
+from core.f1_archive import f1_archive
+
+FINISHED = 0
+DNF = 1
+DNS = 2
+DSQ = 3
+
+_career_stats = None
+_generation = 0
+_career_stats_requests = SingleFlight()
+
+
+def status_category(status: str) -> int:
+    """
+    Sorts a Jolpica result status into FINISHED, DNF, DNS or DSQ using the classes in status_map.
+
+    Args:
+        status (str): Status of a result, e.g. 'Engine' or '+1 Lap'.
+
+    Returns:
+        int: FINISHED, DNF, DNS or DSQ.
+    """
+    mapped = status_map.get(status)
+    if mapped is None:
+        if status == 'Finished' or status.startswith('+'):
+            return FINISHED
+        if status.startswith('Did not'):
+            return DNS
+        return DNF
+    for prefix, category in (('DNF', DNF), ('DNS', DNS), ('DSQ', DSQ)):
+        if mapped.startswith(prefix):
+            return category
+    return FINISHED
+
+
+class CareerStats:
+    """
+    Career totals of every driver in the F1 archive, aggregated in one pass over the stored results into
+    one typed array per total. A statistics request is a lookup and needs no database or network.
+    *offsets* marks where the results of each driver start, so the number of results of driver i is offsets[i + 1] - offsets[i].
+    """
+    CLASSES = ('finished', 'dnf', 'dns', 'dsq')
+
+    def __init__(self, drivers: dict, rows: list):
+        self.driver_ids = []
+        self.names = []
+        self.index = {}
+        self.offsets = array('I', [0])
+        # Per-driver totals. Seasons are 0 for drivers with only sprint results.
+        self.total_points = array('d')
+        self.starts = array('I')
+        self.wins = array('I')
+        self.podiums = array('I')
+        self.classes = {name: array('I') for name in self.CLASSES}
+        self.first_season = array('H')
+        self.last_season = array('H')
+        self.seasons = array('H')
+
+        for driver_id, results in itertools.groupby(rows, key=lambda row: row[0]):
+            self.index[driver_id] = len(self.driver_ids)
+            self.driver_ids.append(driver_id)
+            self.names.append(drivers.get(driver_id, driver_id))
+            points_sum = 0.0
+            starts = wins = podiums = 0
+            classes = [0] * len(self.CLASSES)
+            seasons = set()
+            count = 0
+            for _, season, position, points, status, sprint in results:
+                count += 1
+                points_sum += points
+                if sprint:
+                    continue
+                category = status_category(status)
+                seasons.add(season)
+                classes[category] += 1
+                starts += category != DNS
+                wins += position == 1
+                podiums += position <= 3
+            self.offsets.append(self.offsets[-1] + count)
+            self.total_points.append(points_sum)
+            self.starts.append(starts)
+            self.wins.append(wins)
+            self.podiums.append(podiums)
+            for name, count in zip(self.CLASSES, classes):
+                self.classes[name].append(count)
+            self.first_season.append(min(seasons, default=0))
+            self.last_season.append(max(seasons, default=0))
+            self.seasons.append(len(seasons))
+
+    def __len__(self) -> int:
+        return self.offsets[-1]
+
+    def find_driver(self, name: str) -> int:
+        """
+        Finds a driver by Jolpica driver ID, full name or a part of the name.
+        If a part of the name matches several drivers, the one with the most results is chosen.
+
+        Args:
+            name (str): Name to look for, case insensitive.
+
+        Returns:
+            int: Index of the driver, None if no driver matches.
+        """
+        name = name.casefold().strip()
+        if not name:
+            return None
+        if name in self.index:
+            return self.index[name]
+        matches = [index for index, driver_name in enumerate(self.names) if name in driver_name.casefold()]
+        if not matches:
+            return None
+        exact = [index for index in matches if self.names[index].casefold() == name]
+        if exact:
+            return exact[0]
+        return max(matches, key=lambda index: self.offsets[index + 1] - self.offsets[index])
+
+    def totals(self, driver: int) -> dict:
+        """
+        Gives the career totals of a driver.
+
+        Args:
+            driver (int): Index of the driver given by find_driver.
+
+        Returns:
+            dict: Name, first and last season, number of seasons, starts, wins, podiums, points and result classes.
+        """
+        totals = {
+            'starts': self.starts[driver],
+            'wins': self.wins[driver],
+            'podiums': self.podiums[driver],
+            'points': self.total_points[driver],
+            **{name: column[driver] for name, column in self.classes.items()},
+        }
+        totals['name'] = self.names[driver]
+        totals['first_season'] = self.first_season[driver] or None
+        totals['last_season'] = self.last_season[driver] or None
+        totals['seasons'] = self.seasons[driver]
+        return totals
+
+
+async def career_stats() -> CareerStats:
+    """
+    Gives the columnar statistics of every season in the F1 archive. They are built once and kept until invalidated.
+
+    Returns:
+        CareerStats
+    """
+    if _career_stats is not None:
+        return _career_stats
+    # Requests after an invalidation do not join a build that started before it.
+    return await _career_stats_requests.do(('career_stats', _generation), _build_career_stats)
+
+
+async def _build_career_stats() -> CareerStats:
+    global _career_stats
+    generation = _generation
+    drivers, rows = await asyncio.to_thread(f1_archive.all_results)
+    stats = await asyncio.to_thread(CareerStats, drivers, rows)
+    if generation == _generation:
+        _career_stats = stats
+    return stats
+
+
+def invalidate_career_stats() -> None:
+    """Makes the next statistics request rebuild them from the F1 archive, e.g. after new seasons were ingested."""
+    global _career_stats, _generation
+    _career_stats = None
+    _generation += 1
+
+
+def _stat_lines(totals: dict) -> list:
+    return [
+        ('Seasons', f"{totals['first_season']}-{totals['last_season']} ({totals['seasons']})"),
+        ('Starts', totals['starts']),
+        ('Wins', totals['wins']),
+        ('Podiums', totals['podiums']),
+        ('Points', f"{totals['points']:g}"),
+        ('Finished', totals['finished']),
+        ('DNF', totals['dnf']),
+        ('DNS', totals['dns']),
+        ('DSQ', totals['dsq']),
+    ]
+
+
+async def f1_driver_stats(driver: str) -> tuple:
+    """
+    Gives career statistics of a driver from all seasons in the F1 archive.
+
+    Args:
+        driver (str): Name or a part of the name of the driver.
+
+    Returns:
+        str: Full name of the driver, None if not found.
+        list: A list of strings formatted as 'Statistic: value'.
+    """
+    stats = await career_stats()
+    index = stats.find_driver(driver)
+    if index is None:
+        return None, []
+    totals = stats.totals(index)
+    return totals['name'], [f'{label}: {value}' for label, value in _stat_lines(totals)]
+
+
+async def f1_compare_drivers(first_driver: str, second_driver: str) -> tuple:
+    """
+    Compares career statistics of two drivers from all seasons in the F1 archive.
+
+    Args:
+        first_driver (str): Name or a part of the name of the first driver.
+        second_driver (str): Name or a part of the name of the second driver.
+
+    Returns:
+        str: Full name of the first driver, None if any of the drivers was not found.
+        str: Full name of the second driver, None if any of the drivers was not found.
+        list: A list of strings formatted as 'Statistic: first - second'.
+    """
+    stats = await career_stats()
+    first_index = stats.find_driver(first_driver)
+    second_index = stats.find_driver(second_driver)
+    if first_index is None or second_index is None:
+        return None, None, []
+    first = stats.totals(first_index)
+    second = stats.totals(second_index)
+    lines = [
+        f'{label}: {first_value} - {second_value}'
+        for (label, first_value), (_, second_value) in zip(_stat_lines(first), _stat_lines(second))
+    ]
+    return first['name'], second['name'], lines
@@ -0,0 +1,46 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+
+
+def write_file(path: str, chunks) -> int:
+    """
+    Writes text to a file chunk by chunk, without joining it in memory first. The text is written to a temporary
+    file in the same folder, which then replaces *path* at once, so readers never see a half-written file.
+
+    Args:
+        path (str): Path of the file to write.
+        chunks: Iterable of str, e.g. a list of streamed response chunks.
+
+    Returns:
+        int: Number of written characters.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=folder, prefix='.', suffix='.tmp')
+    written = 0
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                written += f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return written
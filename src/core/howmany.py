@@ -14,52 +14,356 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
-from core.config import TMP_BASE
+import asyncio
+import sqlite3
+import bisect
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from core.config import TMP_BASE, COUNTERS_PATH, COUNTERS_FLUSH_INTERVAL, COUNTERS_FLUSH_UPDATES
+
+FEATURES = ('howmanytimes', 'howmanybutton')
+
+COUNTERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    feature TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (feature, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS counters_by_count ON counters (feature, count DESC);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY
+);
+"""
 
-async def create_file(file_name: str, file_content: str) -> bool:
-    """
-    Creates a file with requested name in TMP subfolder.
 
-    Args:
-        file_name (str): The file name to create with the extension.
-        file_content (str): Content of the file to write.
+class CounterStore:
+    """
+    Per-user counters of bot features (e.g. how many times someone used /howmanytimes) in one SQLite database.
 
-    Returns:
-        bool: True if file is written successfully, None if it isn't.
+    The database runs in WAL mode and is only touched by one dedicated thread, so increments never race
+    and never block the event loop.
     """
-    PATH = os.path.join(TMP_BASE, f'{file_name}')
-    with open(PATH, 'w') as f:
-        f.write(f'{file_content}')
+    def __init__(self, path: str = COUNTERS_PATH):
+        self.path = path
+        self._connection = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='counters')
 
-    if not os.path.exists(PATH):
-        return None
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.executescript(COUNTERS_SCHEMA)
+        return self._connection
 
-    with open(PATH, 'r') as f:
-        if f.read() == file_content:
-            return True
-        else:
-            return None
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
 
+    def _increment(self, feature: str, user_id: int, amount: int) -> int:
+        connection = self._connect()
+        with connection:
+            return connection.execute(
+                'INSERT INTO counters (feature, user_id, count) VALUES (?, ?, ?) '
+                'ON CONFLICT (feature, user_id) DO UPDATE SET count = count + excluded.count RETURNING count',
+                (feature, user_id, amount),
+            ).fetchone()[0]
 
-def change_file(path: int, id: int) -> int:
-    """
-    Adds 1 to the number in a file. If there is no file, a new file is created.
+    def _get(self, feature: str, user_id: int) -> int:
+        row = self._connect().execute('SELECT count FROM counters WHERE feature = ? AND user_id = ?', (feature, user_id)).fetchone()
+        return row[0] if row else 0
+
+    async def increment(self, feature: str, user_id: int, amount: int = 1) -> int:
+        """
+        Adds to a user's counter. If the user has no counter yet, it starts from 0.
+
+        Args:
+            feature (str): Name of the counter, e.g. 'howmanytimes'.
+            user_id (int): Discord user ID of the user that triggered the command.
+            amount (int): How much to add.
+
+        Returns:
+            int: New value of the counter.
+        """
+        return await self._run(self._increment, feature, user_id, amount)
+
+    def _add_many(self, increments: list) -> None:
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                'INSERT INTO counters (feature, user_id, count) VALUES (?, ?, ?) '
+                'ON CONFLICT (feature, user_id) DO UPDATE SET count = count + excluded.count',
+                increments,
+            )
+
+    async def add_many(self, increments: list) -> None:
+        """
+        Adds to many counters in one transaction.
+
+        Args:
+            increments (list): (feature, user_id, amount) tuples.
+        """
+        await self._run(self._add_many, increments)
+
+    async def get(self, feature: str, user_id: int) -> int:
+        """
+        Args:
+            feature (str): Name of the counter.
+            user_id (int): Discord user ID.
+
+        Returns:
+            int: Value of the counter, 0 if the user has none.
+        """
+        return await self._run(self._get, feature, user_id)
+
+    def _top(self, feature: str, limit: int) -> list:
+        return self._connect().execute(
+            'SELECT user_id, count FROM counters WHERE feature = ? ORDER BY count DESC, user_id LIMIT ?', (feature, limit)
+        ).fetchall()
+
+    async def top(self, feature: str, limit: int = 10) -> list:
+        """
+        Gives the users with the highest counts, read from the (feature, count) index.
+
+        Args:
+            feature (str): Name of the counter.
+            limit (int): Number of users.
+
+        Returns:
+            list: (user_id, count) tuples, the highest count first.
+        """
+        return await self._run(self._top, feature, limit)
+
+    def _counts(self, feature: str) -> list:
+        return [row[0] for row in self._connect().execute('SELECT count FROM counters WHERE feature = ? ORDER BY count', (feature,))]
+
+    async def counts(self, feature: str) -> list:
+        """
+        Args:
+            feature (str): Name of the counter.
+
+        Returns:
+            list: Counts of every user, in ascending order.
+        """
+        return await self._run(self._counts, feature)
+
+    def _import_folder(self, feature: str, folder: str) -> int:
+        connection = self._connect()
+        with connection:
+            if connection.execute('SELECT 1 FROM migrations WHERE name = ?', (feature,)).fetchone():
+                return 0
+            rows = []
+            if os.path.isdir(folder):
+                for entry in os.scandir(folder):
+                    user_id, extension = os.path.splitext(entry.name)
+                    if extension != '.txt' or not user_id.isdigit():
+                        continue
+                    with open(entry.path, 'r') as f:
+                        count = f.read().strip()
+                    if count.isdigit():
+                        rows.append((feature, int(user_id), int(count)))
+            connection.executemany(
+                'INSERT INTO counters (feature, user_id, count) VALUES (?, ?, ?) '
+                'ON CONFLICT (feature, user_id) DO UPDATE SET count = count + excluded.count',
+                rows,
+            )
+            connection.execute('INSERT INTO migrations (name) VALUES (?)', (feature,))
+        return len(rows)
+
+    async def migrate(self, base: str = TMP_BASE, features: tuple = FEATURES) -> int:
+        """
+        Imports the old one-file-per-user counters (tmp/<feature>/<user_id>.txt) once. Files whose name is not
+        a user ID or whose content is not a number are skipped. The files are left in place.
+
+        Args:
+            base (str): Folder with one subfolder per feature.
+            features (tuple): Names of the features to import.
 
-    Args:
-        path (str): Folder where the file is in.
-        id (int): Discord user ID of the user that triggered the command.
+        Returns:
+            int: Number of imported counters. 0 if every feature was already imported.
+        """
+        imported = 0
+        for feature in features:
+            imported += await self._run(self._import_folder, feature, os.path.join(base, feature))
+        return imported
 
-    Returns:
-        int: New number that is in the file.
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def close(self) -> None:
+        """Closes the database and stops the writer thread."""
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+
+class RankIndex:
+    """Sorted counts of every user of a feature, so a user's rank is a binary search instead of a scan."""
+    def __init__(self, counts: list):
+        self.counts = sorted(counts)
+
+    def update(self, old: int, new: int) -> None:
+        """
+        Moves a user's count.
+
+        Args:
+            old (int): Previous count, 0 if the user had none.
+            new (int): New count.
+        """
+        if old:
+            position = bisect.bisect_left(self.counts, old)
+            if position < len(self.counts) and self.counts[position] == old:
+                del self.counts[position]
+        bisect.insort(self.counts, new)
+
+    def rank(self, count: int) -> int:
+        """
+        Args:
+            count (int): Count of a user.
+
+        Returns:
+            int: 1 + number of users with a higher count.
+        """
+        return len(self.counts) - bisect.bisect_right(self.counts, count) + 1
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class CounterBuffer:
+    """
+    Counts in memory in front of a CounterStore and writes the accumulated increments in one batched transaction
+    every *flush_interval* milliseconds or *flush_updates* increments, whichever comes first.
+
+    Counts that are not flushed yet are lost if the process dies, so close() must be awaited on shutdown.
     """
-    FILE_PATH = os.path.join(path, f'{id}.txt')
-    if not os.path.exists(FILE_PATH):
-        with open(FILE_PATH, 'w') as f:
-            f.write('0')
+    def __init__(self, store: CounterStore, flush_interval: float = COUNTERS_FLUSH_INTERVAL, flush_updates: int = COUNTERS_FLUSH_UPDATES):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.flush_updates = flush_updates
+        self.flushes = 0
+        self._counts = {}
+        self._pending = defaultdict(int)
+        self._updates = 0
+        self._lock = asyncio.Lock()
+        self._full = asyncio.Event()
+        self._flusher = None
+        self._closing = False
+        self._ranks = {}
+
+    async def increment(self, feature: str, user_id: int) -> int:
+        """
+        Adds 1 to a user's counter. The database is only read the first time a counter is used.
+
+        Args:
+            feature (str): Name of the counter, e.g. 'howmanytimes'.
+            user_id (int): Discord user ID of the user that triggered the command.
+
+        Returns:
+            int: New value of the counter.
+        """
+        key = (feature, user_id)
+        if key not in self._counts:
+            count = await self.store.get(feature, user_id)
+            self._counts.setdefault(key, count)
+        self._counts[key] += 1
+        self._pending[key] += 1
+        if feature in self._ranks:
+            self._ranks[feature].update(self._counts[key] - 1, self._counts[key])
+        self._updates += 1
+        if self._updates >= self.flush_updates:
+            self._full.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+        return self._counts[key]
+
+    async def get(self, feature: str, user_id: int) -> int:
+        """
+        Args:
+            feature (str): Name of the counter.
+            user_id (int): Discord user ID.
+
+        Returns:
+            int: Value of the counter including increments that are not flushed yet.
+        """
+        key = (feature, user_id)
+        if key in self._counts:
+            return self._counts[key]
+        return await self.store.get(feature, user_id)
+
+    async def _rank_index(self, feature: str) -> RankIndex:
+        index = self._ranks.get(feature)
+        if index is not None:
+            return index
+        # No flush can run while the lock is held, so the stored counts miss exactly the pending increments.
+        async with self._lock:
+            if feature not in self._ranks:
+                index = RankIndex(await self.store.counts(feature))
+                for key, amount in self._pending.items():
+                    if key[0] == feature:
+                        index.update(self._counts[key] - amount, self._counts[key])
+                self._ranks[feature] = index
+        return self._ranks[feature]
+
+    async def leaderboard(self, feature: str, user_id: int, limit: int = 10) -> tuple:
+        """
+        Gives the top users of a counter and the rank of one user.
+
+        Args:
+            feature (str): Name of the counter.
+            user_id (int): Discord user ID whose rank is wanted.
+            limit (int): Number of top users.
+
+        Returns:
+            list: (user_id, count) tuples, the highest count first.
+            int: Rank of the user, None if they have no count yet.
+            int: Count of the user.
+        """
+        await self.flush()
+        top = await self.store.top(feature, limit)
+        index = await self._rank_index(feature)
+        count = await self.get(feature, user_id)
+        return top, index.rank(count) if count else None, count
+
+    async def _flush_later(self) -> None:
+        while self._pending and not self._closing:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval / 1000)
+            except TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                print(f'Failed to save counters: {e}')
+
+    async def flush(self) -> int:
+        """
+        Writes every pending increment to the store in one transaction. If writing fails, the increments stay pending.
 
-    with open(FILE_PATH, 'r') as f:
-        count = int(f.read())
+        Returns:
+            int: Number of written counters.
+        """
+        async with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, defaultdict(int)
+            self._updates = 0
+            try:
+                await self.store.add_many([(feature, user_id, amount) for (feature, user_id), amount in pending.items()])
+            except Exception:
+                for key, amount in pending.items():
+                    self._pending[key] += amount
+                raise
+            self.flushes += 1
+            return len(pending)
 
-    with open(FILE_PATH, 'w') as f:
-        f.write(f'{count + 1}')
-        return count + 1
\ No newline at end of file
+    async def close(self) -> None:
+        """Writes every pending increment and closes the store."""
+        self._closing = True
+        if self._flusher is not None and not self._flusher.done():
+            self._full.set()
+            await self._flusher
+        await self.flush()
+        await self.store.close()
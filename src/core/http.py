@@ -0,0 +1,60 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from core.config import (
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_LIMIT,
+    HTTP_LIMIT_PER_HOST,
+)
+
+
+def create_session() -> aiohttp.ClientSession:
+    """
+    Creates an aiohttp session with a pooled connector configured from the .env file.
+    Must be called from inside a running event loop.
+
+    Returns:
+        aiohttp.ClientSession: A new session. The caller is responsible for closing it.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+@asynccontextmanager
+async def use_session(session: aiohttp.ClientSession | None = None):
+    """
+    Yields the given session, or a temporary one if no session was given.
+
+    Args:
+        session (aiohttp.ClientSession): Shared session to reuse. If None, a new session is opened and closed afterwards.
+
+    Yields:
+        aiohttp.ClientSession: Session to make the requests with.
+    """
+    if session is not None:
+        yield session
+        return
+    async with create_session() as temporary_session:
+        yield temporary_session
@@ -0,0 +1,190 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import datetime
+import email.utils
+import heapq
+import random
+import time
+
+import aiohttp
+
+from core.config import (
+    JOLPICA_BACKOFF,
+    JOLPICA_BURST_LIMIT,
+    JOLPICA_HOURLY_LIMIT,
+    JOLPICA_MAX_RETRIES,
+)
+from core.http import use_session
+
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+MAX_RETRY_DELAY = 60
+
+
+class TokenBucket:
+    """Allows *capacity* requests at once and refills at *rate* requests per second."""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """
+        Returns:
+            float: Seconds until a token is available, 0 if one is available now.
+        """
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Uses one token."""
+        self._refill()
+        self.tokens -= 1
+
+
+def retry_after(value: str) -> float:
+    """
+    Parses a Retry-After header.
+
+    Args:
+        value (str): Header value, either in seconds or an HTTP date.
+
+    Returns:
+        float: Seconds to wait, None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (date - datetime.datetime.now(datetime.UTC)).total_seconds())
+
+
+class JolpicaClient:
+    """
+    Client for the Jolpica F1 API that stays within its published rate limits.
+
+    Requests wait for a token from a burst bucket and an hourly bucket. Waiting requests are served in priority order,
+    so user commands (PRIORITY_USER) go before background refreshes and ingests (PRIORITY_BACKGROUND).
+    429 and 5xx responses and connection errors are retried with jittered exponential backoff, honoring Retry-After.
+    """
+    def __init__(self, burst_limit: float = JOLPICA_BURST_LIMIT, hourly_limit: float = JOLPICA_HOURLY_LIMIT,
+                 max_retries: int = JOLPICA_MAX_RETRIES, backoff: float = JOLPICA_BACKOFF):
+        self.buckets = [
+            TokenBucket(rate=burst_limit, capacity=burst_limit),
+            TokenBucket(rate=hourly_limit / 3600, capacity=hourly_limit),
+        ]
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.metrics = {'requests': 0, 'delayed': 0, 'throttled': 0, 'retries': 0, 'failures': 0}
+        self._waiters = []
+        self._sequence = 0
+        self._dispatcher = None
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a token."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def _acquire(self, priority: int) -> None:
+        if not self._waiters and all(bucket.delay() == 0 for bucket in self.buckets):
+            for bucket in self.buckets:
+                bucket.take()
+            return
+        self.metrics['delayed'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (priority, self._sequence, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            delay = max(bucket.delay() for bucket in self.buckets)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            for bucket in self.buckets:
+                bucket.take()
+            future.set_result(None)
+
+    def _backoff_delay(self, attempt: int, response_retry_after: float | None = None) -> float:
+        if response_retry_after is not None:
+            return min(response_retry_after, MAX_RETRY_DELAY)
+        return random.uniform(0, min(self.backoff * 2 ** attempt, MAX_RETRY_DELAY))
+
+    async def get_json(self, session: aiohttp.ClientSession, url: str, priority: int = PRIORITY_USER) -> dict:
+        """
+        Requests a Jolpica endpoint.
+
+        Args:
+            session (aiohttp.ClientSession): Session to use. If None, a temporary one is opened.
+            url (str): Full URL of the endpoint.
+            priority (int): PRIORITY_USER or PRIORITY_BACKGROUND. Lower values are served first.
+
+        Returns:
+            dict: Parsed JSON, or None if Jolpica responded with a 4xx status code other than 429.
+
+        Raises:
+            aiohttp.ClientError: If the request still fails after all retries.
+        """
+        async with use_session(session) as http_session:
+            attempt = 0
+            while True:
+                await self._acquire(priority)
+                self.metrics['requests'] += 1
+                try:
+                    async with http_session.get(url) as response:
+                        if response.status == 429 or response.status >= 500:
+                            if response.status == 429:
+                                self.metrics['throttled'] += 1
+                            error = aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+                            delay = self._backoff_delay(attempt, retry_after(response.headers.get('Retry-After')))
+                        elif response.status in range(400, 499):
+                            return None
+                        else:
+                            return await response.json()
+                except (aiohttp.ClientError, TimeoutError) as e:
+                    error = e
+                    delay = self._backoff_delay(attempt)
+                if attempt >= self.max_retries:
+                    self.metrics['failures'] += 1
+                    raise error
+                attempt += 1
+                self.metrics['retries'] += 1
+                await asyncio.sleep(delay)
+
+
+jolpica = JolpicaClient()
@@ -0,0 +1,164 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.config import MEDIA_QUEUE_SIZE, MEDIA_TIMEOUT, MEDIA_WORKERS
+
+
+class MediaPoolFull(Exception):
+    """Raised when a media job is submitted while the queue of the MediaPool is full."""
+
+
+def _start_method() -> str:
+    # Forking a process that runs threads (the event loop's default executor, the counter store) can copy
+    # a held lock into the child and deadlock it, so workers are started from a clean process instead.
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _abandon(future: asyncio.Future, cleanup=None) -> None:
+    """Lets a job finish without its caller. Its result goes to *cleanup* and its exception is not logged as never retrieved."""
+    def done(future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        if cleanup is not None:
+            cleanup(future.result())
+
+    future.add_done_callback(done)
+
+
+class MediaPool:
+    """
+    Runs media jobs (yt-dlp extraction and downloads) in *workers* processes of their own, so they use other cores
+    and never hold the GIL of the bot. At most *workers* jobs run at once, at most *queue_size* more wait for a
+    turn and any further job is rejected with MediaPoolFull.
+
+    A process cannot be stopped in the middle of a job, so a job that times out makes the pool kill its processes
+    and start new ones. Jobs that were running next to it are retried once on the new processes.
+    A caller that is cancelled while its job runs does not wait for it; *cleanup* gets the result once it is done.
+    """
+    def __init__(self, workers: int = MEDIA_WORKERS, queue_size: int = MEDIA_QUEUE_SIZE, timeout: float = MEDIA_TIMEOUT,
+                 executor=ProcessPoolExecutor):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.running = 0
+        self.waiting = 0
+        self.metrics = {'jobs': 0, 'completed': 0, 'failed': 0, 'timeouts': 0, 'cancelled': 0, 'rejected': 0, 'recycled': 0}
+        self._create_executor = executor
+        self._executor = None
+        self._slots = asyncio.Semaphore(workers)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self._create_executor is ProcessPoolExecutor:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(_start_method()))
+            else:
+                self._executor = self._create_executor(max_workers=self.workers)
+        return self._executor
+
+    def _recycle(self, executor) -> None:
+        """Kills the processes of *executor*, if it is still the current one. The next job starts new processes."""
+        if self._executor is not executor:
+            return
+        self._executor = None
+        self.metrics['recycled'] += 1
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def run(self, function, *args, timeout: float | None = None, cleanup=None):
+        """
+        Runs function(*args) in a worker process. *function* and its arguments have to be picklable,
+        i.e. module-level functions and plain values.
+
+        Args:
+            function: Function to run.
+            *args: Arguments for *function*.
+            timeout (float): Seconds the job may run, not counting the wait in the queue. Defaults to the pool's timeout.
+            cleanup: Function called with the result of a job whose caller was cancelled while it ran.
+
+        Returns:
+            The result of the function.
+
+        Raises:
+            MediaPoolFull: Too many jobs are waiting already.
+            TimeoutError: The job ran longer than *timeout*.
+        """
+        if self._slots.locked() and self.waiting >= self.queue_size:
+            self.metrics['rejected'] += 1
+            raise MediaPoolFull(f'{self.waiting} media jobs are waiting already')
+        self.metrics['jobs'] += 1
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            self.metrics['cancelled'] += 1
+            raise
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await self._execute(function, args, timeout or self.timeout, cleanup, retry=True)
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    async def _execute(self, function, args, timeout: float, cleanup, retry: bool):
+        executor = self._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        try:
+            # Shielded, so the job's future stays around for cleanup after a timeout or cancellation.
+            result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except TimeoutError:
+            self.metrics['timeouts'] += 1
+            _abandon(future)
+            self._recycle(executor)
+            raise
+        except asyncio.CancelledError:
+            self.metrics['cancelled'] += 1
+            _abandon(future, cleanup)
+            raise
+        except BrokenProcessPool:
+            self._recycle(executor)
+            if retry:
+                return await self._execute(function, args, timeout, cleanup, retry=False)
+            self.metrics['failed'] += 1
+            raise
+        except Exception:
+            self.metrics['failed'] += 1
+            raise
+        self.metrics['completed'] += 1
+        return result
+
+    def shutdown(self) -> None:
+        """Stops the worker processes without waiting for running jobs."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Running and waiting jobs, the number of workers and the metrics.
+        """
+        return {**self.metrics, 'running': self.running, 'waiting': self.waiting, 'workers': self.workers}
+
+
+media_pool = MediaPool()
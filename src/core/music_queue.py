@@ -0,0 +1,136 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from collections import deque
+
+from core.audio_cache import audio_cache, resolve_audio
+from core.config import AUDIO_STREAMING, MUSIC_QUEUE_SIZE
+
+
+async def load_track(url: str):
+    """
+    Gets a track ready to play: streamed or from the cache with AUDIO_STREAMING, otherwise downloaded into the cache.
+
+    Args:
+        url (str): The URL of the YouTube video.
+
+    Returns:
+        tuple: Arguments for create_source (path or URL, streamed, codec), None if the track could not be loaded.
+    """
+    if AUDIO_STREAMING:
+        return await resolve_audio(url)
+    path = await audio_cache.fetch(url)
+    return (path, False, 'opus') if path else None
+
+
+class Track:
+    """A track requested with /play. *channel* is where the request came from, for messages about it."""
+    def __init__(self, url: str, requester: str, channel=None):
+        self.url = url
+        self.requester = requester
+        self.channel = channel
+        self._loading = None
+
+    def prefetch(self, load) -> asyncio.Task:
+        """
+        Starts loading the track in the background, unless it is already loading.
+
+        Args:
+            load: Coroutine function that takes the URL, e.g. load_track.
+
+        Returns:
+            asyncio.Task: Task that gives the result of *load*.
+        """
+        if self._loading is None:
+            self._loading = asyncio.create_task(load(self.url))
+        return self._loading
+
+    def cancel(self) -> None:
+        """Stops loading the track."""
+        if self._loading is not None and not self._loading.done():
+            self._loading.cancel()
+
+
+class GuildQueue:
+    """
+    Tracks waiting to be played in one guild. While one track plays, the next one is loaded in the background,
+    so it starts without waiting for yt-dlp.
+    """
+    def __init__(self, load=load_track, max_size: int = MUSIC_QUEUE_SIZE):
+        self.load = load
+        self.max_size = max_size
+        self.current = None
+        self.tracks = deque()
+
+    @property
+    def full(self) -> bool:
+        """True if no more tracks can be added."""
+        return len(self.tracks) >= self.max_size
+
+    def add(self, track: Track) -> int:
+        """
+        Adds a track to the end of the queue.
+
+        Args:
+            track (Track)
+
+        Returns:
+            int: Position of the track in the queue (1 is played next), 0 if the queue is full.
+        """
+        if self.full:
+            return 0
+        self.tracks.append(track)
+        if self.current is not None:
+            self.prefetch()
+        return len(self.tracks)
+
+    def prefetch(self) -> None:
+        """Starts loading the next track, if there is one."""
+        if self.tracks:
+            self.tracks[0].prefetch(self.load)
+
+    def advance(self):
+        """
+        Makes the next track the current one and starts loading it and the one after it.
+        Does not wait, so a caller that sees no current track can take the next one before anyone else.
+
+        Returns:
+            Track: The new current track, None if the queue is empty.
+        """
+        self.current = self.tracks.popleft() if self.tracks else None
+        if self.current is not None:
+            self.current.prefetch(self.load)
+            self.prefetch()
+        return self.current
+
+    def clear(self) -> int:
+        """
+        Removes every waiting track. The current one keeps playing.
+
+        Returns:
+            int: Number of removed tracks.
+        """
+        removed = len(self.tracks)
+        for track in self.tracks:
+            track.cancel()
+        self.tracks.clear()
+        return removed
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def __iter__(self):
+        return iter(self.tracks)
@@ -0,0 +1,197 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import discord
+
+from core.config import AI_EDIT_INTERVAL, AI_MAX_PAGES
+
+CURSOR = '▌'
+MESSAGE_LIMIT = 1900
+FENCE = '```'
+TOO_LONG = 'Response is too long to send it on Discord.'
+
+
+def _boundary(text: str, budget: int) -> int:
+    """Gives where to cut *text* to fit in *budget* characters: after a paragraph, a line or a word if possible."""
+    for separator in ('\n\n', '\n', ' '):
+        position = text.rfind(separator, 0, budget)
+        if position > budget // 2:
+            return position + len(separator)
+    return budget
+
+
+def _fence_after(text: str, fence: str) -> str:
+    """Gives the opening line of the code block still open at the end of *text*, None if every block is closed."""
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith(FENCE):
+            fence = None if fence else stripped
+    return fence
+
+
+def split(text: str, limit: int = MESSAGE_LIMIT) -> list:
+    """
+    Splits text into pages of at most *limit* characters, cutting after paragraphs, lines or words where possible.
+    A code block cut in two is closed at the end of a page and opened again with the same language on the next one,
+    so every page is valid markdown.
+
+    Args:
+        text (str)
+        limit (int): Maximum length of a page.
+
+    Returns:
+        list: Pages of the text.
+    """
+    pages = []
+    fence = None
+    while True:
+        prefix = f'{fence}\n' if fence else ''
+        if len(prefix) + len(text) <= limit:
+            pages.append(prefix + text)
+            return pages
+        budget = max(1, limit - len(prefix))
+        cut = _boundary(text, budget)
+        fence_after = _fence_after(text[:cut], fence)
+        if fence_after:
+            # Leaves room for closing the code block.
+            cut = _boundary(text, max(1, budget - len(FENCE) - 1))
+            fence_after = _fence_after(text[:cut], fence)
+        page, text = text[:cut], text[cut:]
+        page = prefix + page.rstrip()
+        if fence_after:
+            page += f'\n{FENCE}'
+            text = text.lstrip('\n')
+        else:
+            text = text.lstrip()
+        pages.append(page)
+        fence = fence_after
+
+
+class StreamRenderer:
+    """
+    Shows streamed text in Discord messages while it is generated.
+
+    Chunks are collected in a list and joined only when the messages are updated. Updates happen at most once
+    per *edit_interval* seconds, however many chunks arrive, and finish() always shows the final text.
+    Text longer than *limit* continues in new messages sent with *send*, up to *max_pages* messages.
+    """
+    def __init__(self, message: discord.Message, send=None, edit_interval: float = AI_EDIT_INTERVAL,
+                 limit: int = MESSAGE_LIMIT, max_pages: int = AI_MAX_PAGES):
+        self.messages = [message]
+        self.send = send
+        self.edit_interval = edit_interval
+        self.limit = limit
+        self.max_pages = max_pages if send else 1
+        self.edits = 0
+        self.overflowed = False
+        self._shown = [None]
+        self._chunks = []
+        self._length = 0
+        self._changed = asyncio.Event()
+        self._showing = asyncio.Lock()
+        self._editor = None
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return ''.join(self._chunks)
+
+    def __len__(self) -> int:
+        return self._length
+
+    async def _show(self, final: bool) -> None:
+        if self.overflowed:
+            return
+        pages = split(self.text, self.limit)
+        if len(pages) > self.max_pages:
+            # The rest is sent as a file by the caller, the messages only lose their cursor.
+            self.overflowed = True
+            pages = [content.removesuffix(CURSOR) for content in self._shown if content] or [TOO_LONG]
+            final = True
+        for index, page in enumerate(pages):
+            content = page if final or index < len(pages) - 1 else page + CURSOR
+            if index < len(self.messages):
+                if self._shown[index] != content:
+                    await self.messages[index].edit(content=content)
+                    self.edits += 1
+            else:
+                self.messages.append(await self.send(content))
+                self._shown.append(None)
+            self._shown[index] = content
+
+    async def _edit_loop(self) -> None:
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            async with self._showing:
+                await self._show(final=False)
+            await asyncio.sleep(self.edit_interval)
+
+    def feed(self, chunk: str) -> None:
+        """
+        Adds a chunk of text. The messages are updated in the background.
+
+        Args:
+            chunk (str)
+        """
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        self._changed.set()
+        if self._editor is None:
+            self._editor = asyncio.create_task(self._edit_loop())
+
+    async def render(self, chunks) -> str:
+        """
+        Feeds every chunk of an async iterator and shows the final text.
+
+        Args:
+            chunks: Async iterator of str, e.g. process_prompt(prompt).
+
+        Returns:
+            str: The whole text.
+        """
+        try:
+            async for chunk in chunks:
+                self.feed(chunk)
+        finally:
+            await self._stop()
+        return await self.finish()
+
+    async def _stop(self) -> None:
+        if self._editor is not None:
+            # Waits for an update in progress, so a message being sent is never sent twice.
+            async with self._showing:
+                self._editor.cancel()
+            try:
+                await self._editor
+            except asyncio.CancelledError:
+                pass
+            self._editor = None
+
+    async def finish(self) -> str:
+        """
+        Stops background updates and shows the final text without the cursor. If the text needs more than
+        *max_pages* messages, self.overflowed is set and the caller has to send it another way.
+
+        Returns:
+            str: The whole text.
+        """
+        await self._stop()
+        await self._show(final=True)
+        return self.text
@@ -14,11 +14,12 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import yt_dlp
+import discord
 import re
 import os
+import shutil
 
 ydl_opts = {
-    'outtmpl': '/tmp/%(id)s.%(ext)s',
     'format': 'bestaudio/best',
     'noplaylist': True,
     'quiet': False,
@@ -34,6 +35,24 @@ ydl_opts = {
     }],
 }
 
+stream_opts = {
+    # Opus streams can be sent to Discord without re-encoding.
+    'format': 'bestaudio[acodec=opus]/bestaudio/best',
+    'noplaylist': True,
+    'quiet': True,
+    'no_warnings': True,
+    'nocheckcertificate': True,
+    'source_address': '0.0.0.0',
+}
+
+# Stream URLs are plain HTTP, so FFmpeg reconnects instead of ending the track when the connection drops.
+FFMPEG_STREAM_OPTIONS = {
+    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
+    'options': '-vn',
+}
+
+OPUS_CODECS = ('opus', 'libopus')
+
 youtube_regex1 = (
         r'(https?://)?(www\.|m\.)?'
         r'(youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/)'
@@ -58,31 +77,78 @@ def get_yt_video_id(url: str) -> str:
         return match.group(1)
     return None
 
-def download_youtube_video(url: str):
+def download_youtube_video(url: str, folder: str):
     """
-    Downloads a YouTube video from the given URL and returns the path to the downloaded file.
+    Downloads the audio of a YouTube video into *folder*, an empty temporary folder. The caller moves
+    the file where it belongs and deletes the folder, e.g. AudioCache.add. If the download fails, the folder is deleted.
 
     Args:
         url (str): The URL of the YouTube video to be downloaded.
+        folder (str): Temporary folder, on the same file system as the final path.
 
     Returns:
-        str: The path to the downloaded file with the extension changed to .opus.
-        bool: If the video could not be downloaded or video not found.
+        str: ID of the video.
+        str: Path of the downloaded .opus file.
+        float: Duration of the video in seconds, None if unknown.
+        bool: None if the video could not be downloaded or video not found.
     """
     match = re.match(youtube_regex1, url)
-    if not bool(match):
+    if bool(match):
+        try:
+            with yt_dlp.YoutubeDL({**ydl_opts, 'outtmpl': os.path.join(folder, '%(id)s.%(ext)s')}) as ydl:
+                info = ydl.extract_info(url, download=True)
+                path = os.path.splitext(ydl.prepare_filename(info))[0] + '.opus'
+                if os.path.exists(path):
+                    return info['id'], path, info.get('duration')
+        except Exception as e:
+            print(f"Could not download {url}: {e!r}")
+    shutil.rmtree(folder, ignore_errors=True)
+    return None
+
+
+def get_stream_url(url: str):
+    """
+    Finds the direct URL of the audio stream of a YouTube video without downloading it.
+
+    Args:
+        url (str): The URL of the YouTube video.
+
+    Returns:
+        str: ID of the video.
+        str: URL of the audio stream, which FFmpeg can play right away.
+        float: Duration of the video in seconds, None if unknown.
+        str: Audio codec of the stream, e.g. 'opus', None if unknown.
+        bool: None if the URL is not a YouTube video or the video was not found.
+    """
+    if not re.match(youtube_regex1, url):
         return None
-    video_id = get_yt_video_id(url)
-    if video_id:
-        if os.path.exists(f'/tmp/{video_id}.opus'):
-            return f'/tmp/{video_id}.opus'
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            path = ydl.prepare_filename(info).replace(".webm", ".opus").replace(".m4a", ".opus")
-            if os.path.exists(path):
-                return path
-            else:
-                return None
-    except Exception:
+        with yt_dlp.YoutubeDL(stream_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except yt_dlp.utils.DownloadError:
         return None
+    if not info or not info.get('url'):
+        return None
+    codec = info.get('acodec')
+    return info['id'], info['url'], info.get('duration'), None if codec in (None, 'none') else codec
+
+
+async def create_source(source: str, streamed: bool = False, codec: str | None = None) -> discord.FFmpegOpusAudio:
+    """
+    Creates an audio source that FFmpeg turns into Opus packets, so the bot process never encodes audio itself.
+    Opus input is only remuxed (codec copy), anything else is encoded by FFmpeg.
+
+    Args:
+        source (str): Path of a file or URL of a stream.
+        streamed (bool): True if *source* is a stream URL, so FFmpeg reconnects when the connection drops.
+        codec (str): Audio codec of *source* if known, otherwise it is probed with ffprobe.
+
+    Returns:
+        discord.FFmpegOpusAudio: Source for VoiceClient.play.
+    """
+    options = FFMPEG_STREAM_OPTIONS if streamed else {}
+    if codec is None:
+        codec, _ = await discord.FFmpegOpusAudio.probe(source)
+    if codec in OPUS_CODECS:
+        return discord.FFmpegOpusAudio(source, codec='copy', **options)
+    return discord.FFmpegOpusAudio(source, **options)
@@ -17,6 +17,10 @@ import os
 import discord
 from discord.ext import commands
 from core.config import TOKEN
+from core.http import create_session
+from core.howmany import CounterStore, CounterBuffer
+from core.audio_cache import audio_cache
+from core.media_pool import media_pool
 
 class MyBot(commands.Bot):
     def __init__(self):
@@ -24,10 +28,27 @@ class MyBot(commands.Bot):
         intents.message_content = True
         intents.voice_states = True
         super().__init__(command_prefix="!", intents=intents)
+        self.http_session = None
+        self.counters = None
 
     async def setup_hook(self):
+        self.http_session = create_session()
+        store = CounterStore()
+        imported = await store.migrate()
+        if imported:
+            print(f"Imported {imported} counters from text files")
+        self.counters = CounterBuffer(store)
         await self.load_cogs()
 
+    async def close(self):
+        await super().close()
+        if self.http_session:
+            await self.http_session.close()
+        if self.counters:
+            await self.counters.close()
+        await audio_cache.save()
+        media_pool.shutdown()
+
     async def load_cogs(self):
         cogs_path = os.path.join(os.path.dirname(__file__), "cogs")
         count = 0
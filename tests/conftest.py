@@ -0,0 +1,36 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import pytest
+
+_benchmark_lines = []
+
+
+@pytest.fixture
+def benchmark_report(record_property):
+    """Gives a function that reports a benchmark result in the terminal summary and as a JUnit property."""
+    def report(name: str, line: str) -> None:
+        _benchmark_lines.append(f'{name}: {line}')
+        record_property(name, line)
+
+    return report
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _benchmark_lines:
+        terminalreporter.section('benchmark results')
+        for line in _benchmark_lines:
+            terminalreporter.write_line(line)
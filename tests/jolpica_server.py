@@ -0,0 +1,191 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""A local stand-in for the Jolpica F1 API, so F1 code can be tested and benchmarked offline."""
+
+import asyncio
+import datetime
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+DEFAULT_LIMIT = 30
+BASE_PATH = '/ergast/f1'
+
+RACE_NAMES = [
+    'Bahrain', 'Saudi Arabian', 'Australian', 'Japanese', 'Chinese', 'Miami', 'Emilia Romagna', 'Monaco',
+    'Canadian', 'Spanish', 'Austrian', 'British', 'Hungarian', 'Belgian', 'Dutch', 'Italian',
+    'Azerbaijan', 'Singapore', 'United States', 'Mexico City', 'São Paulo', 'Las Vegas', 'Qatar', 'Abu Dhabi',
+]
+STATUSES = ['Finished', 'Finished', 'Finished', '+1 Lap', 'Engine', 'Collision', 'Gearbox', 'Disqualified']
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+SPRINT_POINTS = [8, 7, 6, 5, 4, 3, 2, 1]
+
+
+def _driver(number: int) -> dict:
+    return {'driverId': f'driver_{number}', 'givenName': f'Driver{number}', 'familyName': f'Family{number}'}
+
+
+def _constructor(number: int) -> dict:
+    return {'constructorId': f'team_{number // 2}', 'name': f'Team {number // 2}'}
+
+
+class Season:
+    """A deterministic, realistic-sized F1 season: *rounds* races with *drivers* results each and a sprint every fourth round."""
+    def __init__(self, season: int, rounds: int = 24, drivers: int = 20):
+        self.season = season
+        self.races = []
+        self.results = []
+        self.sprint_results = []
+        points = [0.0] * drivers
+        for roundnumber in range(1, rounds + 1):
+            race = {
+                'season': str(season),
+                'round': str(roundnumber),
+                'raceName': f'{RACE_NAMES[(roundnumber - 1) % len(RACE_NAMES)]} Grand Prix',
+                'Circuit': {
+                    'circuitId': f'circuit_{roundnumber}',
+                    'circuitName': f'Circuit {roundnumber}',
+                    'Location': {'locality': f'City {roundnumber}', 'country': f'Country {roundnumber}'},
+                },
+                'date': (datetime.date(season, 3, 1) + datetime.timedelta(weeks=roundnumber - 1)).isoformat(),
+                'time': '14:00:00Z',
+            }
+            if roundnumber % 4 == 0:
+                race['Sprint'] = {'date': race['date']}
+            self.races.append(race)
+            order = [(number + roundnumber + season) % drivers for number in range(drivers)]
+            for position, number in enumerate(order, start=1):
+                earned = POINTS[position - 1] if position <= len(POINTS) else 0
+                points[number] += earned
+                self.results.append((race, self._result(position, number, earned, STATUSES[(position + roundnumber) % len(STATUSES)])))
+                if 'Sprint' in race:
+                    earned = SPRINT_POINTS[position - 1] if position <= len(SPRINT_POINTS) else 0
+                    points[number] += earned
+                    self.sprint_results.append((race, self._result(position, number, earned, 'Finished')))
+        ranking = sorted(range(drivers), key=lambda number: -points[number])
+        self.standings = [
+            {
+                'position': str(position), 'positionText': str(position), 'points': f'{points[number]:g}', 'wins': '0',
+                'Driver': _driver(number), 'Constructors': [_constructor(number)],
+            }
+            for position, number in enumerate(ranking, start=1)
+        ]
+
+    @staticmethod
+    def _result(position: int, number: int, points: float, status: str) -> dict:
+        return {
+            'number': str(number), 'position': str(position), 'positionText': str(position), 'points': str(points),
+            'grid': str(number + 1), 'laps': '57', 'status': status,
+            'Driver': _driver(number), 'Constructor': _constructor(number),
+        }
+
+
+def _paginate(request: web.Request, rows: list) -> tuple:
+    limit = int(request.query.get('limit', DEFAULT_LIMIT))
+    offset = int(request.query.get('offset', 0))
+    return rows[offset:offset + limit], {'limit': str(limit), 'offset': str(offset), 'total': str(len(rows))}
+
+
+def _group(rows: list, key: str) -> list:
+    races = {}
+    for race, result in rows:
+        races.setdefault(race['round'], {**{field: value for field, value in race.items() if field != 'Sprint'}, key: []})[key].append(result)
+    return list(races.values())
+
+
+class JolpicaServer:
+    """
+    Serves generated Jolpica responses on localhost.
+
+    Args:
+        delay (float): Seconds every response is delayed by, like a slow upstream.
+        throttle_every (int): If set, every Nth request is answered with 429 Too Many Requests.
+        retry_after (float): Retry-After header sent with 429 responses.
+        rounds (int): Number of races in every season.
+    """
+    def __init__(self, delay: float = 0.0, throttle_every: int = 0, retry_after: float = 0.0, rounds: int = 24):
+        self.delay = delay
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.rounds = rounds
+        self.requests = 0
+        self.throttled = 0
+        self.paths = []
+        self._seasons = {}
+        self._server = None
+        app = web.Application()
+        app.router.add_get(BASE_PATH + '/{season:\\d+}/races/', self._races)
+        app.router.add_get(BASE_PATH + '/{season:\\d+}/results/', self._season_results)
+        app.router.add_get(BASE_PATH + '/{season:\\d+}/sprint/', self._sprint_results)
+        app.router.add_get(BASE_PATH + '/{season:\\d+}/driverstandings/', self._standings)
+        app.router.add_get(BASE_PATH + '/{season:\\d+}/{round:\\d+}/results/', self._race_results)
+        self.app = app
+
+    @property
+    def url(self) -> str:
+        """Base URL to use instead of the real Jolpica API."""
+        return str(self._server.make_url(BASE_PATH))
+
+    async def start(self) -> str:
+        self._server = TestServer(self.app)
+        await self._server.start_server()
+        return self.url
+
+    async def close(self) -> None:
+        if self._server is not None:
+            await self._server.close()
+
+    def season(self, season: int) -> Season:
+        if season not in self._seasons:
+            self._seasons[season] = Season(season, rounds=self.rounds)
+        return self._seasons[season]
+
+    async def _respond(self, request: web.Request, table: str, content: dict, page: dict | None = None) -> web.Response:
+        self.requests += 1
+        self.paths.append(request.path_qs)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.throttle_every and self.requests % self.throttle_every == 0:
+            self.throttled += 1
+            return web.json_response({'detail': 'Too many requests'}, status=429, headers={'Retry-After': f'{self.retry_after:g}'})
+        data = {'MRData': {'series': 'f1', **(page or {'limit': str(DEFAULT_LIMIT), 'offset': '0', 'total': '1'}), table: content}}
+        return web.json_response(data)
+
+    async def _races(self, request: web.Request) -> web.Response:
+        season = self.season(int(request.match_info['season']))
+        races, page = _paginate(request, season.races)
+        return await self._respond(request, 'RaceTable', {'season': str(season.season), 'Races': races}, page)
+
+    async def _season_results(self, request: web.Request) -> web.Response:
+        season = self.season(int(request.match_info['season']))
+        rows, page = _paginate(request, season.results)
+        return await self._respond(request, 'RaceTable', {'season': str(season.season), 'Races': _group(rows, 'Results')}, page)
+
+    async def _sprint_results(self, request: web.Request) -> web.Response:
+        season = self.season(int(request.match_info['season']))
+        rows, page = _paginate(request, season.sprint_results)
+        return await self._respond(request, 'RaceTable', {'season': str(season.season), 'Races': _group(rows, 'SprintResults')}, page)
+
+    async def _race_results(self, request: web.Request) -> web.Response:
+        season = self.season(int(request.match_info['season']))
+        roundnumber = request.match_info['round']
+        rows = [(race, result) for race, result in season.results if race['round'] == roundnumber]
+        return await self._respond(request, 'RaceTable', {'season': str(season.season), 'Races': _group(rows, 'Results')})
+
+    async def _standings(self, request: web.Request) -> web.Response:
+        season = self.season(int(request.match_info['season']))
+        standings_lists = [{'season': str(season.season), 'round': str(self.rounds), 'DriverStandings': season.standings}]
+        return await self._respond(request, 'StandingsTable', {'season': str(season.season), 'StandingsLists': standings_lists})
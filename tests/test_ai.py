@@ -0,0 +1,122 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.core.ai import (
+    AIBackend,
+    GeminiBackend,
+    StubBackend,
+    cached_stream,
+    process_prompt,
+)
+from src.core.ai_scheduler import AIScheduler
+from src.core.cache import TTLCache
+from src.core.stream import StreamRenderer
+
+
+def test_ai_imports_without_api_key():
+    env = {key: value for key, value in os.environ.items() if key not in ('GEMINI_API_KEY', 'GOOGLE_API_KEY')}
+    subprocess.run([sys.executable, '-c', 'import core.ai, cogs.utility'], cwd='src', env=env, check=True)
+
+
+def test_gemini_backend_is_lazy():
+    backend = GeminiBackend()
+    assert backend._client is None
+
+
+@pytest.mark.asyncio
+async def test_stub_backend_streams_chunks():
+    backend = StubBackend(chunk_size=7, delay=0, length=50)
+    chunks = [chunk async for chunk in backend.stream('Hi')]
+    assert ''.join(chunks) == backend.response('Hi')
+    assert len(''.join(chunks)) == 50
+    assert ''.join(chunks).startswith('You said: Hi\n\n')
+    assert all(len(chunk) == 7 for chunk in chunks[:-1])
+    assert [chunk async for chunk in backend.stream('Hi')] == chunks
+
+
+def test_stub_backend_keeps_long_prompts():
+    assert StubBackend(length=5).response('Hello there') == 'You said: Hello there\n\n'
+
+
+@pytest.mark.asyncio
+async def test_process_prompt_uses_backend():
+    with patch('src.core.ai._backend', StubBackend(chunk_size=10, delay=0, length=30)):
+        text = ''.join([chunk async for chunk in process_prompt('Hello')])
+    assert text == StubBackend(length=30).response('Hello')
+
+
+def test_backend_without_stream_cannot_be_created():
+    class Incomplete(AIBackend):
+        model = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_benchmark_stub_streaming(benchmark_report):
+    backend = StubBackend(chunk_size=5, delay=0.001, length=4000)
+    scheduler = AIScheduler(max_concurrent=8)
+    messages = []
+
+    async def send(content):
+        message = AsyncMock()
+        messages.append(message)
+        return message
+
+    async def respond(user_id):
+        async with scheduler.slot(1, user_id):
+            renderer = StreamRenderer(AsyncMock(), send=send, edit_interval=0.05)
+            return await renderer.render(backend.stream(f'prompt {user_id}')), renderer.edits
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(respond(user_id) for user_id in range(32)))
+    elapsed = time.perf_counter() - started
+    edits = sum(edits for _, edits in results)
+    benchmark_report('stub streaming', f'32 responses: {elapsed:.2f} s, {32 / elapsed:.1f} responses/s, {edits} edits, {len(messages)} continuations')
+    assert all(len(text) == 4000 for text, _ in results)
+    assert scheduler.stats()['max_queue_depth'] == 24
+
+
+@pytest.mark.asyncio
+async def test_process_prompt_caches_by_history():
+    backend = StubBackend(chunk_size=10, delay=0, length=30)
+    history = [('Hi', 'Hello')]
+
+    def cached(prompt, model, stream, history=()):
+        return cached_stream(prompt, model, stream, ttl=60, history=history)
+
+    with patch('src.core.ai._backend', backend), patch('src.core.ai.cached_stream', cached), \
+         patch.object(sys.modules[cached_stream.__module__], 'ai_cache', TTLCache()), \
+         patch.object(backend, 'stream', wraps=backend.stream) as stream:
+        text = ''.join([chunk async for chunk in process_prompt('And now?', history)])
+        assert ''.join([chunk async for chunk in process_prompt('And now?', list(history))]) == text
+        assert stream.call_count == 1
+        ''.join([chunk async for chunk in process_prompt('And now?', [('Hey', 'Hello')])])
+        ''.join([chunk async for chunk in process_prompt('And now?')])
+        assert stream.call_count == 3
+    assert text == backend.response('And now?', history)
+    assert '(after 1 earlier messages)' in text
@@ -0,0 +1,99 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from src.core.ai_cache import ai_cache, cached_stream, is_cached, normalize_prompt
+
+
+@pytest.fixture(autouse=True)
+def clear_ai_cache():
+    ai_cache.clear()
+    yield
+    ai_cache.clear()
+
+
+class FakeModel:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def stream(self, prompt):
+        self.calls += 1
+        for word in ['Paris', ' is', ' the capital.']:
+            yield word
+        if self.fail:
+            raise RuntimeError('stream broke')
+
+
+async def collect(prompt, model, ttl=60, name='model'):
+    return [chunk async for chunk in cached_stream(prompt, name, model.stream, ttl=ttl)]
+
+
+def test_normalize_prompt():
+    assert normalize_prompt('  What is the   capital of FRANCE?? ') == 'what is the capital of france'
+    assert normalize_prompt('Hello!\n') == 'hello'
+
+
+@pytest.mark.asyncio
+async def test_cached_stream_replays_chunks():
+    model = FakeModel()
+    assert await collect('What is the capital of France?', model) == ['Paris', ' is', ' the capital.']
+    assert is_cached('what is the capital of france', 'model')
+    assert await collect('what is the capital of france', model) == ['Paris', ' is', ' the capital.']
+    assert model.calls == 1
+    await collect('what is the capital of france', model, name='other-model')
+    assert model.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_is_cached_does_not_count_lookups():
+    model = FakeModel()
+    assert not is_cached('prompt', 'model')
+    await collect('prompt', model)
+    assert is_cached('prompt', 'model')
+    await collect('prompt', model)
+    stats = ai_cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_cached_stream_keys_on_history():
+    model = FakeModel()
+    history = [('Hi', 'Hello')]
+    await collect('prompt', model)
+    chunks = [chunk async for chunk in cached_stream('prompt', 'model', model.stream, ttl=60, history=history)]
+    assert model.calls == 2
+    assert is_cached('prompt', 'model', list(history))
+    assert not is_cached('prompt', 'model', [('Hey', 'Hello')])
+    assert [chunk async for chunk in cached_stream('prompt', 'model', model.stream, ttl=60, history=history)] == chunks
+    assert model.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_stream_disabled():
+    model = FakeModel()
+    await collect('prompt', model, ttl=0)
+    await collect('prompt', model, ttl=0)
+    assert model.calls == 2
+    assert len(ai_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_stream_does_not_cache_failures():
+    model = FakeModel(fail=True)
+    with pytest.raises(RuntimeError):
+        await collect('prompt', model)
+    assert not is_cached('prompt', 'model')
@@ -0,0 +1,91 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from src.core.ai_memory import Conversation, ConversationMemory, count_tokens, summarize
+
+
+def turn(number, length=40):
+    return f'Question {number}. ' + 'q' * length, f'Answer {number}. ' + 'a' * length
+
+
+def test_conversation_evicts_oldest_turns():
+    conversation = Conversation(budget=100)
+    for number in range(10):
+        conversation.add(*turn(number))
+        assert conversation.tokens <= 100
+    history = conversation.history()
+    assert history[-1] == turn(9)
+    assert history == [turn(number) for number in range(10 - len(history), 10)]
+    assert conversation.tokens == sum(count_tokens(prompt) + count_tokens(response) for prompt, response in history)
+
+
+def test_conversation_drops_turn_over_budget():
+    conversation = Conversation(budget=10)
+    assert conversation.add('x' * 100, 'y') == 0
+    assert conversation.history() == []
+
+
+def test_conversation_summarizes_evicted_turns():
+    conversation = Conversation(budget=100, summary_budget=25)
+    for number in range(10):
+        conversation.add(*turn(number))
+        assert conversation.tokens <= 100
+    assert conversation.summary.endswith(f'- Question {9 - len(conversation)}.')
+    assert count_tokens(conversation.summary) <= 25
+    assert conversation.history()[0][0].startswith('Summary of our earlier conversation:')
+    assert conversation.history()[-1] == turn(9)
+
+
+def test_summarize_keeps_recent_sentences():
+    summary = ''
+    for number in range(20):
+        summary = summarize(summary, f'Prompt {number}! More text.', 'response', budget=10)
+    assert summary.split('\n')[-1] == '- Prompt 19!'
+    assert count_tokens(summary) <= 10
+
+
+def test_memory_is_per_channel():
+    memory = ConversationMemory(channel_budget=1000, total_budget=10000)
+    memory.add(1, 'Hi', 'Hello')
+    memory.add(2, 'Bye', 'Goodbye')
+    memory.add(1, 'How are you?', 'Fine')
+    assert memory.history(1) == [('Hi', 'Hello'), ('How are you?', 'Fine')]
+    assert memory.history(2) == [('Bye', 'Goodbye')]
+    assert memory.history(3) == []
+    assert memory.forget(2)
+    assert not memory.forget(2)
+    assert memory.tokens == count_tokens('Hi') + count_tokens('Hello') + count_tokens('How are you?') + count_tokens('Fine')
+
+
+def test_memory_evicts_least_recently_used_channels():
+    memory = ConversationMemory(channel_budget=100, total_budget=300)
+    for channel_id in range(5):
+        memory.add(channel_id, *turn(channel_id, length=100))
+    memory.history(0)
+    for channel_id in range(5, 8):
+        memory.add(channel_id, *turn(channel_id, length=100))
+    assert memory.tokens <= 300
+    assert memory.history(0) == [turn(0, length=100)]
+    assert memory.history(1) == []
+    assert memory.stats()['evicted_channels'] == 8 - len(memory)
+    assert memory.tokens == sum(conversation.tokens for conversation in memory._channels.values())
+
+
+def test_memory_disabled():
+    memory = ConversationMemory(channel_budget=0)
+    memory.add(1, 'Hi', 'Hello')
+    assert memory.history(1) == []
+    assert len(memory) == 0
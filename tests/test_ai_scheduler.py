@@ -0,0 +1,109 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from src.core.ai_scheduler import AIScheduler
+
+
+async def request(scheduler, order, name, guild_id, user_id, release, positions=None):
+    async def on_position(position):
+        positions.append(position)
+
+    async with scheduler.slot(guild_id, user_id, on_position=on_position if positions is not None else None):
+        order.append(name)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_concurrency():
+    scheduler = AIScheduler(max_concurrent=2)
+    order = []
+    release = asyncio.Event()
+    tasks = [asyncio.create_task(request(scheduler, order, number, 1, number, release)) for number in range(5)]
+    await asyncio.sleep(0.01)
+    assert order == [0, 1]
+    assert scheduler.running == 2
+    assert scheduler.queue_depth == 3
+    release.set()
+    await asyncio.gather(*tasks)
+    assert sorted(order) == [0, 1, 2, 3, 4]
+    stats = scheduler.stats()
+    assert (stats['running'], stats['queue_depth'], stats['completed'], stats['queued'], stats['max_queue_depth']) == (0, 0, 5, 3, 3)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_is_fair_between_guilds_and_users():
+    scheduler = AIScheduler(max_concurrent=1)
+    order = []
+    gates = {}
+
+    async def run(name, guild_id, user_id):
+        gates[name] = asyncio.Event()
+        await request(scheduler, order, name, guild_id, user_id, gates[name])
+
+    tasks = [asyncio.create_task(run('first', 0, 0))]
+    await asyncio.sleep(0)
+    for name, guild_id, user_id in [('a1', 1, 10), ('a2', 1, 10), ('a3', 1, 10), ('b1', 1, 11), ('c1', 2, 20), ('c2', 2, 20)]:
+        tasks.append(asyncio.create_task(run(name, guild_id, user_id)))
+        await asyncio.sleep(0)
+    while len(order) < 7:
+        await asyncio.sleep(0.01)
+        gates[order[-1]].set()
+    await asyncio.gather(*tasks)
+    assert order == ['first', 'a1', 'c1', 'b1', 'c2', 'a2', 'a3']
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reports_positions():
+    scheduler = AIScheduler(max_concurrent=1)
+    order = []
+    release = asyncio.Event()
+    positions = []
+    first = asyncio.create_task(request(scheduler, order, 'first', 1, 1, release))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(request(scheduler, order, 'second', 1, 2, release))
+    await asyncio.sleep(0)
+    third = asyncio.create_task(request(scheduler, order, 'third', 1, 3, release, positions))
+    await asyncio.sleep(0.01)
+    assert positions == [2]
+    second.cancel()
+    await asyncio.sleep(0.01)
+    assert positions == [2, 1]
+    release.set()
+    await asyncio.gather(first, third)
+    assert order == ['first', 'third']
+    assert scheduler.stats()['cancelled'] == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancel_running_frees_slot():
+    scheduler = AIScheduler(max_concurrent=1)
+    order = []
+    release = asyncio.Event()
+    first = asyncio.create_task(request(scheduler, order, 'first', 1, 1, asyncio.Event()))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(request(scheduler, order, 'second', 1, 2, release))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert order == ['first', 'second']
+    release.set()
+    await second
+    assert scheduler.running == 0
+    assert scheduler.metrics['completed'] == 1
+    assert scheduler.metrics['cancelled'] == 1
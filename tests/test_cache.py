@@ -0,0 +1,109 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.core.cache import SingleFlight, TTLCache
+
+
+def test_ttl_cache_hit_and_miss():
+    cache = TTLCache(maxsize=2)
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_ttl_cache_expiry():
+    cache = TTLCache()
+    with patch("src.core.cache.time.monotonic", return_value=100.0):
+        cache.set('current', 'data', ttl=10)
+        cache.set('forever', 'data')
+    with patch("src.core.cache.time.monotonic", return_value=111.0):
+        assert cache.get('current') is None
+        assert cache.get('forever') == 'data'
+        assert cache.get_stale('current') == ('data', False)
+    assert len(cache) == 2
+
+
+def test_ttl_cache_stats():
+    cache = TTLCache(maxsize=10)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['hit_rate'] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_concurrent_calls():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch(value):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(*(flight.do('key', fetch, 42) for _ in range(5)))
+    assert results == [42] * 5
+    assert calls == 1
+    assert flight.shared == 4
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exceptions():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(flight.do('key', fail), flight.do('key', fail), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 'data'
+
+    first = asyncio.create_task(flight.do('key', fetch))
+    second = asyncio.create_task(flight.do('key', fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 'data'
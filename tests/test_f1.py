@@ -13,10 +13,34 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import datetime
 import pytest
 from unittest.mock import AsyncMock, patch
-from src.core.f1 import race_result, f1_season_calendar, f1_standings_py
-from src.core.config import CURRENT_YEAR
+from src.core.f1 import race_result, f1_season_calendar, f1_standings_py, f1_cache, ingest_season, refresh_interval, season_results
+from src.core.f1_archive import F1Archive
+from src.core.jolpica import JolpicaClient
+from src.core.config import CURRENT_YEAR, F1_REFRESH_INTERVAL, F1_RACE_WEEKEND_REFRESH_INTERVAL
+
+@pytest.fixture(autouse=True)
+def clear_f1_cache():
+    f1_cache.clear()
+    yield
+    f1_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def unlimited_jolpica():
+    with patch("src.core.f1.jolpica", JolpicaClient(burst_limit=1000, hourly_limit=1000000)):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def f1_archive(tmp_path):
+    archive = F1Archive(str(tmp_path / 'f1.sqlite3'))
+    with patch("src.core.f1.f1_archive", archive):
+        yield archive
+
 
 @pytest.mark.asyncio
 async def test_f1_standings_py_success():
@@ -219,3 +243,189 @@ async def test_f1_standings_py_invalid_year():
     next_year = CURRENT_YEAR + 1
     standings2 = await f1_standings_py(next_year)
     assert standings2 == []
+
+
+@pytest.mark.asyncio
+async def test_f1_completed_season_is_cached():
+    mock_data = {
+        "MRData": {
+            "RaceTable": {
+                "Races": [
+                    {
+                        "round": "1",
+                        "raceName": "Australian Grand Prix",
+                        "date": "1998-03-08",
+                    }
+                ]
+            }
+        }
+    }
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json.return_value = mock_data
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        first = await f1_season_calendar(1998)
+        second = await f1_season_calendar(1998)
+
+        assert first == second
+        assert mock_get.call_count == 1
+        assert f1_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_f1_not_found_is_not_cached():
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_response = AsyncMock()
+        mock_response.status = 404
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        await f1_standings_py(2024)
+        await f1_standings_py(2024)
+
+        assert mock_get.call_count == 2
+
+
+def _page(races, total, offset):
+    return {"MRData": {"limit": "2", "offset": str(offset), "total": str(total), "RaceTable": {"Races": races}}}
+
+
+def _result(position, driver_id):
+    return {
+        "position": str(position),
+        "positionText": str(position),
+        "points": "10",
+        "Driver": {"driverId": driver_id, "givenName": driver_id.title(), "familyName": "Driver"},
+        "Constructor": {"constructorId": "ferrari", "name": "Ferrari"},
+        "status": "Finished",
+    }
+
+
+@pytest.mark.asyncio
+async def test_f1_ingest_season_merges_pages(f1_archive):
+    race = {"season": "1998", "round": "1", "raceName": "Australian Grand Prix", "date": "1998-03-08"}
+    pages = {
+        "races/?limit=2&offset=0": _page([dict(race)], 1, 0),
+        "results/?limit=2&offset=0": _page([dict(race, Results=[_result(1, "alpha"), _result(2, "beta")])], 3, 0),
+        "results/?limit=2&offset=2": _page([dict(race, Results=[_result(3, "gamma")])], 3, 2),
+        "sprint/?limit=2&offset=0": _page([], 0, 0),
+        "driverstandings/?limit=2&offset=0": {"MRData": {"limit": "2", "offset": "0", "total": "0", "StandingsTable": {"StandingsLists": []}}},
+    }
+
+    def fake_get(url):
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json.return_value = pages[url.split("/1998/")[1]]
+        context = AsyncMock()
+        context.__aenter__.return_value = mock_response
+        return context
+
+    with patch("src.core.f1.F1_PAGE_SIZE", 2), patch("aiohttp.ClientSession.get", side_effect=fake_get):
+        stored = await ingest_season(1998)
+
+    assert stored == 3
+    assert f1_archive.has_season(1998)
+    name, rows = f1_archive.race(1998, 1)
+    assert name == "Australian Grand Prix"
+    assert [row["position"] for row in rows] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_f1_race_result_from_archive(f1_archive):
+    race = {
+        "round": "5",
+        "raceName": "Spanish Grand Prix",
+        "date": "1998-05-10",
+        "Results": [_result(1, "alpha")],
+    }
+    f1_archive.store_season(1998, [race], [])
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        gp_name, results = await race_result(1998, 5)
+
+        mock_get.assert_not_called()
+        assert gp_name == "Spanish Grand Prix"
+        assert results == ["🥇 Alpha Driver (Ferrari)"]
+
+
+@pytest.mark.asyncio
+async def test_f1_concurrent_requests_are_coalesced():
+    mock_data = {"MRData": {"RaceTable": {"Races": []}}}
+
+    async def slow_json():
+        await asyncio.sleep(0.01)
+        return mock_data
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json.side_effect = slow_json
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        results = await asyncio.gather(*(race_result(2024, 3) for _ in range(10)))
+
+        assert results == [(None, [])] * 10
+        assert mock_get.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_f1_current_season_serves_stale_and_revalidates():
+    url = f"https://api.jolpi.ca/ergast/f1/{CURRENT_YEAR}/races/"
+    stale = {"MRData": {"RaceTable": {"Races": [{"round": "1", "raceName": "Old Grand Prix", "date": f"{CURRENT_YEAR}-03-01"}]}}}
+    fresh = {"MRData": {"RaceTable": {"Races": [{"round": "1", "raceName": "New Grand Prix", "date": f"{CURRENT_YEAR}-03-01"}]}}}
+    f1_cache.set(url, stale, ttl=-1)
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json.return_value = fresh
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        races = await f1_season_calendar(CURRENT_YEAR)
+        assert races == [f"1. Old Grand Prix - {CURRENT_YEAR}-03-01 UTC"]
+
+        for _ in range(5):
+            await asyncio.sleep(0)
+        races = await f1_season_calendar(CURRENT_YEAR)
+        assert races == [f"1. New Grand Prix - {CURRENT_YEAR}-03-01 UTC"]
+        assert mock_get.call_count == 1
+
+
+def test_f1_refresh_interval():
+    calendar = [{"date": "2026-05-03", "time": "20:00:00Z"}, {"date": "2026-05-24", "time": None}]
+    utc = datetime.UTC
+
+    race_weekend = datetime.datetime(2026, 5, 2, 12, 0, tzinfo=utc)
+    assert refresh_interval(calendar, race_weekend) == F1_RACE_WEEKEND_REFRESH_INTERVAL
+
+    hour_before_weekend = datetime.datetime(2026, 5, 21, 11, 0, tzinfo=utc)
+    assert refresh_interval(calendar, hour_before_weekend) == max(3600, F1_RACE_WEEKEND_REFRESH_INTERVAL)
+
+    after_season = datetime.datetime(2026, 12, 1, tzinfo=utc)
+    assert refresh_interval(calendar, after_season) == F1_REFRESH_INTERVAL
+
+
+@pytest.mark.asyncio
+async def test_f1_season_results_paginated():
+    race = {"season": "2024", "round": "6", "raceName": "Miami Grand Prix", "date": "2024-05-05"}
+    pages = {
+        "results/?limit=2&offset=0": _page([dict(race, Results=[_result(1, "alpha"), _result(2, "beta")])], 3, 0),
+        "results/?limit=2&offset=2": _page([dict(race, Results=[_result(3, "gamma")])], 3, 2),
+        "sprint/?limit=2&offset=0": {"MRData": {"limit": "2", "offset": "0", "total": "1", "RaceTable": {"Races": [dict(race, SprintResults=[_result(1, "beta")])]}}},
+    }
+
+    def fake_get(url):
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json.return_value = pages[url.split("/2024/")[1]]
+        context = AsyncMock()
+        context.__aenter__.return_value = mock_response
+        return context
+
+    with patch("src.core.f1.F1_PAGE_SIZE", 2), patch("aiohttp.ClientSession.get", side_effect=fake_get) as mock_get:
+        rows = await season_results(2024)
+
+    assert mock_get.call_count == 3
+    assert [(row["driver_id"], row["sprint"]) for row in rows] == [("beta", True), ("alpha", False), ("beta", False), ("gamma", False)]
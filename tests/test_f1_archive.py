@@ -0,0 +1,131 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+
+import pytest
+
+from src.core.f1_archive import F1Archive
+
+RACES = [
+    {
+        "round": "1",
+        "raceName": "Bahrain Grand Prix",
+        "date": "2021-03-28",
+        "time": "15:00:00Z",
+        "Circuit": {"circuitName": "Bahrain International Circuit", "Location": {"locality": "Sakhir", "country": "Bahrain"}},
+        "Results": [
+            {
+                "position": "1",
+                "positionText": "1",
+                "points": "25",
+                "grid": "2",
+                "laps": "56",
+                "Driver": {"driverId": "hamilton", "givenName": "Lewis", "familyName": "Hamilton"},
+                "Constructor": {"constructorId": "mercedes", "name": "Mercedes"},
+                "status": "Finished",
+            },
+            {
+                "position": "2",
+                "positionText": "R",
+                "points": "0",
+                "Driver": {"driverId": "gasly", "givenName": "Pierre", "familyName": "Gasly"},
+                "Constructor": {"constructorId": "alphatauri", "name": "AlphaTauri"},
+                "status": "Engine",
+            },
+        ],
+    },
+    {
+        "round": "2",
+        "raceName": "Emilia Romagna Grand Prix",
+        "date": "2021-04-18",
+        "Sprint": {"date": "2021-04-17"},
+        "SprintResults": [
+            {
+                "position": "1",
+                "points": "3",
+                "Driver": {"driverId": "hamilton", "givenName": "Lewis", "familyName": "Hamilton"},
+                "Constructor": {"constructorId": "mercedes", "name": "Mercedes"},
+                "status": "Finished",
+            },
+        ],
+    },
+]
+
+STANDINGS = [
+    {
+        "position": "1",
+        "points": "395.5",
+        "wins": "10",
+        "Driver": {"driverId": "max_verstappen", "givenName": "Max", "familyName": "Verstappen"},
+        "Constructors": [{"constructorId": "red_bull", "name": "Red Bull"}],
+    },
+]
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = F1Archive(str(tmp_path / 'f1.sqlite3'))
+    archive.store_season(2021, RACES, STANDINGS)
+    return archive
+
+
+def test_archive_missing_file_is_not_created(tmp_path):
+    path = str(tmp_path / 'missing.sqlite3')
+    archive = F1Archive(path)
+    assert archive.has_season(2021) is False
+    assert not os.path.exists(path)
+
+
+def test_archive_race(archive):
+    name, rows = archive.race(2021, 1)
+    assert name == "Bahrain Grand Prix"
+    assert rows[1] == {"position": 2, "given_name": "Pierre", "family_name": "Gasly", "constructor": "AlphaTauri", "status": "Engine"}
+    assert archive.race(2021, 9) == (None, [])
+
+
+def test_archive_calendar(archive):
+    calendar = archive.calendar(2021)
+    assert [race["round"] for race in calendar] == [1, 2]
+    assert calendar[0]["country"] == "Bahrain"
+    assert calendar[1]["sprint"] == 1
+
+
+def test_archive_standings(archive):
+    standings = archive.standings(2021)
+    assert standings[0]["family_name"] == "Verstappen"
+    assert standings[0]["points"] == 395.5
+
+
+def test_archive_store_season_replaces_rows(archive):
+    archive.store_season(2021, RACES[:1], [])
+    assert len(archive.calendar(2021)) == 1
+    assert archive.standings(2021) == []
+    assert F1Archive(archive.path).has_season(2021)
+
+
+def test_archive_season_results(archive):
+    rows = archive.season_results(2021)
+    assert [(row["round"], row["sprint"], row["position"]) for row in rows] == [(1, False, 1), (1, False, 2), (2, True, 1)]
+    assert rows[2]["points"] == 3
+    assert rows[2]["race_name"] == "Emilia Romagna Grand Prix"
+
+
+def test_archive_search_terms(archive, tmp_path):
+    races = archive.all_races()
+    assert [(race["season"], race["round"], race["circuit_name"]) for race in races] == [
+        (2021, 1, "Bahrain International Circuit"), (2021, 2, None),
+    ]
+    assert archive.driver_names() == ["Pierre Gasly", "Lewis Hamilton", "Max Verstappen"]
+    assert F1Archive(str(tmp_path / 'missing.sqlite3')).all_races() == []
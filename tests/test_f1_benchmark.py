@@ -0,0 +1,139 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.core.f1 import (
+    f1_cache,
+    f1_season_calendar,
+    f1_standings_py,
+    ingest_season,
+    race_result,
+)
+from src.core.f1_archive import F1Archive
+from src.core.http import create_session
+from src.core.jolpica import JolpicaClient
+from tests.jolpica_server import JolpicaServer
+
+SEASONS = range(2000, 2010)
+CONCURRENCY = 50
+
+
+@pytest.fixture
+def server_options():
+    return {'delay': 0.02}
+
+
+@pytest.fixture
+async def server(server_options, tmp_path):
+    server = JolpicaServer(**server_options)
+    url = await server.start()
+    f1_cache.clear()
+    client = JolpicaClient(burst_limit=10000, hourly_limit=10000000, backoff=0.01)
+    with patch("src.core.f1.JOLPICA_URL", url), patch("src.core.f1.jolpica", client), \
+            patch("src.core.f1.f1_archive", F1Archive(str(tmp_path / 'f1.sqlite3'))):
+        yield server
+    f1_cache.clear()
+    await server.close()
+
+
+@pytest.fixture
+async def session():
+    session = create_session()
+    yield session
+    await session.close()
+
+
+async def measure(report, name: str, calls: list, concurrency: int = CONCURRENCY) -> dict:
+    """
+    Runs coroutine factories with at most *concurrency* at once and reports throughput and latency percentiles.
+
+    Args:
+        report: The benchmark_report fixture.
+        name (str): Name of the measurement in the report.
+        calls (list): Functions without arguments that return an awaitable.
+        concurrency (int): Maximum number of calls in flight.
+
+    Returns:
+        dict: Results of the calls, throughput in calls per second and p50/p99 latency in milliseconds.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed(call):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await call()
+            latencies.append(time.perf_counter() - started)
+            return result
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - started
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    result = {
+        'results': results,
+        'throughput': len(calls) / elapsed,
+        'p50': percentiles[49] * 1000,
+        'p99': percentiles[98] * 1000,
+    }
+    report(name, f"{len(calls)} calls, {result['throughput']:.0f}/s, p50 {result['p50']:.1f} ms, p99 {result['p99']:.1f} ms")
+    return result
+
+
+@pytest.mark.asyncio
+async def test_server_paginates_season(server, session):
+    stored = await ingest_season(2005, session=session)
+    assert stored == 24 * 20
+    assert sum('/2005/results/' in path for path in server.paths) == 5
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('server_options', [{'throttle_every': 2}])
+async def test_server_throttling_is_retried(server, session):
+    name, results = await race_result(2005, 3, session=session)
+    assert name == 'Australian Grand Prix'
+    assert len(results) == 20
+    calendar = await f1_season_calendar(2005, session=session)
+    assert len(calendar) == 24
+    assert server.throttled == 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_benchmark_race_result(server, session, benchmark_report):
+    calls = [lambda season=season, roundnumber=roundnumber: race_result(season, roundnumber, session=session)
+             for season in SEASONS for roundnumber in range(1, 25)]
+    cold = await measure(benchmark_report, 'race_result cold', calls)
+    warm = await measure(benchmark_report, 'race_result warm', calls)
+    assert all(name for name, _ in cold['results'] + warm['results'])
+    # The warm run is served from the cache.
+    assert server.requests == len(calls)
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_benchmark_calendar_and_standings_coalesced(server, session, benchmark_report):
+    calls = [lambda season=season: f1_season_calendar(season, session=session) for season in SEASONS for _ in range(20)]
+    calls += [lambda season=season: f1_standings_py(season, session=session) for season in SEASONS for _ in range(20)]
+    cold = await measure(benchmark_report, 'calendar + standings cold', calls)
+    warm = await measure(benchmark_report, 'calendar + standings warm', calls)
+    assert all(cold['results'] + warm['results'])
+    assert server.requests == 2 * len(SEASONS)
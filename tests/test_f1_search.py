@@ -0,0 +1,159 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.core import f1_search
+from src.core.f1_search import (
+    SearchIndex,
+    index_races,
+    race_label,
+    refresh_search_index,
+    resolve_race,
+    search_drivers,
+    search_races,
+    tokenize,
+)
+
+RACES = [
+    {'round': 1, 'race_name': 'Bahrain Grand Prix', 'circuit_name': 'Bahrain International Circuit', 'locality': 'Sakhir', 'country': 'Bahrain'},
+    {'round': 5, 'race_name': 'Miami Grand Prix', 'circuit_name': 'Miami International Autodrome', 'locality': 'Miami', 'country': 'USA'},
+    {'round': 8, 'race_name': 'Monaco Grand Prix', 'circuit_name': 'Circuit de Monaco', 'locality': 'Monte-Carlo', 'country': 'Monaco'},
+    {'round': 21, 'race_name': 'São Paulo Grand Prix', 'circuit_name': 'Autódromo José Carlos Pace', 'locality': 'São Paulo', 'country': 'Brazil'},
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    f1_search.race_indexes.clear()
+    with patch("src.core.f1_search.driver_index", SearchIndex()), patch("src.core.f1_search._archive_version", None):
+        yield
+    f1_search.race_indexes.clear()
+
+
+def test_tokenize_strips_accents():
+    assert tokenize('São Paulo Grand-Prix') == ['sao', 'paulo', 'grand', 'prix']
+
+
+def test_search_index_prefix_and_exact():
+    index = SearchIndex()
+    index.add('max', 'Max Verstappen')
+    index.add('jos', 'Jos Verstappen')
+    index.add('maxc', 'Max Chilton')
+    assert index.search('verst') == ['max', 'jos']
+    assert index.search('max') == ['max', 'maxc']
+    assert index.search('max verst') == ['max']
+    assert index.search('') == ['max', 'jos', 'maxc']
+    assert index.search('', limit=1) == ['max']
+
+
+def test_search_index_fuzzy():
+    index = SearchIndex()
+    index.add('hamilton', 'Lewis Hamilton')
+    index.add('leclerc', 'Charles Leclerc')
+    assert index.search('hamliton') == ['hamilton']
+    assert index.search('leclrec') == ['leclerc']
+    assert index.search('zzz') == []
+
+
+def test_search_index_remove():
+    index = SearchIndex()
+    index.add(1, 'Monaco Grand Prix')
+    index.add(2, 'Miami Grand Prix')
+    index.remove(1)
+    assert index.search('mo') == []
+    assert index.search('grand') == [2]
+    assert len(index) == 1
+    index.add(2, 'Imola Grand Prix')
+    assert index.search('miami') == []
+    assert index.search('imola') == [2]
+
+
+def test_race_label():
+    assert race_label(RACES[1]) == 'R5 Miami Grand Prix (Miami International Autodrome, USA)'
+    assert race_label({'round': 1, 'race_name': 'British Grand Prix'}) == 'R1 British Grand Prix'
+
+
+def test_search_races():
+    assert search_races(2024, 'monaco') is None
+    index_races(2024, RACES)
+    assert search_races(2024, 'monaco') == [(8, 'R8 Monaco Grand Prix (Circuit de Monaco, Monaco)')]
+    assert [race[0] for race in search_races(2024, 'sao paulo')] == [21]
+    assert [race[0] for race in search_races(2024, 'brazil')] == [21]
+    assert [race[0] for race in search_races(2024, 'usa')] == [5]
+    assert [race[0] for race in search_races(2024, 'monacco')] == [8]
+    assert [race[0] for race in search_races(2024, '')] == [1, 5, 8, 21]
+
+
+@pytest.mark.asyncio
+async def test_resolve_race():
+    with patch("src.core.f1_search.season_races", AsyncMock(return_value=RACES)) as mock_races:
+        assert await resolve_race(2024, ' 7 ') == 7
+        mock_races.assert_not_called()
+        assert await resolve_race(2024, 'Miami') == 5
+        assert await resolve_race(2024, 'interlagos') is None
+        assert mock_races.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_race_without_calendar():
+    with patch("src.core.f1_search.season_races", AsyncMock(return_value=None)):
+        assert await resolve_race(1949, 'British') is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_search_index():
+    archive = type('Archive', (), {
+        'version': 0,
+        'all_races': lambda self: [dict(race, season=1998) for race in RACES[:2]],
+        'driver_names': lambda self: ['Mika Häkkinen', 'Michael Schumacher'],
+    })()
+    standings = [{'given_name': 'Max', 'family_name': 'Verstappen'}, {'given_name': 'Michael', 'family_name': 'Schumacher'}]
+    with patch("src.core.f1_search.f1_archive", archive), \
+            patch("src.core.f1_search.CURRENT_YEAR", 2024), \
+            patch("src.core.f1_search.season_races", AsyncMock(return_value=RACES)), \
+            patch("src.core.f1_search.season_standings", AsyncMock(return_value=standings)):
+        await refresh_search_index()
+        assert [race[0] for race in search_races(1998, 'miami')] == [5]
+        assert [race[0] for race in search_races(2024, 'monaco')] == [8]
+        assert search_drivers('hakkinen') == ['Mika Häkkinen']
+        assert search_drivers('mi') == ['Mika Häkkinen', 'Michael Schumacher']
+        assert search_drivers('') == ['Mika Häkkinen', 'Michael Schumacher', 'Max Verstappen']
+
+
+
+@pytest.mark.asyncio
+async def test_refresh_search_index_after_ingest():
+    archive = type('Archive', (), {
+        'version': 0,
+        'races': [dict(RACES[0], season=1998)],
+        'names': ['Mika Häkkinen'],
+        'all_races': lambda self: self.races,
+        'driver_names': lambda self: self.names,
+    })()
+    with patch("src.core.f1_search.f1_archive", archive), \
+            patch("src.core.f1_search.season_races", AsyncMock(return_value=[])), \
+            patch("src.core.f1_search.season_standings", AsyncMock(return_value=[])):
+        await refresh_search_index()
+        archive.races = archive.races + [dict(RACES[2], season=1999)]
+        archive.names = archive.names + ['Jacques Villeneuve']
+        await refresh_search_index()
+        assert search_races(1999, 'monaco') is None
+        archive.version += 1
+        await refresh_search_index()
+        assert [race[0] for race in search_races(1999, 'monaco')] == [8]
+        assert search_drivers('villeneuve') == ['Jacques Villeneuve']
@@ -0,0 +1,103 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from src.core.f1_season import (
+    SeasonTables,
+    f1_constructor_standings,
+    f1_points_progression,
+    f1_teammate_battles,
+    season_tables_cache,
+)
+
+
+def _row(roundnumber, position, driver_id, constructor_id, points, sprint=False):
+    return {
+        'round': roundnumber,
+        'race_name': f'Race {roundnumber}',
+        'position': position,
+        'driver_id': driver_id,
+        'given_name': driver_id.title(),
+        'family_name': 'Driver',
+        'constructor_id': constructor_id,
+        'constructor': constructor_id.title(),
+        'points': points,
+        'status': 'Finished',
+        'sprint': sprint,
+    }
+
+RESULTS = [
+    _row(1, 1, 'alpha', 'red', 25),
+    _row(1, 2, 'gamma', 'blue', 18),
+    _row(1, 3, 'beta', 'red', 15),
+    _row(1, 4, 'delta', 'blue', 12),
+    _row(2, 1, 'gamma', 'blue', 8, sprint=True),
+    _row(2, 1, 'beta', 'red', 25),
+    _row(2, 2, 'gamma', 'blue', 18),
+    _row(2, 3, 'alpha', 'red', 15),
+    _row(2, 4, 'delta', 'blue', 12),
+]
+
+@pytest.fixture(autouse=True)
+def tables():
+    tables = SeasonTables(2021, RESULTS)
+    season_tables_cache.set(2021, tables)
+    yield tables
+    season_tables_cache.clear()
+
+
+def test_season_tables_progression(tables):
+    assert tables.rounds == [1, 2]
+    assert tables.progression['gamma'] == [18, 44]
+    assert tables.standings_after(0)[0] == ('alpha', 25)
+    assert tables.standings_after(1)[0] == ('gamma', 44)
+
+
+def test_season_tables_teammates(tables):
+    assert tables.teammate_battles[('red', 'alpha', 'beta')] == [1, 1]
+    assert tables.teammate_battles[('blue', 'delta', 'gamma')] == [0, 2]
+
+
+def test_season_tables_find_driver(tables):
+    assert tables.find_driver('GAMMA') == 'gamma'
+    assert tables.find_driver('nobody') is None
+
+
+@pytest.mark.asyncio
+async def test_f1_constructor_standings():
+    standings = await f1_constructor_standings(2021)
+    assert standings == ['1. Red - 80 pts.', '2. Blue - 68 pts.']
+
+
+@pytest.mark.asyncio
+async def test_f1_points_progression():
+    assert await f1_points_progression(2021) == [
+        'R1 Race 1: Alpha Driver 25 pts. (+7)',
+        'R2 Race 2: Gamma Driver 44 pts. (+4)',
+    ]
+    assert await f1_points_progression(2021, driver='delta') == [
+        'R1 Race 1: +12 (12 pts., P4)',
+        'R2 Race 2: +12 (24 pts., P4)',
+    ]
+    assert await f1_points_progression(2021, driver='nobody') == []
+
+
+@pytest.mark.asyncio
+async def test_f1_teammate_battles():
+    assert await f1_teammate_battles(2021) == [
+        'Red: Alpha Driver 1 - 1 Beta Driver',
+        'Blue: Delta Driver 0 - 2 Gamma Driver',
+    ]
@@ -0,0 +1,147 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.core.f1_archive import F1Archive
+from src.core.f1_stats import (
+    DNF,
+    DNS,
+    DSQ,
+    FINISHED,
+    CareerStats,
+    career_stats,
+    f1_compare_drivers,
+    f1_driver_stats,
+    invalidate_career_stats,
+    status_category,
+)
+
+DRIVERS = {'hamilton': 'Lewis Hamilton', 'michael_schumacher': 'Michael Schumacher', 'ralf_schumacher': 'Ralf Schumacher'}
+
+ROWS = sorted([
+    ('hamilton', 2020, 1, 25.0, 'Finished', 0),
+    ('hamilton', 2020, 1, 3.0, 'Finished', 1),
+    ('hamilton', 2021, 3, 15.0, '+1 Lap', 0),
+    ('hamilton', 2021, 18, 0.0, 'Engine', 0),
+    ('hamilton', 2021, 20, 0.0, 'Withdrew', 0),
+    ('michael_schumacher', 2000, 1, 10.0, 'Finished', 0),
+    ('michael_schumacher', 2000, 1, 10.0, 'Finished', 0),
+    ('michael_schumacher', 2001, 19, 0.0, 'Disqualified', 0),
+    ('ralf_schumacher', 2001, 1, 10.0, 'Finished', 0),
+], key=lambda row: row[0])
+
+@pytest.fixture
+def stats():
+    return CareerStats(DRIVERS, ROWS)
+
+
+def test_status_category():
+    assert status_category('Finished') == FINISHED
+    assert status_category('+3 Laps') == FINISHED
+    assert status_category('Gearbox') == DNF
+    assert status_category('Withdrew') == DNS
+    assert status_category('Excluded') == DSQ
+    assert status_category('Did not qualify') == DNS
+
+
+def test_career_stats_columns(stats):
+    assert len(stats) == 9
+    assert list(stats.offsets) == [0, 5, 8, 9]
+
+
+def test_career_stats_find_driver(stats):
+    assert stats.find_driver('HAMILTON') == 0
+    assert stats.find_driver('schumacher') == 1
+    assert stats.find_driver('ralf schumacher') == 2
+    assert stats.find_driver('nobody') is None
+
+
+def test_career_stats_totals(stats):
+    totals = stats.totals(0)
+    assert totals['wins'] == 1
+    assert totals['podiums'] == 2
+    assert totals['points'] == 43
+    assert totals['starts'] == 3
+    assert (totals['finished'], totals['dnf'], totals['dns'], totals['dsq']) == (2, 1, 1, 0)
+    assert (totals['first_season'], totals['last_season'], totals['seasons']) == (2020, 2021, 2)
+
+
+@pytest.mark.asyncio
+async def test_f1_driver_stats_from_archive(tmp_path):
+    archive = F1Archive(str(tmp_path / 'f1.sqlite3'))
+    race = {
+        "round": "1",
+        "raceName": "Bahrain Grand Prix",
+        "date": "2021-03-28",
+        "Results": [{
+            "position": "1",
+            "points": "25",
+            "Driver": {"driverId": "hamilton", "givenName": "Lewis", "familyName": "Hamilton"},
+            "Constructor": {"constructorId": "mercedes", "name": "Mercedes"},
+            "status": "Finished",
+        }],
+    }
+    archive.store_season(2021, [race], [])
+    invalidate_career_stats()
+    with patch("src.core.f1_stats.f1_archive", archive):
+        name, lines = await f1_driver_stats('lewis')
+        first, second, compared = await f1_compare_drivers('hamilton', 'nobody')
+    invalidate_career_stats()
+
+    assert name == 'Lewis Hamilton'
+    assert 'Wins: 1' in lines
+    assert (first, second, compared) == (None, None, [])
+
+
+def test_career_stats_sprint_only_driver():
+    stats = CareerStats({}, [('newcomer', 2024, 2, 7.0, 'Finished', 1)])
+    totals = stats.totals(0)
+    assert (totals['points'], totals['starts'], totals['seasons']) == (7.0, 0, 0)
+    assert totals['first_season'] is None and totals['last_season'] is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_build_discards_stale_stats():
+    invalidate_career_stats()
+    loaded = asyncio.Event()
+    release = asyncio.Event()
+
+    class SlowArchive:
+        calls = 0
+
+        def all_results(self):
+            SlowArchive.calls += 1
+            return DRIVERS, ROWS if SlowArchive.calls > 1 else ROWS[:1]
+
+    async def to_thread(function, *args):
+        if function == CareerStats and SlowArchive.calls == 1:
+            loaded.set()
+            await release.wait()
+        return function(*args)
+
+    with patch("src.core.f1_stats.f1_archive", SlowArchive()), patch("src.core.f1_stats.asyncio.to_thread", to_thread):
+        stale = asyncio.create_task(career_stats())
+        await loaded.wait()
+        invalidate_career_stats()
+        fresh = await career_stats()
+        release.set()
+        assert len(await stale) == 1
+        assert len(fresh) == len(ROWS)
+        assert await career_stats() is fresh
+    invalidate_career_stats()
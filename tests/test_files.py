@@ -0,0 +1,40 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from src.core.files import write_file
+
+
+def test_write_file(tmp_path):
+    path = tmp_path / 'response.txt'
+    path.write_text('old')
+    assert write_file(str(path), (chunk for chunk in ['Hello', ', ', 'wörld'])) == 12
+    assert path.read_text(encoding='utf-8') == 'Hello, wörld'
+    assert [file.name for file in tmp_path.iterdir()] == ['response.txt']
+
+
+def test_write_file_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / 'response.txt'
+    path.write_text('old')
+
+    def chunks():
+        yield 'new'
+        raise RuntimeError('stream broke')
+
+    with pytest.raises(RuntimeError):
+        write_file(str(path), chunks())
+    assert path.read_text() == 'old'
+    assert [file.name for file in tmp_path.iterdir()] == ['response.txt']
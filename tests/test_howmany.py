@@ -0,0 +1,153 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from src.core.howmany import CounterBuffer, CounterStore, RankIndex
+
+
+@pytest.fixture
+async def store(tmp_path):
+    store = CounterStore(str(tmp_path / 'counters.sqlite3'))
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_counter_store_increment(store):
+    assert await store.get('howmanytimes', 1) == 0
+    assert await store.increment('howmanytimes', 1) == 1
+    assert await store.increment('howmanytimes', 1) == 2
+    assert await store.increment('howmanybutton', 1) == 1
+    assert await store.increment('howmanytimes', 2, amount=5) == 5
+    assert await store.get('howmanytimes', 1) == 2
+
+
+@pytest.mark.asyncio
+async def test_counter_store_concurrent_increments(store):
+    counts = await asyncio.gather(*(store.increment('howmanybutton', 1) for _ in range(100)))
+    assert sorted(counts) == list(range(1, 101))
+
+
+@pytest.mark.asyncio
+async def test_counter_store_uses_wal(store):
+    await store.increment('howmanytimes', 1)
+    with sqlite3.connect(store.path) as connection:
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+@pytest.mark.asyncio
+async def test_counter_store_migrate(store, tmp_path):
+    folder = tmp_path / 'howmanytimes'
+    folder.mkdir()
+    (folder / '123.txt').write_text('7')
+    (folder / '456.txt').write_text('2\n')
+    (folder / 'test.txt').write_text('test')
+    (folder / '789.txt').write_text('not a number')
+
+    assert await store.migrate(str(tmp_path)) == 2
+    assert await store.get('howmanytimes', 123) == 7
+    assert await store.increment('howmanytimes', 456) == 3
+    assert await store.migrate(str(tmp_path)) == 0
+    assert await store.get('howmanytimes', 123) == 7
+
+
+@pytest.mark.asyncio
+async def test_counter_buffer_flushes_after_interval(store):
+    buffer = CounterBuffer(store, flush_interval=20, flush_updates=1000)
+    assert await buffer.increment('howmanybutton', 1) == 1
+    assert await buffer.increment('howmanybutton', 1) == 2
+    assert await buffer.increment('howmanybutton', 2) == 1
+    assert await store.get('howmanybutton', 1) == 0
+    assert await buffer.get('howmanybutton', 1) == 2
+    await asyncio.sleep(0.1)
+    assert await store.get('howmanybutton', 1) == 2
+    assert await store.get('howmanybutton', 2) == 1
+    assert buffer.flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_counter_buffer_flushes_after_updates(store):
+    buffer = CounterBuffer(store, flush_interval=60000, flush_updates=10)
+    await store.increment('howmanytimes', 1, amount=5)
+    counts = [await buffer.increment('howmanytimes', 1) for _ in range(10)]
+    assert counts == list(range(6, 16))
+    await asyncio.sleep(0.05)
+    assert await store.get('howmanytimes', 1) == 15
+    assert buffer.flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_counter_buffer_close_flushes(tmp_path):
+    buffer = CounterBuffer(CounterStore(str(tmp_path / 'counters.sqlite3')), flush_interval=60000)
+    await asyncio.gather(*(buffer.increment('howmanybutton', 1) for _ in range(50)))
+    await buffer.close()
+    store = CounterStore(str(tmp_path / 'counters.sqlite3'))
+    assert await store.get('howmanybutton', 1) == 50
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_counter_buffer_keeps_increments_when_flush_fails(store):
+    buffer = CounterBuffer(store, flush_interval=60000)
+    await buffer.increment('howmanytimes', 1)
+    with (patch.object(store, 'add_many', side_effect=sqlite3.OperationalError('database is locked')),
+          pytest.raises(sqlite3.OperationalError)):
+        await buffer.flush()
+    assert await buffer.flush() == 1
+    assert await store.get('howmanytimes', 1) == 1
+
+
+def test_rank_index():
+    index = RankIndex([5, 1, 3, 3])
+    assert index.rank(5) == 1
+    assert index.rank(3) == 2
+    assert index.rank(1) == 4
+    index.update(1, 2)
+    index.update(0, 1)
+    assert index.counts == [1, 2, 3, 3, 5]
+    assert index.rank(2) == 4
+    assert len(index) == 5
+
+
+@pytest.mark.asyncio
+async def test_counter_buffer_leaderboard(store):
+    await store.add_many([('howmanytimes', user_id, user_id) for user_id in range(1, 21)])
+    buffer = CounterBuffer(store, flush_interval=60000)
+    for _ in range(3):
+        await buffer.increment('howmanytimes', 5)
+    top, rank, count = await buffer.leaderboard('howmanytimes', 5, limit=3)
+    assert top == [(20, 20), (19, 19), (18, 18)]
+    assert (rank, count) == (13, 8)
+    await buffer.increment('howmanytimes', 5)
+    assert (await buffer.leaderboard('howmanytimes', 5, limit=3))[1:] == (12, 9)
+    assert (await buffer.leaderboard('howmanytimes', 99))[1:] == (None, 0)
+    assert (await buffer.leaderboard('howmanybutton', 5))[0] == []
+
+
+@pytest.mark.asyncio
+async def test_counter_buffer_rank_index_includes_pending(store):
+    await store.add_many([('howmanybutton', 1, 10), ('howmanybutton', 2, 4)])
+    buffer = CounterBuffer(store, flush_interval=60000)
+    for _ in range(7):
+        await buffer.increment('howmanybutton', 2)
+    index = await buffer._rank_index('howmanybutton')
+    assert index.counts == [10, 11]
+    await buffer.increment('howmanybutton', 3)
+    assert index.counts == [1, 10, 11]
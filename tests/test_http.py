@@ -0,0 +1,46 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from unittest.mock import AsyncMock
+
+import aiohttp
+import pytest
+
+from src.core.http import create_session, use_session
+
+
+@pytest.mark.asyncio
+async def test_create_session_connector():
+    session = create_session()
+    try:
+        assert session.connector.limit_per_host > 0
+        assert session.connector.limit >= session.connector.limit_per_host
+    finally:
+        await session.close()
+
+
+@pytest.mark.asyncio
+async def test_use_session_reuses_given_session():
+    shared = AsyncMock(spec=aiohttp.ClientSession)
+    async with use_session(shared) as session:
+        assert session is shared
+    shared.close.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_use_session_closes_temporary_session():
+    async with use_session() as session:
+        assert isinstance(session, aiohttp.ClientSession)
+    assert session.closed
@@ -0,0 +1,111 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+import pytest
+
+from src.core.jolpica import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+    JolpicaClient,
+    TokenBucket,
+    retry_after,
+)
+
+
+def _response(status, data=None, headers=None):
+    response = AsyncMock()
+    response.status = status
+    response.headers = headers or {}
+    response.json.return_value = data
+    context = AsyncMock()
+    context.__aenter__.return_value = response
+    return context
+
+
+@pytest.fixture
+def mock_session():
+    return MagicMock(spec=aiohttp.ClientSession)
+
+
+def test_token_bucket():
+    with patch("src.core.jolpica.time.monotonic", return_value=0.0):
+        bucket = TokenBucket(rate=2, capacity=2)
+        bucket.take()
+        bucket.take()
+        assert bucket.delay() == 0.5
+    with patch("src.core.jolpica.time.monotonic", return_value=0.5):
+        assert bucket.delay() == 0
+
+
+def test_retry_after():
+    assert retry_after("3") == 3.0
+    assert retry_after(None) is None
+    assert retry_after("soon") is None
+    assert retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_jolpica_not_found(mock_session):
+    mock_session.get.return_value = _response(404)
+    client = JolpicaClient()
+    assert await client.get_json(mock_session, "https://api.jolpi.ca/ergast/f1/1800/races/") is None
+
+
+@pytest.mark.asyncio
+async def test_jolpica_retries_429_honoring_retry_after(mock_session):
+    mock_session.get.side_effect = [_response(429, headers={'Retry-After': '7'}), _response(200, {"ok": True})]
+    client = JolpicaClient()
+    with patch("src.core.jolpica.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        data = await client.get_json(mock_session, "https://api.jolpi.ca/ergast/f1/2024/races/")
+
+    assert data == {"ok": True}
+    mock_sleep.assert_awaited_once_with(7.0)
+    assert client.metrics['throttled'] == 1
+    assert client.metrics['retries'] == 1
+
+
+@pytest.mark.asyncio
+async def test_jolpica_gives_up_after_max_retries(mock_session):
+    mock_session.get.side_effect = [_response(503) for _ in range(3)]
+    client = JolpicaClient(max_retries=2)
+    with patch("src.core.jolpica.asyncio.sleep", new_callable=AsyncMock), pytest.raises(aiohttp.ClientResponseError):
+        await client.get_json(mock_session, "https://api.jolpi.ca/ergast/f1/2024/races/")
+
+    assert client.metrics['requests'] == 3
+    assert client.metrics['failures'] == 1
+
+
+@pytest.mark.asyncio
+async def test_jolpica_user_requests_go_first(mock_session):
+    order = []
+
+    def fake_get(url):
+        order.append(url)
+        return _response(200, {})
+
+    mock_session.get.side_effect = fake_get
+    client = JolpicaClient(burst_limit=1, hourly_limit=1000000)
+    client.buckets[0].rate = 100
+    await client.get_json(mock_session, "first")
+    await asyncio.gather(
+        client.get_json(mock_session, "background", PRIORITY_BACKGROUND),
+        client.get_json(mock_session, "user", PRIORITY_USER),
+    )
+    assert order == ["first", "user", "background"]
+    assert client.metrics['delayed'] == 2
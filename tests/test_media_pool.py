@@ -0,0 +1,95 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from src.core.media_pool import MediaPool, MediaPoolFull
+
+
+def square(number):
+    return number * number
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def fail():
+    raise ValueError('broken')
+
+
+@pytest.fixture
+def pool():
+    pool = MediaPool(workers=2, queue_size=2, timeout=5)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_media_pool_runs_in_processes(pool):
+    assert await asyncio.gather(*(pool.run(square, number) for number in range(4))) == [0, 1, 4, 9]
+    assert await pool.run(sleep, 0) != os.getpid()
+    assert pool._executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+    with pytest.raises(ValueError):
+        await pool.run(fail)
+    stats = pool.stats()
+    assert (stats['completed'], stats['failed'], stats['running'], stats['waiting']) == (5, 1, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_media_pool_rejects_when_full(pool):
+    jobs = [asyncio.create_task(pool.run(sleep, 0.3)) for _ in range(4)]
+    await asyncio.sleep(0.05)
+    assert (pool.running, pool.waiting) == (2, 2)
+    with pytest.raises(MediaPoolFull):
+        await pool.run(square, 2)
+    await asyncio.gather(*jobs)
+    assert pool.metrics['rejected'] == 1
+
+
+@pytest.mark.asyncio
+async def test_media_pool_timeout_recycles_workers(pool):
+    first = await pool.run(sleep, 0)
+    neighbour = asyncio.create_task(pool.run(sleep, 0.5))
+    await asyncio.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        await pool.run(sleep, 10, timeout=0.2)
+    assert pool.metrics['recycled'] == 1
+    # The job that ran next to the one that timed out is retried in a new process.
+    assert await neighbour not in (first, None)
+    assert await pool.run(square, 3) == 9
+    assert pool.metrics['timeouts'] == 1
+
+
+@pytest.mark.asyncio
+async def test_media_pool_cancel_waiting_and_running(pool):
+    cleaned = []
+    running = [asyncio.create_task(pool.run(sleep, 0.3, cleanup=cleaned.append)) for _ in range(2)]
+    waiting = asyncio.create_task(pool.run(square, 2))
+    await asyncio.sleep(0.05)
+    waiting.cancel()
+    running[0].cancel()
+    await asyncio.sleep(0.05)
+    assert pool.waiting == 0
+    assert await running[1]
+    await asyncio.sleep(0.3)
+    assert len(cleaned) == 1
+    assert pool.metrics['cancelled'] == 2
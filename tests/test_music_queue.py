@@ -0,0 +1,115 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.cogs.music import Music
+from src.core.music_queue import GuildQueue, Track
+
+
+class Loader:
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+
+    async def load(self, url):
+        self.started.append(url)
+        self.gates[url] = asyncio.Event()
+        await self.gates[url].wait()
+        return url, False, 'opus'
+
+
+@pytest.mark.asyncio
+async def test_queue_prefetches_next_track():
+    loader = Loader()
+    queue = GuildQueue(loader.load)
+    assert queue.add(Track('a', 'user')) == 1
+    assert queue.add(Track('b', 'user')) == 2
+    assert loader.started == []
+
+    current = queue.advance()
+    await asyncio.sleep(0)
+    assert current.url == 'a' and queue.current is current
+    assert loader.started == ['a', 'b']
+    loader.gates['b'].set()
+    assert queue.add(Track('c', 'user')) == 2
+    await asyncio.sleep(0)
+    assert loader.started == ['a', 'b']
+
+    current = queue.advance()
+    assert await current.prefetch(queue.load) == ('b', False, 'opus')
+    await asyncio.sleep(0)
+    assert loader.started == ['a', 'b', 'c']
+    assert [track.url for track in queue] == ['c']
+
+
+@pytest.mark.asyncio
+async def test_queue_add_while_playing_prefetches():
+    loader = Loader()
+    queue = GuildQueue(loader.load)
+    queue.add(Track('a', 'user'))
+    queue.advance()
+    queue.add(Track('b', 'user'))
+    await asyncio.sleep(0)
+    assert loader.started == ['a', 'b']
+
+
+@pytest.mark.asyncio
+async def test_queue_clear_cancels_prefetch():
+    loader = Loader()
+    queue = GuildQueue(loader.load)
+    for url in 'abc':
+        queue.add(Track(url, 'user'))
+    queue.advance()
+    await asyncio.sleep(0)
+    task = queue.tracks[0].prefetch(queue.load)
+    assert queue.clear() == 2
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert len(queue) == 0
+    assert queue.current.url == 'a'
+    assert queue.advance() is None and queue.current is None
+
+
+def test_queue_max_size():
+    queue = GuildQueue(max_size=2)
+    assert queue.add(Track('a', 'user')) == 1
+    assert queue.add(Track('b', 'user')) == 2
+    assert queue.full
+    assert queue.add(Track('c', 'user')) == 0
+    assert len(queue) == 2
+
+
+async def fail(url):
+    if url == 'cancelled':
+        raise asyncio.CancelledError
+    raise OSError('No space left on device')
+
+
+@pytest.mark.asyncio
+async def test_music_start_skips_tracks_that_fail_to_load():
+    cog = Music(MagicMock())
+    guild = MagicMock(id=1)
+    guild.voice_client.is_connected.return_value = True
+    queue = cog.queues[guild.id] = GuildQueue(fail)
+    queue.add(Track('cancelled', 'user'))
+    queue.add(Track('broken', 'user'))
+    await cog.start(guild, queue.advance())
+    assert queue.current is None and len(queue) == 0
+    guild.voice_client.play.assert_not_called()
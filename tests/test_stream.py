@@ -0,0 +1,130 @@
+# Copyright (C) 2026 hakergeniusz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.stream import CURSOR, TOO_LONG, StreamRenderer, split
+
+
+async def stream(chunks, delay=0.0):
+    for chunk in chunks:
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_coalesces_edits():
+    message = AsyncMock()
+    renderer = StreamRenderer(message, edit_interval=10)
+    text = await renderer.render(stream(['word '] * 200))
+    assert text == 'word ' * 200
+    assert renderer.edits == 2
+    assert message.edit.await_args_list[-1].kwargs == {'content': text}
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_edits_on_time_budget():
+    message = AsyncMock()
+    renderer = StreamRenderer(message, edit_interval=0.03)
+    await renderer.render(stream(['a'] * 20, delay=0.01))
+    contents = [call.kwargs['content'] for call in message.edit.await_args_list]
+    assert 3 <= len(contents) <= 12
+    assert all(content.endswith(CURSOR) for content in contents[:-1])
+    assert contents[-1] == 'a' * 20
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_too_long_without_send():
+    message = AsyncMock()
+    renderer = StreamRenderer(message, edit_interval=0.01, limit=10)
+    text = await renderer.render(stream(['12345'] * 5, delay=0.02))
+    assert text == '12345' * 5
+    assert renderer.overflowed
+    assert message.edit.await_args_list[-1].kwargs == {'content': '1234512345'}
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_too_long_before_first_edit():
+    message = AsyncMock()
+    renderer = StreamRenderer(message, edit_interval=10, limit=10)
+    renderer.feed('x' * 50)
+    await renderer.finish()
+    assert renderer.overflowed
+    message.edit.assert_awaited_once_with(content=TOO_LONG)
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_continues_in_new_messages():
+    first = AsyncMock()
+    sent = []
+
+    async def send(content):
+        message = AsyncMock()
+        sent.append((content, message))
+        return message
+
+    renderer = StreamRenderer(first, send=send, edit_interval=0.01, limit=20, max_pages=20)
+    text = await renderer.render(stream(['Lorem ipsum dolor sit amet. '] * 4, delay=0.02))
+    assert not renderer.overflowed
+    pages = split(text, 20)
+    assert len(renderer.messages) == len(pages)
+    assert len(sent) == len(pages) - 1
+    shown = [first.edit.await_args_list[-1].kwargs['content']]
+    for content, message in sent:
+        shown.append(message.edit.await_args_list[-1].kwargs['content'] if message.edit.await_count else content)
+    assert shown == pages
+    assert not any(page.endswith(CURSOR) for page in shown)
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_max_pages():
+    sent = []
+
+    async def send(content):
+        sent.append(content)
+        return AsyncMock()
+
+    renderer = StreamRenderer(AsyncMock(), send=send, edit_interval=0.01, limit=10, max_pages=2)
+    await renderer.render(stream(['word '] * 20, delay=0.01))
+    assert renderer.overflowed
+    assert len(renderer.messages) <= 2
+
+
+def test_split_short_text():
+    assert split('Hello', 10) == ['Hello']
+
+
+def test_split_prefers_paragraphs_and_lines():
+    text = 'First paragraph.\n\nSecond one is here.\nThird line'
+    assert split(text, 30) == ['First paragraph.', 'Second one is here.\nThird line']
+    assert split('aaaa bbbb cccc', 10) == ['aaaa bbbb', 'cccc']
+    assert split('x' * 25, 10) == ['x' * 10, 'x' * 10, 'x' * 5]
+
+
+def test_split_reopens_code_fences():
+    code = '\n'.join(f'print({number})' for number in range(10))
+    text = f'Code:\n```py\n{code}\n```\nDone.'
+    pages = split(text, 50)
+    assert len(pages) > 1
+    for page in pages:
+        assert len(page) <= 50
+        assert page.count('```') % 2 == 0
+    assert pages[1].startswith('```py\n')
+    assert pages[-1].endswith('Done.')
+    body = [line for page in pages for line in page.split('\n') if line.startswith('print')]
+    assert body == code.split('\n')
@@ -13,35 +13,194 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from unittest.mock import patch
-from src.core.youtube import download_youtube_video, get_yt_video_id
+import asyncio
+import os
+import pytest
+import yt_dlp
+from unittest.mock import AsyncMock, patch
+from src.core.youtube import download_youtube_video, get_yt_video_id, get_stream_url, create_source, FFMPEG_STREAM_OPTIONS
+from concurrent.futures import ThreadPoolExecutor
+from src.core.audio_cache import AudioCache, resolve_audio, _warming
+from src.core.media_pool import MediaPool
+
+
+@pytest.fixture(autouse=True)
+def thread_pool():
+    # Patched functions cannot be sent to worker processes.
+    with patch("src.core.audio_cache.media_pool", MediaPool(executor=ThreadPoolExecutor)):
+        yield
 
 def test_get_yt_video_id():
     url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
     assert get_yt_video_id(url) == "dQw4w9WgXcQ"
 
-def test_download_youtube_video_cached():
+def make_download(directory, video_id, content=b'audio'):
+    folder = directory / f'download-{video_id}'
+    folder.mkdir()
+    path = folder / f'{video_id}.opus'
+    path.write_bytes(content)
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_audio_cache_fetch_cached(tmp_path):
     video_id = "dQw4w9WgXcQ"
     url = f"https://www.youtube.com/watch?v={video_id}"
-    cache_path = f"/tmp/{video_id}.opus"
+    cache = AudioCache(str(tmp_path))
+    (tmp_path / f'{video_id}.opus').write_bytes(b'audio')
+
+    with patch("src.core.audio_cache.download_youtube_video") as mock_download:
+        assert await cache.fetch(url) == str(tmp_path / f'{video_id}.opus')
+        mock_download.assert_not_called()
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_audio_cache_fetch_downloads_once(tmp_path):
+    video_id = "dQw4w9WgXcQ"
+    url = f"https://youtu.be/{video_id}"
+    cache = AudioCache(str(tmp_path))
+    calls = []
+
+    def download(url, folder):
+        calls.append(url)
+        path = os.path.join(folder, f'{video_id}.opus')
+        with open(path, 'wb') as f:
+            f.write(b'audio')
+        return video_id, path, 212
+
+    with patch("src.core.audio_cache.download_youtube_video", download):
+        paths = await asyncio.gather(cache.fetch(url), cache.fetch(url))
+    assert paths == [str(tmp_path / f'{video_id}.opus')] * 2
+    assert len(calls) == 1
+    assert sorted(file.name for file in tmp_path.iterdir()) == [f'{video_id}.opus', 'index.json']
+    assert cache.stats()['duration'] == 212
+
+
+@pytest.mark.asyncio
+async def test_audio_cache_download_timeout_leaves_no_folder(tmp_path):
+    cache = AudioCache(str(tmp_path))
+
+    def download(url, folder):
+        with open(os.path.join(folder, 'dQw4w9WgXcQ.opus.part'), 'wb') as f:
+            f.write(b'audio')
+        raise TimeoutError
+
+    with patch("src.core.audio_cache.download_youtube_video", download):
+        assert await cache.fetch("https://youtu.be/dQw4w9WgXcQ") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_audio_cache_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=25)
+    for video_id in ('a', 'b'):
+        await cache.add(video_id, make_download(tmp_path, video_id, b'x' * 10))
+    assert await cache.get('a')
+    await cache.add('c', make_download(tmp_path, 'c', b'x' * 10))
+    assert await cache.get('b') is None
+    assert not (tmp_path / 'b.opus').exists()
+    assert await cache.get('a') and await cache.get('c')
+    assert (cache.size, cache.evictions) == (20, 1)
+
+
+@pytest.mark.asyncio
+async def test_audio_cache_keeps_track_over_budget(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=5)
+    await cache.add('a', make_download(tmp_path, 'a', b'x' * 3))
+    await cache.add('b', make_download(tmp_path, 'b', b'x' * 10))
+    assert await cache.get('b')
+    assert await cache.get('a') is None
+
 
-    with patch("os.path.exists") as mock_exists:
-        mock_exists.side_effect = lambda p: p == cache_path or p == "/tmp/"
-        def side_effect(path):
-            if path == cache_path:
-                return True
-            return False
+@pytest.mark.asyncio
+async def test_audio_cache_loads_index(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    await cache.add('a', make_download(tmp_path, 'a', b'x' * 10), duration=60)
+    await cache.add('b', make_download(tmp_path, 'b', b'x' * 10))
+    await cache.get('a')
+    await cache.save()
+    (tmp_path / 'c.opus').write_bytes(b'x' * 10)
+    (tmp_path / '.download-d').mkdir()
 
-        mock_exists.side_effect = side_effect
+    loaded = AudioCache(str(tmp_path), max_bytes=100)
+    await asyncio.gather(loaded.load(), loaded.load())
+    stats = loaded.stats()
+    assert (stats['entries'], stats['size'], stats['duration']) == (3, 30, 60)
+    assert not (tmp_path / '.download-d').exists()
+    (tmp_path / 'b.opus').unlink()
+    assert await loaded.get('b') is None
+    assert loaded.size == 20
 
-        result = download_youtube_video(url)
-        assert result == cache_path
 
 @patch("yt_dlp.YoutubeDL")
-def test_download_youtube_video_failure(mock_ydl):
+def test_download_youtube_video_failure(mock_ydl, tmp_path):
     instance = mock_ydl.return_value.__enter__.return_value
     instance.extract_info.side_effect = Exception("Download failed")
 
     url = "https://www.youtube.com/watch?v=invalid"
-    result = download_youtube_video(url)
+    folder = tmp_path / '.download-invalid'
+    folder.mkdir()
+    result = download_youtube_video(url, str(folder))
     assert result is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_get_stream_url(mock_ydl):
+    instance = mock_ydl.return_value.__enter__.return_value
+    instance.extract_info.return_value = {'id': 'dQw4w9WgXcQ', 'url': 'https://example.com/audio', 'duration': 212, 'acodec': 'opus'}
+    assert get_stream_url("https://youtu.be/dQw4w9WgXcQ") == ('dQw4w9WgXcQ', 'https://example.com/audio', 212, 'opus')
+    assert instance.extract_info.call_args.kwargs == {'download': False}
+    assert get_stream_url("https://example.com/video") is None
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_get_stream_url_video_not_found(mock_ydl):
+    instance = mock_ydl.return_value.__enter__.return_value
+    instance.extract_info.side_effect = yt_dlp.utils.DownloadError("Video unavailable")
+    assert get_stream_url("https://youtu.be/dQw4w9WgXcQ") is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_audio_streams_and_warms_cache(tmp_path):
+    video_id = "dQw4w9WgXcQ"
+    url = f"https://youtu.be/{video_id}"
+    cache = AudioCache(str(tmp_path))
+    stream = (video_id, 'https://example.com/audio', 212, 'opus')
+
+    with patch("src.core.audio_cache.get_stream_url", return_value=stream), \
+         patch("src.core.audio_cache.download_youtube_video", return_value=(video_id, make_download(tmp_path, video_id), 212)):
+        assert await resolve_audio(url, cache) == ('https://example.com/audio', True, 'opus')
+        await asyncio.gather(*_warming)
+        assert await resolve_audio(url, cache) == (str(tmp_path / f'{video_id}.opus'), False, 'opus')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_resolve_audio_without_warming(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    with patch("src.core.audio_cache.get_stream_url", return_value=None):
+        assert await resolve_audio("https://youtu.be/dQw4w9WgXcQ", cache) is None
+    with patch("src.core.audio_cache.get_stream_url", return_value=('dQw4w9WgXcQ', 'https://example.com/audio', None, None)), \
+         patch("src.core.audio_cache.download_youtube_video") as mock_download:
+        assert await resolve_audio("https://youtu.be/dQw4w9WgXcQ", cache, warm=False) == ('https://example.com/audio', True, None)
+    assert not _warming
+    mock_download.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_source_passes_opus_through():
+    with patch("discord.FFmpegOpusAudio") as mock_audio:
+        await create_source('/tmp/audio/track.opus', codec='opus')
+        mock_audio.assert_called_once_with('/tmp/audio/track.opus', codec='copy')
+        mock_audio.probe.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_source_probes_unknown_codec():
+    with patch("discord.FFmpegOpusAudio") as mock_audio:
+        mock_audio.probe = AsyncMock(return_value=('aac', 128))
+        await create_source('https://example.com/audio', streamed=True)
+        mock_audio.assert_called_once_with('https://example.com/audio', **FFMPEG_STREAM_OPTIONS)
+        mock_audio.probe.assert_awaited_once_with('https://example.com/audio')